@@ -1,7 +1,6 @@
-import 'dart:convert';
 import 'dart:io';
 import 'package:flutter/material.dart';
-import 'package:flutter/services.dart';
+import '../utils/catalogo_himnos.dart';
 import 'player_screen.dart';
 
 class HomeScreen extends StatefulWidget {
@@ -38,10 +37,10 @@ class _HomeScreenState extends State<HomeScreen> {
 
   Future<void> _loadHimnos() async {
     try {
-      final String jsonString = await rootBundle.loadString('assets/data/himnos.json');
-      final List<dynamic> jsonList = json.decode(jsonString);
+      // Solo el índice (número y título); las letras se cargan al abrir
+      final indice = await CatalogoHimnos.cargarIndice();
       setState(() {
-        _himnos = jsonList.cast<Map<String, dynamic>>();
+        _himnos = indice;
       });
     } catch (e) {
       debugPrint('Error loading himnos: $e');
@@ -155,9 +154,12 @@ class _HomeScreenState extends State<HomeScreen> {
     _isProgrammaticChange = false;
   }
 
-  void _playHimno() {
+  Future<void> _playHimno() async {
     if (_selectedHimno == null) return;
     
+    final himno = await CatalogoHimnos.cargarHimno(_selectedHimno!['numero'] as int);
+    if (himno == null || !mounted) return;
+    
     String tipoAudio;
     switch (_selectedTabIndex) {
       case 1:
@@ -173,7 +175,7 @@ class _HomeScreenState extends State<HomeScreen> {
     Navigator.of(context).push(
       MaterialPageRoute(
         builder: (context) => PlayerScreen(
-          himno: _selectedHimno!,
+          himno: himno,
           tipoAudio: tipoAudio,
         ),
       ),
@@ -1,8 +1,11 @@
 import 'dart:async';
+import 'dart:typed_data';
+import 'dart:ui' show ImageFilter;
 import 'package:flutter/material.dart';
 import 'package:flutter/services.dart';
 import 'package:just_audio/just_audio.dart';
 import '../utils/background_manager.dart';
+import '../utils/forma_onda.dart';
 import 'home_screen.dart';
 
 class PlayerScreen extends StatefulWidget {
@@ -23,6 +26,10 @@ class _PlayerScreenState extends State<PlayerScreen> {
   late List<Map<String, dynamic>> _sections;
   int _currentSectionIndex = 0;
   String _backgroundPath = 'assets/images/background.png';
+  Uint8List? _placeholder;
+  FormaOnda? _formaOnda;
+  // Fracción reproducida, sin reconstruir toda la pantalla en cada posición
+  final ValueNotifier<double> _progreso = ValueNotifier(0);
   
   final AudioPlayer _audioPlayer = AudioPlayer();
   bool _isPlaying = false;
@@ -45,7 +52,16 @@ class _PlayerScreenState extends State<PlayerScreen> {
     _backgroundPath = BackgroundManager.getBackgroundForHymn(
       widget.himno['numero'] as int,
       widget.himno['titulo'] as String,
+      fondos: widget.himno['fondos'] as List<dynamic>?,
     );
+    BackgroundManager.getPlaceholder(_backgroundPath).then((bytes) {
+      if (mounted && bytes != null) setState(() => _placeholder = bytes);
+    });
+    if (_isAudioMode) {
+      FormaOnda.cargar(widget.tipoAudio, widget.himno['numero'] as int).then((forma) {
+        if (mounted && forma != null) setState(() => _formaOnda = forma);
+      });
+    }
     
     _stateSubscription = _audioPlayer.playerStateStream.listen((state) {
       if (mounted) {
@@ -72,6 +88,10 @@ class _PlayerScreenState extends State<PlayerScreen> {
       if (mounted) {
         _currentPosition = position;
         _updateSectionBasedOnPosition();
+        if (_audioDuration > Duration.zero) {
+          _progreso.value =
+              (position.inMilliseconds / _audioDuration.inMilliseconds).clamp(0.0, 1.0);
+        }
         
         // Fallback para Linux/mpv: detectar fin por posición
         if (_audioDuration.inSeconds > 0 && 
@@ -287,6 +307,7 @@ class _PlayerScreenState extends State<PlayerScreen> {
     _stateSubscription?.cancel();
     _audioPlayer.stop();
     _audioPlayer.dispose();
+    _progreso.dispose();
     super.dispose();
   }
 
@@ -319,10 +340,29 @@ class _PlayerScreenState extends State<PlayerScreen> {
         fit: StackFit.expand,
         children: [
           Image.asset(
-            _backgroundPath,
+            BackgroundManager.getVariant(
+              _backgroundPath,
+              MediaQuery.of(context).size.width * MediaQuery.of(context).devicePixelRatio,
+            ),
             fit: BoxFit.cover,
             width: double.infinity,
             height: double.infinity,
+            frameBuilder: (context, child, frame, wasSynchronouslyLoaded) {
+              // Mientras se decodifica, la miniatura ampliada y desenfocada
+              if (wasSynchronouslyLoaded || frame != null || _placeholder == null) {
+                return child;
+              }
+              return ImageFiltered(
+                imageFilter: ImageFilter.blur(sigmaX: 12, sigmaY: 12),
+                child: Image.memory(
+                  _placeholder!,
+                  fit: BoxFit.cover,
+                  width: double.infinity,
+                  height: double.infinity,
+                  filterQuality: FilterQuality.low,
+                ),
+              );
+            },
             errorBuilder: (context, error, stackTrace) {
               return Image.asset(
                 'assets/images/background.png',
@@ -338,6 +378,7 @@ class _PlayerScreenState extends State<PlayerScreen> {
               children: [
                 _buildHeader(),
                 Expanded(child: _buildContent()),
+                _buildFormaOnda(),
                 _buildBottomIndicator(),
                 const SizedBox(height: 16),
               ],
@@ -512,6 +553,51 @@ class _PlayerScreenState extends State<PlayerScreen> {
     );
   }
 
+  Widget _buildFormaOnda() {
+    final forma = _formaOnda;
+    if (forma == null) return const SizedBox.shrink();
+
+    // Los marcadores se ubican con la duración del archivo .picos, que es
+    // la misma pista que reproduce el player
+    final total = forma.duracion.inMilliseconds;
+    void seekA(double dx, double ancho) {
+      final fraccion = (dx / ancho).clamp(0.0, 1.0);
+      final destino = _audioDuration > Duration.zero ? _audioDuration : forma.duracion;
+      _audioPlayer.seek(destino * fraccion);
+      _progreso.value = fraccion;
+    }
+
+    return Padding(
+      padding: const EdgeInsets.fromLTRB(40, 0, 40, 8),
+      child: LayoutBuilder(
+        builder: (context, constraints) {
+          final ancho = constraints.maxWidth;
+          return GestureDetector(
+            behavior: HitTestBehavior.opaque,
+            onTapDown: (details) => seekA(details.localPosition.dx, ancho),
+            onHorizontalDragUpdate: (details) => seekA(details.localPosition.dx, ancho),
+            child: SizedBox(
+              height: 48,
+              width: ancho,
+              child: RepaintBoundary(
+                child: CustomPaint(
+                  painter: _FormaOndaPainter(
+                    forma: forma,
+                    progreso: _progreso,
+                    marcadores: [
+                      for (final m in forma.marcadores)
+                        if (total > 0) m.inMilliseconds / total,
+                    ],
+                  ),
+                ),
+              ),
+            ),
+          );
+        },
+      ),
+    );
+  }
+
   Widget _buildBottomIndicator() {
     if (_sections.isEmpty) return const SizedBox.shrink();
     
@@ -611,3 +697,62 @@ class _PlayerScreenState extends State<PlayerScreen> {
     );
   }
 }
+
+/// Forma de onda con la parte reproducida resaltada y una marca por sección
+class _FormaOndaPainter extends CustomPainter {
+  final FormaOnda forma;
+  final ValueNotifier<double> progreso;
+  final List<double> marcadores;
+
+  _FormaOndaPainter({
+    required this.forma,
+    required this.progreso,
+    required this.marcadores,
+  }) : super(repaint: progreso);
+
+  @override
+  void paint(Canvas canvas, Size size) {
+    final centro = size.height / 2;
+    final paso = size.width / forma.length;
+    final corte = progreso.value * size.width;
+    final reproducido = Paint()
+      ..color = Colors.white.withOpacity(0.85)
+      ..strokeWidth = paso.clamp(1.0, 3.0);
+    final pendiente = Paint()
+      ..color = Colors.white.withOpacity(0.3)
+      ..strokeWidth = paso.clamp(1.0, 3.0);
+
+    // Con pantallas angostas varios tramos caen en la misma columna
+    final columnas = size.width.floor().clamp(1, forma.length);
+    final porColumna = forma.length / columnas;
+    for (var c = 0; c < columnas; c++) {
+      final desde = (c * porColumna).floor();
+      final hasta = ((c + 1) * porColumna).ceil().clamp(desde + 1, forma.length);
+      var minimo = 0.0;
+      var maximo = 0.0;
+      for (var i = desde; i < hasta; i++) {
+        if (forma.minimos[i] < minimo) minimo = forma.minimos[i];
+        if (forma.maximos[i] > maximo) maximo = forma.maximos[i];
+      }
+      final x = (c + 0.5) * size.width / columnas;
+      canvas.drawLine(
+        Offset(x, centro - maximo * centro),
+        Offset(x, centro - minimo * centro + 1),
+        x <= corte ? reproducido : pendiente,
+      );
+    }
+
+    final marca = Paint()
+      ..color = Colors.amber.withOpacity(0.8)
+      ..strokeWidth = 1.5;
+    for (final m in marcadores) {
+      final x = m * size.width;
+      canvas.drawLine(Offset(x, 0), Offset(x, size.height), marca);
+    }
+  }
+
+  @override
+  bool shouldRepaint(_FormaOndaPainter oldDelegate) {
+    return oldDelegate.forma != forma || oldDelegate.marcadores.length != marcadores.length;
+  }
+}
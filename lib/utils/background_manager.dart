@@ -1,3 +1,7 @@
+import 'dart:convert';
+import 'dart:typed_data';
+import 'package:flutter/services.dart';
+
 /// Gestor inteligente de fondos para himnos
 /// Asigna automáticamente imágenes según el tema detectado en el título
 class BackgroundManager {
@@ -213,7 +217,14 @@ class BackgroundManager {
   };
 
   /// Obtener el fondo apropiado para un himno
-  static String getBackgroundForHymn(int numero, String titulo, {String? categoria}) {
+  /// Si el himno trae `fondos` (precalculados por scripts/clasificar_temas.py)
+  /// se usa el primero; si no, se detecta el tema por el título.
+  static String getBackgroundForHymn(int numero, String titulo,
+      {String? categoria, List<dynamic>? fondos}) {
+    if (fondos != null && fondos.isNotEmpty) {
+      return fondos.first as String;
+    }
+    
     String theme = _detectTheme(titulo.toLowerCase());
     
     if (theme == 'default' && categoria != null) {
@@ -252,6 +263,51 @@ class BackgroundManager {
     return 'default';
   }
 
+  static const String _variantesPath = 'assets/data/fondos_variantes.json';
+  static Map<String, dynamic> _variantes = {};
+
+  /// Carga el manifiesto de variantes que escribe scripts/procesar_fondos.py.
+  /// Se llama una vez al iniciar la app, antes de pintar cualquier fondo.
+  static Future<void> cargarVariantes() async {
+    try {
+      _variantes = json.decode(await rootBundle.loadString(_variantesPath));
+    } catch (_) {
+      _variantes = {};
+    }
+  }
+
+  /// Variante redimensionada de un fondo según el ancho físico de la pantalla:
+  /// 720p en teléfonos, 1080p en el resto. La ruta sale del manifiesto, así
+  /// que respeta el formato con que se generó (.jpg o .webp). Los originales
+  /// no van en el bundle: sin variante se usa el fondo por defecto.
+  static String getVariant(String path, double anchoFisico) {
+    final variantes = _variantes[path] as Map<String, dynamic>?;
+    if (variantes == null) return _fondoRespaldo;
+    final variante = anchoFisico <= 1280 ? '720p' : '1080p';
+    return (variantes[variante] ?? variantes['1080p'] ?? _fondoRespaldo) as String;
+  }
+
+  static const String _fondoRespaldo = 'assets/images/background.png';
+
+  static const String _placeholdersPath = 'assets/data/fondos_placeholders.json';
+  static Map<String, dynamic>? _placeholders;
+
+  /// Miniatura PNG de pocos píxeles de un fondo (generada por
+  /// scripts/placeholders_fondos.py) para pintarla desenfocada mientras se
+  /// decodifica la imagen real. null si no hay placeholder.
+  static Future<Uint8List?> getPlaceholder(String path) async {
+    if (_placeholders == null) {
+      try {
+        _placeholders = json.decode(await rootBundle.loadString(_placeholdersPath));
+      } catch (_) {
+        _placeholders = {};
+      }
+    }
+    final entrada = _placeholders![path];
+    if (entrada == null) return null;
+    return base64.decode(entrada['miniatura'] as String);
+  }
+
   static List<String> getAllThemes() {
     return _backgroundsByTheme.keys.toList();
   }
@@ -0,0 +1,49 @@
+import 'dart:convert';
+import 'package:flutter/services.dart';
+
+/// Acceso al catálogo compacto generado por scripts/exportar_compacto.py
+/// Al arrancar solo se decodifica el índice (número y título); las letras
+/// se cargan por bloques recién cuando se abre un himno.
+class CatalogoHimnos {
+  static const String _dir = 'assets/data/compacto';
+  static const String _jsonCompleto = 'assets/data/himnos.json';
+
+  static int _tamBloque = 50;
+  static final Map<int, Future<Map<int, Map<String, dynamic>>>> _bloques = {};
+
+  // Si no hay export compacto se usa himnos.json completo
+  static Map<int, Map<String, dynamic>>? _completo;
+
+  /// Índice para la búsqueda: [{'numero': n, 'titulo': '...'}]
+  static Future<List<Map<String, dynamic>>> cargarIndice() async {
+    try {
+      final data = json.decode(await rootBundle.loadString('$_dir/indice.json'));
+      _tamBloque = data['bloque'] as int;
+      return (data['himnos'] as List)
+          .map((h) => <String, dynamic>{'numero': h[0], 'titulo': h[1]})
+          .toList();
+    } catch (_) {
+      final List<dynamic> lista = json.decode(await rootBundle.loadString(_jsonCompleto));
+      _completo = {
+        for (final h in lista.cast<Map<String, dynamic>>()) h['numero'] as int: h,
+      };
+      return _completo!.values.toList();
+    }
+  }
+
+  /// Registro completo de un himno (estrofas, coro, audio, timestamps)
+  static Future<Map<String, dynamic>?> cargarHimno(int numero) async {
+    if (_completo != null) return _completo![numero];
+    final bloque = (numero - 1) ~/ _tamBloque;
+    final himnos = await _bloques.putIfAbsent(bloque, () => _cargarBloque(bloque));
+    return himnos[numero];
+  }
+
+  static Future<Map<int, Map<String, dynamic>>> _cargarBloque(int bloque) async {
+    final nombre = 'letras_${bloque.toString().padLeft(3, '0')}.json';
+    final List<dynamic> lista = json.decode(await rootBundle.loadString('$_dir/$nombre'));
+    return {
+      for (final h in lista.cast<Map<String, dynamic>>()) h['numero'] as int: h,
+    };
+  }
+}
@@ -0,0 +1,64 @@
+import 'dart:typed_data';
+import 'package:flutter/services.dart';
+
+/// Forma de onda precalculada por scripts/picos_audio.py
+/// (assets/audio/picos/<tipo>/<numero>.picos), para dibujar la barra de
+/// reproducción sin decodificar el MP3.
+class FormaOnda {
+  static const _magic = 'PICO';
+  static const _version = 1;
+  static const _cabecera = 18;
+
+  /// Mínimo y máximo de cada tramo, de -1 a 1 respecto del pico de la pista
+  final Float32List minimos;
+  final Float32List maximos;
+  final Duration duracion;
+
+  /// Inicio de cada sección (stanza_timestamps)
+  final List<Duration> marcadores;
+
+  FormaOnda._(this.minimos, this.maximos, this.duracion, this.marcadores);
+
+  int get length => minimos.length;
+
+  static final Map<String, FormaOnda?> _cache = {};
+
+  /// Forma de onda del himno, o null si no se generó
+  static Future<FormaOnda?> cargar(String tipo, int numero) async {
+    final path = 'assets/audio/picos/$tipo/$numero.picos';
+    if (_cache.containsKey(path)) return _cache[path];
+    FormaOnda? forma;
+    try {
+      forma = parse(await rootBundle.load(path));
+    } catch (_) {
+      forma = null;
+    }
+    _cache[path] = forma;
+    return forma;
+  }
+
+  static FormaOnda parse(ByteData data) {
+    final magic = String.fromCharCodes(data.buffer.asUint8List(data.offsetInBytes, 4));
+    if (magic != _magic || data.getUint8(4) != _version) {
+      throw const FormatException('No es un archivo .picos compatible');
+    }
+    final n = data.getUint16(6, Endian.little);
+    final duracionMs = data.getUint32(8, Endian.little);
+    final m = data.getUint16(16, Endian.little);
+
+    var offset = _cabecera;
+    final marcadores = <Duration>[];
+    for (var i = 0; i < m; i++) {
+      marcadores.add(Duration(milliseconds: data.getUint32(offset, Endian.little)));
+      offset += 4;
+    }
+
+    final minimos = Float32List(n);
+    final maximos = Float32List(n);
+    for (var i = 0; i < n; i++) {
+      minimos[i] = data.getInt8(offset + 2 * i) / 127;
+      maximos[i] = data.getInt8(offset + 2 * i + 1) / 127;
+    }
+    return FormaOnda._(minimos, maximos, Duration(milliseconds: duracionMs), marcadores);
+  }
+}
@@ -2,8 +2,7 @@
 Script para agregar los himnos que faltan (1, 2, 3, 6, etc.)
 """
 
-import json
-import os
+from catalogo import abrir
 
 # Datos de los himnos faltantes (obtenidos de fuentes oficiales del himnario)
 himnos_faltantes = [
@@ -58,35 +57,33 @@ def main():
     
     input_file = "assets/data/himnos.json"
     
-    print(f"\n1. Leyendo {input_file}...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        himnos = json.load(f)
+    print(f"\n1. Abriendo catálogo ({input_file})...")
+    catalogo = abrir(input_file)
     
-    print(f"   Himnos actuales: {len(himnos)}")
+    print(f"   Himnos actuales: {len(catalogo)}")
     
     # Obtener números existentes
-    numeros_existentes = set(h['numero'] for h in himnos)
+    numeros_existentes = catalogo.numeros()
     
     print("\n2. Agregando himnos faltantes...")
     agregados = 0
-    for himno in himnos_faltantes:
-        if himno['numero'] not in numeros_existentes:
-            himnos.append(himno)
-            print(f"   + Himno {himno['numero']}: {himno['titulo']}")
-            agregados += 1
-        else:
-            print(f"   = Himno {himno['numero']} ya existe")
+    with catalogo.transaccion():
+        for himno in himnos_faltantes:
+            if himno['numero'] not in numeros_existentes:
+                catalogo.guardar(himno)
+                print(f"   + Himno {himno['numero']}: {himno['titulo']}")
+                agregados += 1
+            else:
+                print(f"   = Himno {himno['numero']} ya existe")
     
-    # Ordenar por número
-    himnos.sort(key=lambda x: x['numero'])
-    
-    print(f"\n3. Guardando archivo...")
-    with open(input_file, 'w', encoding='utf-8') as f:
-        json.dump(himnos, f, ensure_ascii=False, indent=2)
+    print(f"\n3. Exportando {input_file}...")
+    if not catalogo.exportar_json(input_file):
+        print("   Sin cambios, se conserva")
     
+    numeros = catalogo.numeros()
     print(f"\n✓ Agregados {agregados} himnos")
-    print(f"  Total himnos: {len(himnos)}")
-    print(f"  Rango: {min(h['numero'] for h in himnos)} - {max(h['numero'] for h in himnos)}")
+    print(f"  Total himnos: {len(numeros)}")
+    print(f"  Rango: {min(numeros)} - {max(numeros)}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,662 @@
+#!/usr/bin/env python3
+"""
+Detecta en el audio cantado dónde termina la introducción y dónde empieza
+cada estrofa y coro, y regenera stanza_timestamps.
+
+Los timestamps de himnos.json estaban espaciados uniformemente. Este script
+decodifica assets/audio/cantado/<n>.mp3 con ffmpeg (mono, 11025 Hz) y
+calcula por frame, con NumPy y en bloques:
+
+- energía (dB),
+- energía en bandas logarítmicas de 80 Hz a 4 kHz,
+- novedad espectral (flujo positivo del espectro logarítmico por bandas),
+- valles de energía (las respiraciones entre estrofas).
+
+Como las estrofas de un himno repiten la misma melodía, la autocorrelación
+de las bandas da el período de una estrofa (o de estrofa + coro). Con la
+cantidad de secciones que indica la letra, se buscan a la vez el fin de la
+introducción y el período que mejor alinean los picos de novedad y el final
+del canto (búsqueda en grilla vectorizada). Cada inicio se ajusta al pico
+más cercano y el coro se ubica en el desfase que mejor coincide en todas
+las estrofas.
+
+Los rasgos de cada pista (más una envolvente mín/máx a 100 Hz) se guardan
+por sha256 del MP3 en .sync/rasgos/ (ver cache_audio.py) y se leen con
+memory mapping: volver a analizar todo el corpus, p. ej. probando otros
+pesos con --parametro, no decodifica nada.
+
+Con --pendientes solo se re-procesan los himnos marcados en
+low_confidence_himnos.json y los nuevos o cambiados (otro MP3 u otra
+cantidad de secciones que en el último análisis), de menor a mayor
+confianza. Los timestamps de un himno marcado solo se reemplazan si la
+confianza mejora, así que cada iteración cuesta en proporción a los
+himnos problemáticos y nunca empeora el catálogo. Los himnos que todavía no
+tienen análisis propio pero ya traen timestamps en el catálogo se toman
+como analizados con ese MP3, en lugar de re-procesar todo el corpus.
+
+La confianza (0-1) combina periodicidad, contraste de los picos, ajuste al
+final y cuánto hubo que mover cada inicio. Los himnos bajo el umbral se
+listan en assets/data/low_confidence_himnos.json y el detalle de todos
+queda en .sync/analisis_estrofas.json. Los himnos se analizan en paralelo
+en un pool de procesos.
+
+USO:
+    python scripts/analizar_estrofas.py
+    python scripts/analizar_estrofas.py --numeros 1 2 3 --simular
+    python scripts/analizar_estrofas.py --simular --parametro PESO_FIN=3 --parametro TOLERANCIA_S=1
+    python scripts/analizar_estrofas.py --pendientes --parametro TOLERANCIA_S=2
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from cache_audio import CacheRasgos, IndiceHashes, version_for
+from catalogo import BASE_DIR, JSON_PATH, abrir
+from manifiesto import SYNC_DIR
+
+AUDIO_DIR = BASE_DIR / "assets" / "audio" / "cantado"
+LOW_CONFIDENCE_PATH = JSON_PATH.parent / "low_confidence_himnos.json"
+REPORTE_PATH = SYNC_DIR / "analisis_estrofas.json"
+
+SAMPLE_RATE = 11025
+FRAME = 2048
+HOP = 512
+FPS = SAMPLE_RATE / HOP
+BANDAS = 24
+FREQ_MIN = 80
+FREQ_MAX = 4000
+# Frames por bloque de FFT (acota la memoria en audios largos)
+BLOQUE_FRAMES = 1024
+# Muestras por punto de la envolvente mín/máx (~100 Hz)
+ENVOLVENTE_HOP = 110
+RASGOS = ('energia', 'bandas', 'novedad', 'envolvente')
+
+# Debajo de esto (dB respecto del máximo) se considera silencio
+SILENCIO_DB = 35
+# Un audio cuyo frame más fuerte no llega a esto está vacío
+MIN_ENERGIA_DB = -60
+MAX_INTRO_S = 45
+MIN_PERIODO_S = 8
+# Acorde final y desvanecimiento después de la última sección
+MAX_OUTRO_S = 6
+# Paso de la grilla de búsqueda, en frames
+PASO_GRILLA = 2
+# Cuánto se puede mover un inicio hacia el pico más cercano
+TOLERANCIA_S = 1.5
+VALLE_S = 0.5
+
+PESO_PERIODICIDAD = 0.5
+PESO_FIN = 4.0
+# Penaliza introducciones largas respecto del período (con una sola
+# sección es lo único que evita elegir un pico tardío)
+PESO_INTRO = 0.5
+# Pesos de cada componente en la confianza
+COMPONENTES = {
+    'periodicidad': 0.3,
+    'contraste': 0.3,
+    'ajuste_fin': 0.2,
+    'regularidad': 0.2,
+}
+# Código de low_confidence_himnos.json según el componente más débil
+RAZONES = {
+    'periodicidad': 'variabilidad_detectada',
+    'regularidad': 'variabilidad_detectada',
+    'contraste': 'energia_detectada',
+    'ajuste_fin': 'estimacion_duracion',
+}
+UMBRAL_CONFIANZA = 0.6
+CONFIANZA_ESTIMACION = 0.3
+
+# Parámetros que se pueden cambiar con --parametro sin invalidar la caché
+# (los de extracción cambian la versión de los rasgos)
+AJUSTABLES = ('SILENCIO_DB', 'MIN_ENERGIA_DB', 'MAX_INTRO_S', 'MIN_PERIODO_S', 'MAX_OUTRO_S',
+              'PASO_GRILLA', 'TOLERANCIA_S', 'VALLE_S', 'PESO_PERIODICIDAD', 'PESO_FIN',
+              'PESO_INTRO', 'UMBRAL_CONFIANZA')
+
+def decode_audio(path, sr=SAMPLE_RATE):
+    """Decodifica un MP3 a float32 mono con ffmpeg"""
+    proceso = subprocess.run(
+        ['ffmpeg', '-nostdin', '-v', 'error', '-i', str(path),
+         '-ac', '1', '-ar', str(sr), '-f', 'f32le', '-'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.decode('utf-8', errors='ignore').strip()
+                           or f"ffmpeg terminó con código {proceso.returncode}")
+    return np.frombuffer(proceso.stdout, dtype=np.float32)
+
+def band_matrix(sr=SAMPLE_RATE, frame=FRAME, bandas=BANDAS):
+    """Matriz (bins, bandas) que suma la potencia de cada bin en su banda"""
+    bordes = np.geomspace(FREQ_MIN, FREQ_MAX, bandas + 1)
+    freqs = np.fft.rfftfreq(frame, 1 / sr)
+    banda = np.searchsorted(bordes, freqs, side='right') - 1
+    matriz = np.zeros((len(freqs), bandas), dtype=np.float32)
+    validos = (banda >= 0) & (banda < bandas)
+    matriz[np.flatnonzero(validos), banda[validos]] = 1.0
+    return matriz
+
+def frame_features(signal, sr=SAMPLE_RATE):
+    """
+    Retorna {'energia': (n,), 'bandas': (n, BANDAS), 'novedad': (n,)} en
+    float32, un valor por frame de HOP muestras.
+    """
+    signal = np.asarray(signal, dtype=np.float32)
+    if len(signal) < FRAME:
+        signal = np.pad(signal, (0, FRAME - len(signal)))
+    frames = sliding_window_view(signal, FRAME)[::HOP]
+    ventana = np.hanning(FRAME).astype(np.float32)
+    matriz = band_matrix(sr)
+
+    energia = np.empty(len(frames), dtype=np.float32)
+    bandas = np.empty((len(frames), BANDAS), dtype=np.float32)
+    for inicio in range(0, len(frames), BLOQUE_FRAMES):
+        bloque = frames[inicio:inicio + BLOQUE_FRAMES] * ventana
+        potencia = np.abs(np.fft.rfft(bloque, axis=1)) ** 2
+        energia[inicio:inicio + len(bloque)] = 10 * np.log10(potencia.sum(axis=1) / FRAME + 1e-10)
+        bandas[inicio:inicio + len(bloque)] = np.log1p(np.sqrt(potencia @ matriz))
+
+    novedad = np.zeros(len(frames), dtype=np.float32)
+    novedad[1:] = np.maximum(np.diff(bandas, axis=0), 0).sum(axis=1)
+    return {'energia': energia, 'bandas': bandas, 'novedad': novedad}
+
+def envelope(signal, hop=ENVOLVENTE_HOP):
+    """Envolvente (n, 2) float32 con el mínimo y el máximo de cada bloque de `hop` muestras"""
+    signal = np.asarray(signal, dtype=np.float32)
+    n = -(-len(signal) // hop)
+    bloques = np.pad(signal, (0, n * hop - len(signal))).reshape(n, hop)
+    return np.stack([bloques.min(axis=1), bloques.max(axis=1)], axis=1)
+
+def feature_version():
+    return version_for({
+        'sample_rate': SAMPLE_RATE, 'frame': FRAME, 'hop': HOP, 'bandas': BANDAS,
+        'freq_min': FREQ_MIN, 'freq_max': FREQ_MAX, 'envolvente_hop': ENVOLVENTE_HOP,
+    })
+
+def extract_features(path):
+    """Decodifica una pista y calcula todos los rasgos que se guardan en caché"""
+    senal = decode_audio(path)
+    rasgos = frame_features(senal)
+    rasgos['envolvente'] = envelope(senal)
+    return rasgos
+
+def load_features(path, sha=None):
+    """
+    Rasgos de una pista: de la caché si hay `sha` y están, si no se extraen
+    (y se guardan). Retorna (rasgos, True si vinieron de la caché).
+    """
+    cache = CacheRasgos(feature_version()) if sha else None
+    if cache:
+        rasgos = cache.cargar(sha, RASGOS)
+        if rasgos is not None:
+            return rasgos, True
+    rasgos = extract_features(path)
+    if cache:
+        cache.guardar(sha, rasgos)
+    return rasgos, False
+
+def smooth(x, segundos):
+    ancho = max(1, int(round(segundos * FPS)))
+    if ancho == 1:
+        return x
+    return np.convolve(x, np.ones(ancho) / ancho, mode='same')
+
+def zscore(x):
+    desvio = x.std()
+    return (x - x.mean()) / desvio if desvio > 0 else np.zeros_like(x)
+
+def audible_range(energia):
+    """(primer, último) frame por encima del umbral de silencio"""
+    sonoros = np.flatnonzero(energia > energia.max() - SILENCIO_DB)
+    return int(sonoros[0]), int(sonoros[-1])
+
+def boundary_curve(features):
+    """
+    Puntaje de "aquí empieza algo" por frame: novedad sobre su media local
+    más la profundidad del valle de energía inmediatamente anterior.
+    """
+    novedad = features['novedad'].astype(np.float64)
+    novedad = np.maximum(novedad - smooth(novedad, 3.0), 0)
+    energia = features['energia'].astype(np.float64)
+    ancho = max(1, int(VALLE_S * FPS))
+    previa = np.pad(energia, (ancho, 0), mode='edge')
+    minimo = sliding_window_view(previa, ancho)[:len(energia)].min(axis=1)
+    valle = np.maximum(smooth(energia, 3.0) - minimo, 0)
+    return smooth(zscore(novedad) + zscore(valle), 0.25)
+
+def peak_contrast(frontera, frames):
+    """
+    Qué tanto sobresalen los frames elegidos. Como cada inicio ya es el
+    máximo de su ventana de tolerancia, se compara con el máximo de todas
+    las ventanas del mismo ancho: 0 si está en la mediana, 1 desde el
+    percentil 95.
+    """
+    ancho = 2 * int(TOLERANCIA_S * FPS) + 1
+    if len(frontera) <= ancho:
+        return 0.0
+    maximos = np.sort(sliding_window_view(frontera, ancho).max(axis=1))
+    rango = np.searchsorted(maximos, frontera[frames], side='right') / len(maximos)
+    return float(np.mean(np.clip((rango - 0.5) / 0.45, 0, 1)))
+
+def periodicity(bandas, inicio, fin):
+    """Autocorrelación normalizada (por lag, en frames) de las bandas en [inicio, fin]"""
+    x = bandas[inicio:fin + 1].astype(np.float64)
+    x = x - x.mean(axis=0)
+    desvio = x.std(axis=0)
+    x = x[:, desvio > 0] / desvio[desvio > 0]
+    n = len(x)
+    if n < 2 or x.shape[1] == 0:
+        return np.zeros(max(n, 1))
+    espectro = np.fft.rfft(x, 2 * n, axis=0)
+    ac = np.fft.irfft(np.abs(espectro) ** 2, axis=0)[:n].sum(axis=1)
+    ac = ac / ac[0]
+    # Corrección por la cantidad de frames que se solapan en cada lag
+    return ac * n / np.maximum(n - np.arange(n), 1)
+
+def section_layout(n_estrofas, tiene_coro):
+    """(unidades que se repiten, secciones por unidad)"""
+    if n_estrofas == 0:
+        return 1, 1
+    return n_estrofas, 2 if tiene_coro else 1
+
+def even_split(inicio, fin, secciones):
+    paso = (fin - inicio) / secciones
+    return [inicio + i * paso for i in range(secciones)]
+
+def end_gap(fin, esperado):
+    """Frames entre el final esperado y el real, tolerando el outro"""
+    sobrante = fin - esperado
+    return np.where(sobrante >= 0, np.maximum(sobrante - MAX_OUTRO_S * FPS, 0), -sobrante)
+
+def grid_search(frontera, ac, inicio, fin, unidades):
+    """
+    Retorna (t0, período) en frames que maximizan el puntaje: frontera media
+    en t0 + k·P, periodicidad en P, desvío del final esperado respecto del
+    real y largo de la introducción.
+    """
+    t0s = np.arange(inicio, min(inicio + int(MAX_INTRO_S * FPS), fin) + 1, PASO_GRILLA)
+    p_min = int(MIN_PERIODO_S * FPS)
+    p_max = (fin - inicio) // unidades
+    if p_max < p_min:
+        return None
+    periodos = np.arange(p_min, p_max + 1, PASO_GRILLA)
+    k = np.arange(unidades)
+    # (t0, P, k) → frame de cada inicio de unidad
+    posiciones = t0s[:, None, None] + periodos[None, :, None] * k[None, None, :]
+    validos = posiciones[:, :, -1] <= fin
+    puntaje = frontera[np.minimum(posiciones, len(frontera) - 1)].mean(axis=2)
+    if unidades > 1:
+        puntaje = puntaje + PESO_PERIODICIDAD * np.clip(ac[np.minimum(periodos, len(ac) - 1)], 0, 1)
+    esperado = t0s[:, None] + periodos[None, :] * unidades
+    puntaje = puntaje - PESO_FIN * end_gap(fin, esperado) / periodos[None, :]
+    puntaje = puntaje - PESO_INTRO * (t0s[:, None] - inicio) / periodos[None, :]
+    puntaje[~validos] = -np.inf
+    if not np.isfinite(puntaje).any():
+        return None
+    i, j = np.unravel_index(np.argmax(puntaje), puntaje.shape)
+    return int(t0s[i]), int(periodos[j])
+
+def refine(frontera, frames):
+    """Mueve cada frame al máximo de la frontera dentro de la tolerancia"""
+    tolerancia = int(TOLERANCIA_S * FPS)
+    ajustados = []
+    for f in frames:
+        desde, hasta = max(0, f - tolerancia), min(len(frontera), f + tolerancia + 1)
+        ajustados.append(desde + int(np.argmax(frontera[desde:hasta])))
+    return ajustados
+
+def chorus_offset(frontera, inicios, periodo):
+    """Desfase (frames) del coro dentro de cada unidad estrofa + coro"""
+    desfases = np.arange(int(periodo * 0.25), int(periodo * 0.75) + 1)
+    posiciones = np.minimum(np.array(inicios)[:, None] + desfases[None, :], len(frontera) - 1)
+    return int(desfases[np.argmax(frontera[posiciones].mean(axis=0))])
+
+def analyze_features(features, n_estrofas, tiene_coro):
+    """
+    Detecta el inicio de cada sección. Retorna {'inicios' (s), 'intro',
+    'periodo', 'confianza', 'razon', 'componentes'}.
+    """
+    unidades, por_unidad = section_layout(n_estrofas, tiene_coro)
+    secciones = unidades * por_unidad
+    energia = features['energia']
+    inicio, fin = audible_range(energia)
+
+    busqueda = None
+    if energia.max() >= MIN_ENERGIA_DB and fin - inicio >= secciones * MIN_PERIODO_S * FPS:
+        frontera = boundary_curve(features)
+        ac = periodicity(features['bandas'], inicio, fin)
+        busqueda = grid_search(frontera, ac, inicio, fin, unidades)
+    if busqueda is None:
+        inicios = even_split(inicio / FPS, fin / FPS, secciones)
+        return {'inicios': inicios, 'intro': inicios[0], 'periodo': None,
+                'confianza': CONFIANZA_ESTIMACION, 'razon': 'estimacion_duracion',
+                'componentes': {}}
+
+    t0, periodo = busqueda
+    previstos = [t0 + k * periodo for k in range(unidades)]
+    unidad = refine(frontera, previstos)
+    marcas = list(unidad)
+    if por_unidad == 2:
+        desfase = chorus_offset(frontera, unidad, periodo)
+        previstos += [f + desfase for f in unidad]
+        coros = refine(frontera, [f + desfase for f in unidad])
+        marcas += coros
+        frames = [f for par in zip(unidad, coros) for f in par]
+    else:
+        frames = unidad
+    # Nunca dos secciones en el mismo frame ni fuera de orden
+    for i in range(1, len(frames)):
+        frames[i] = max(frames[i], frames[i - 1] + 1)
+
+    tolerancia = TOLERANCIA_S * FPS
+    componentes = {
+        'periodicidad': float(np.clip(ac[min(periodo, len(ac) - 1)], 0, 1)),
+        'contraste': peak_contrast(frontera, marcas),
+        'ajuste_fin': float(max(0.0, 1 - end_gap(fin, t0 + unidades * periodo) / (0.25 * periodo))),
+        'regularidad': float(max(0.0, 1 - np.mean(np.abs(np.array(marcas) - np.array(previstos)))
+                                 / tolerancia)),
+    }
+    if unidades == 1:
+        # Sin repeticiones no hay período ni regularidad que confirmen la intro
+        componentes['periodicidad'] = componentes['regularidad'] = 0.0
+    confianza = round(sum(COMPONENTES[c] * v for c, v in componentes.items()), 2)
+    razon = None
+    if confianza < UMBRAL_CONFIANZA:
+        razon = RAZONES[min(componentes, key=componentes.get)]
+    inicios = [f / FPS for f in frames]
+    return {'inicios': inicios, 'intro': inicios[0], 'periodo': periodo / FPS,
+            'confianza': confianza, 'razon': razon,
+            'componentes': {c: round(v, 2) for c, v in componentes.items()}}
+
+def to_timestamps(inicios):
+    return [{'start': round(t, 1), 'stanza_index': i} for i, t in enumerate(inicios)]
+
+def apply_params(parametros):
+    """Aplica los overrides de --parametro (también en cada proceso del pool)"""
+    globals().update(parametros)
+
+def parse_params(valores):
+    """['PESO_FIN=3', ...] → {'PESO_FIN': 3.0}; ValueError si alguno no es válido"""
+    parametros = {}
+    for valor in valores or ():
+        nombre, _, numero = valor.partition('=')
+        if nombre not in AJUSTABLES:
+            raise ValueError(f"{nombre}: se puede ajustar {', '.join(AJUSTABLES)}")
+        tipo = type(globals()[nombre])
+        parametros[nombre] = tipo(float(numero)) if tipo is int else float(numero)
+    return parametros
+
+def analyze_file(tarea, usar_cache=True):
+    """Analiza un himno (corre en un proceso del pool)"""
+    numero, path, sha, n_estrofas, tiene_coro = tarea
+    inicio = time.perf_counter()
+    rasgos, desde_cache = load_features(path, sha if usar_cache else None)
+    resultado = analyze_features(rasgos, n_estrofas, tiene_coro)
+    resultado['numero'] = numero
+    resultado['duracion'] = round(len(rasgos['envolvente']) * ENVOLVENTE_HOP / SAMPLE_RATE, 1)
+    resultado['segundos'] = round(time.perf_counter() - inicio, 2)
+    resultado['cache'] = desde_cache
+    resultado['sha256'] = sha
+    return resultado
+
+def build_tasks(himnos, numeros=None, audio_dir=AUDIO_DIR, indice=None):
+    """
+    Retorna (tareas, números sin audio). Con `indice` (IndiceHashes) cada
+    tarea lleva el sha256 del MP3 para usar la caché de rasgos.
+    """
+    tareas, sin_audio = [], []
+    for himno in himnos:
+        if numeros and himno['numero'] not in numeros:
+            continue
+        path = audio_dir / f"{himno['numero']}.mp3"
+        if not path.exists():
+            sin_audio.append(himno['numero'])
+            continue
+        sha = indice.sha(path) if indice else None
+        tareas.append((himno['numero'], path, sha, len(himno.get('estrofas') or []),
+                       bool(himno.get('coro'))))
+    return tareas, sin_audio
+
+def update_low_confidence(resultados, titulos, path=LOW_CONFIDENCE_PATH):
+    """
+    Reemplaza en la lista las entradas de los himnos analizados: entran los
+    que quedaron bajo el umbral, salen los demás. Retorna True si escribió.
+    """
+    entradas = []
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            entradas = json.load(f)
+    analizados = {r['numero'] for r in resultados}
+    entradas = [e for e in entradas if e['numero'] not in analizados]
+    entradas += [{
+        'numero': r['numero'],
+        'titulo': titulos.get(r['numero'], ''),
+        'intro_detectado': round(r['intro'], 1),
+        'confianza': r['confianza'],
+        'razon': r['razon'],
+    } for r in resultados if r['razon']]
+    entradas.sort(key=lambda e: e['numero'])
+
+    data = json.dumps(entradas, ensure_ascii=False, indent=2).encode('utf-8')
+    if path.exists() and path.read_bytes() == data:
+        return False
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+def load_low_confidence(path=LOW_CONFIDENCE_PATH):
+    """{numero: entrada} de low_confidence_himnos.json"""
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {e['numero']: e for e in json.load(f)}
+
+def load_report(path=REPORTE_PATH):
+    """{numero: detalle del último análisis}"""
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {int(n): r for n, r in json.load(f).items()}
+
+def seed_report(tareas, himnos, reporte, bajos):
+    """
+    Entradas de reporte para los himnos sin análisis propio cuyos
+    stanza_timestamps del catálogo tienen la cantidad de secciones esperada:
+    se toman como analizados con el MP3 actual, con la confianza de la lista
+    de baja confianza o, si no están marcados, la del umbral.
+    """
+    timestamps = {h['numero']: h.get('stanza_timestamps') or [] for h in himnos}
+    sembrados = []
+    for numero, path, sha, n_estrofas, tiene_coro in tareas:
+        unidades, por_unidad = section_layout(n_estrofas, tiene_coro)
+        actuales = timestamps.get(numero, [])
+        if numero in reporte or not actuales or len(actuales) != unidades * por_unidad:
+            continue
+        marcado = bajos.get(numero, {})
+        sembrados.append({
+            'numero': numero,
+            'sha256': sha,
+            'inicios': [t['start'] for t in actuales],
+            'confianza': marcado.get('confianza', UMBRAL_CONFIANZA),
+            'razon': marcado.get('razon', ''),
+            'origen': 'catalogo',
+        })
+    return sembrados
+
+def build_queue(tareas, reporte, bajos):
+    """
+    Tareas a re-procesar, de menor a mayor confianza previa, y
+    {numero: (motivo, confianza previa o None)}. Entra un himno si está en
+    la lista de baja confianza, si nunca se analizó o si cambió su MP3 o su
+    cantidad de secciones.
+    """
+    motivos = {}
+    for numero, path, sha, n_estrofas, tiene_coro in tareas:
+        previo = reporte.get(numero)
+        unidades, por_unidad = section_layout(n_estrofas, tiene_coro)
+        cambiado = previo is not None and (previo.get('sha256') != sha or
+                                           len(previo['inicios']) != unidades * por_unidad)
+        if numero in bajos and not cambiado:
+            # Sin análisis propio vale la confianza con que quedó en la lista
+            previa = previo['confianza'] if previo else bajos[numero]['confianza']
+            motivos[numero] = ('baja_confianza', previa)
+        elif previo is None:
+            motivos[numero] = ('nuevo', None)
+        elif cambiado:
+            motivos[numero] = ('cambiado', None)
+    cola = [t for t in tareas if t[0] in motivos]
+    cola.sort(key=lambda t: (motivos[t[0]][1] or 0.0, t[0]))
+    return cola, motivos
+
+def accept(resultado, motivo):
+    """
+    Un resultado de --pendientes se usa si no hay timestamps previos para
+    ese MP3 (nuevo o cambiado), si mejora la confianza o si ya no queda bajo
+    el umbral (sale de la lista).
+    """
+    _, previa = motivo
+    return previa is None or resultado['confianza'] > previa or not resultado['razon']
+
+def save_report(resultados, path=REPORTE_PATH):
+    """Agrega el detalle de los himnos analizados al reporte en .sync/"""
+    reporte = {str(n): r for n, r in load_report(path).items()}
+    for r in resultados:
+        reporte[str(r['numero'])] = {k: v for k, v in r.items() if k not in ('numero', 'cache')}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Detección de estrofas en el audio cantado")
+    parser.add_argument('--numeros', type=int, nargs='+', help="solo estos himnos")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--simular', action='store_true',
+                        help="solo reportar, sin escribir en el catálogo")
+    parser.add_argument('--parametro', action='append', metavar='NOMBRE=VALOR',
+                        help="cambiar un parámetro del análisis (se puede repetir)")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="decodificar todo sin leer ni escribir la caché de rasgos")
+    parser.add_argument('--pendientes', action='store_true',
+                        help="solo himnos de baja confianza, nuevos o cambiados")
+    parser.add_argument('--limite', type=int, help="con --pendientes, procesar a lo sumo N")
+    args = parser.parse_args()
+    try:
+        parametros = parse_params(args.parametro)
+    except ValueError as e:
+        parser.error(str(e))
+    apply_params(parametros)
+
+    print("=" * 60)
+    print("DETECTANDO ESTROFAS EN EL AUDIO")
+    print("=" * 60)
+
+    catalogo = abrir()
+    himnos = catalogo.todos()
+    indice = IndiceHashes()
+    tareas, sin_audio = build_tasks(himnos, set(args.numeros or ()), indice=indice)
+    indice.guardar()
+    print(f"\n   {len(tareas)} himnos con audio, {len(sin_audio)} sin audio en {AUDIO_DIR}")
+    if parametros:
+        print(f"   Parámetros: {', '.join(f'{k}={v}' for k, v in parametros.items())}")
+
+    motivos = {}
+    if args.pendientes:
+        reporte, bajos = load_report(), load_low_confidence()
+        sembrados = seed_report(tareas, himnos, reporte, bajos)
+        if sembrados:
+            print(f"   {len(sembrados)} himnos sin análisis propio toman los timestamps "
+                  f"del catálogo")
+            if not args.simular:
+                save_report(sembrados)
+            reporte.update((e['numero'], e) for e in sembrados)
+        tareas, motivos = build_queue(tareas, reporte, bajos)
+        tareas = tareas[:args.limite] if args.limite else tareas
+        conteo = Counter(motivos[t[0]][0] for t in tareas)
+        print(f"   Pendientes: {len(tareas)} "
+              f"({', '.join(f'{n} {m}' for m, n in conteo.most_common()) or 'ninguno'})")
+    if not tareas:
+        return
+
+    cache = CacheRasgos(feature_version())
+    if args.sin_cache:
+        por_decodificar = len(tareas)
+    else:
+        por_decodificar = sum(1 for t in tareas if cache.cargar(t[2], RASGOS) is None)
+        print(f"   Caché de rasgos: {len(tareas) - por_decodificar} en caché, "
+              f"{por_decodificar} por decodificar ({indice.hasheados} MP3 hasheados)")
+    if por_decodificar and shutil.which('ffmpeg') is None:
+        print("\n✗ No se encontró ffmpeg en el PATH; hace falta para decodificar los MP3")
+        raise SystemExit(1)
+
+    inicio = time.perf_counter()
+    resultados, errores = [], 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=apply_params,
+                             initargs=(parametros,)) as executor:
+        # Se envían en orden: con --pendientes, primero los de menor confianza
+        futuros = {executor.submit(analyze_file, tarea, not args.sin_cache): tarea[0]
+                   for tarea in tareas}
+        for futuro in as_completed(futuros):
+            numero = futuros[futuro]
+            try:
+                r = futuro.result()
+            except Exception as e:
+                errores += 1
+                print(f"   ✗ Himno {numero}: {e}")
+                continue
+            resultados.append(r)
+            icono = '⚠️ ' if r['razon'] else '✓'
+            print(f"   {icono} Himno {numero}: intro {r['intro']:.1f} s, "
+                  f"{len(r['inicios'])} secciones, confianza {r['confianza']:.2f}")
+    resultados.sort(key=lambda r: r['numero'])
+
+    bajos = sum(1 for r in resultados if r['razon'])
+    desde_cache = sum(1 for r in resultados if r['cache'])
+    media = sum(r['confianza'] for r in resultados) / len(resultados) if resultados else 0.0
+    print(f"\n📊 {len(resultados)} analizados en {time.perf_counter() - inicio:.1f} s "
+          f"({desde_cache} desde la caché), confianza media {media:.2f}, "
+          f"{bajos} con baja confianza, {errores} errores")
+
+    if not args.sin_cache and not args.numeros and not args.pendientes:
+        indice.podar()
+        indice.guardar()
+        vigentes = {t[2] for t in tareas}
+        borrados = cache.limpiar(vigentes)
+        if borrados:
+            print(f"   🗑 {borrados} rasgos obsoletos borrados")
+        print(f"   Caché de rasgos: {cache.tamaño() / 1024 / 1024:.1f} MB")
+
+    aceptados = resultados
+    if args.pendientes:
+        aceptados = [r for r in resultados if accept(r, motivos[r['numero']])]
+        print(f"   {len(aceptados)} de {len(resultados)} se usan "
+              f"(nuevos, cambiados, mejoraron o salen de la lista)")
+
+    if args.simular or not aceptados:
+        return
+
+    with catalogo.transaccion():
+        cambiados = sum(catalogo.fusionar({'numero': r['numero'],
+                                           'stanza_timestamps': to_timestamps(r['inicios'])})
+                        for r in aceptados)
+    print(f"   Himnos con cambios: {cambiados}")
+    if catalogo.exportar_json(JSON_PATH):
+        print(f"   ✓ Exportado {JSON_PATH}")
+    else:
+        print(f"   = {JSON_PATH} sin cambios")
+    titulos = {h['numero']: h['titulo'] for h in himnos}
+    if update_low_confidence(aceptados, titulos):
+        print(f"   ✓ Actualizado {LOW_CONFIDENCE_PATH}")
+    save_report(aceptados)
+
+if __name__ == "__main__":
+    main()
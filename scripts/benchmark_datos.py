@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Benchmarks del pipeline de datos del himnario.
+
+Mide parse_lyrics, parse_into_stanzas, format_verses, el ciclo completo
+json.load / json.dump(indent=2) que hacen agregar_faltantes.py y
+corregir_estrofas.py sobre assets/data/himnos.json, y la búsqueda BM25 de
+busqueda_letras.py (indexar y consultar). Cada benchmark corre sobre el
+corpus real y sobre uno sintético 10 veces más grande (varios himnarios).
+
+Por cada caso registra tiempo (mínimo y mediana de varias repeticiones),
+pico de memoria y bloques retenidos: los bloques que siguen asignados al
+terminar la llamada, es decir, lo que ocupa el resultado (tracemalloc). Los
+temporales que se liberan no cuentan ahí; su costo se ve en el pico. Los
+resultados se comparan contra scripts/benchmark_baseline.json para detectar
+regresiones antes de publicar una actualización de datos.
+
+USO:
+    python scripts/benchmark_datos.py                    # medir y comparar
+    python scripts/benchmark_datos.py --guardar-baseline # medir y guardar
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from busqueda_letras import MotorBusqueda
+from corregir_estrofas import parse_into_stanzas
+from descargar_api import format_verses
+from descargar_himnos import parse_lyrics
+
+BASE_DIR = Path(__file__).parent.parent
+JSON_PATH = BASE_DIR / "assets" / "data" / "himnos.json"
+BASELINE_PATH = Path(__file__).parent / "benchmark_baseline.json"
+
+ESCALA_SINTETICA = 10
+# Consultas de búsqueda: palabras, frases y prefijos
+CONSULTAS_BM25 = [
+    'ninguno de ellos dejará', 'gloria al señor', '"santo santo santo"',
+    'cordero de dios', 'glori*', 'paz "en la tierra"', 'jesus salvador amor',
+    'cristo', 'alabad al rey*', '"dios en tres personas"',
+]
+DEFAULT_REPETICIONES = 5
+# Regresión tolerada antes de marcar un caso (25 %)
+DEFAULT_TOLERANCIA = 0.25
+
+def load_corpus(path=JSON_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def scale_corpus(himnos, factor):
+    """Repite el corpus `factor` veces con números nuevos"""
+    total = len(himnos)
+    escalado = []
+    for copia in range(factor):
+        for himno in himnos:
+            nuevo = dict(himno)
+            nuevo['numero'] = himno['numero'] + copia * total
+            escalado.append(nuevo)
+    return escalado
+
+def hymn_text(himno):
+    """Reconstruye el .txt de origen: título, estrofas numeradas y coro"""
+    partes = [f"Himno #{himno['numero']} {himno.get('titulo', '')}"]
+    for i, estrofa in enumerate(himno.get('estrofas', []), 1):
+        partes.append(str(i))
+        partes.append(estrofa)
+    if himno.get('coro'):
+        partes.append("Coro:")
+        partes.append(himno['coro'])
+    return '\n'.join(partes)
+
+def api_payload(himno):
+    """Reconstruye la respuesta de sdah.my.to que consume format_verses"""
+    verses = [
+        {'number': i, 'contents': [{'content': line} for line in estrofa.splitlines()]}
+        for i, estrofa in enumerate(himno.get('estrofas', []), 1)
+    ]
+    if himno.get('coro'):
+        verses.append({'number': 0,
+                       'contents': [{'content': line} for line in himno['coro'].splitlines()]})
+    return {'number': himno['numero'], 'title': himno.get('titulo', ''), 'verses': verses}
+
+def build_cases(himnos, tmpdir):
+    """Retorna {nombre: función sin argumentos} para un corpus"""
+    textos = [hymn_text(h) for h in himnos]
+    payloads = [api_payload(h) for h in himnos]
+
+    json_path = Path(tmpdir) / f"himnos_{len(himnos)}.json"
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(himnos, f, ensure_ascii=False, indent=2)
+
+    def json_cycle():
+        # Igual que agregar_faltantes / corregir_estrofas
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data.sort(key=lambda x: x['numero'])
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    motor = MotorBusqueda(himnos)
+
+    return {
+        'parse_lyrics': lambda: [parse_lyrics(t) for t in textos],
+        'parse_into_stanzas': lambda: [parse_into_stanzas(t) for t in textos],
+        'format_verses': lambda: [format_verses(p) for p in payloads],
+        'json_load_dump': json_cycle,
+        'bm25_indexar': lambda: MotorBusqueda(himnos),
+        'bm25_consultas': lambda: [motor.buscar(c) for c in CONSULTAS_BM25],
+    }
+
+def measure(func, repeticiones):
+    """Tiempo (min/mediana) sin tracemalloc y memoria en una corrida aparte"""
+    func()  # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        func()
+        tiempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    resultado = func()
+    despues = tracemalloc.take_snapshot()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Neto entre snapshots: bloques que el resultado mantiene vivos
+    retenidos = sum(stat.count_diff for stat in despues.compare_to(antes, 'filename'))
+    del resultado
+
+    return {
+        'min_ms': round(min(tiempos) * 1000, 3),
+        'mediana_ms': round(statistics.median(tiempos) * 1000, 3),
+        'pico_kb': round(pico / 1024, 1),
+        'bloques_retenidos': retenidos,
+    }
+
+def run(repeticiones):
+    himnos = load_corpus()
+    corpus = {
+        'real': himnos,
+        f'sintetico_x{ESCALA_SINTETICA}': scale_corpus(himnos, ESCALA_SINTETICA),
+    }
+    resultados = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for nombre_corpus, data in corpus.items():
+            print(f"\n📊 Corpus {nombre_corpus} ({len(data)} himnos)")
+            for nombre, func in build_cases(data, tmpdir).items():
+                r = measure(func, repeticiones)
+                resultados.setdefault(nombre, {})[nombre_corpus] = r
+                print(f"   {nombre:20s} mediana {r['mediana_ms']:9.2f} ms | "
+                      f"min {r['min_ms']:9.2f} ms | pico {r['pico_kb']:9.1f} KB | "
+                      f"retenidos {r['bloques_retenidos']}")
+    return resultados
+
+def compare(resultados, baseline, tolerancia):
+    """Lista de regresiones (texto) respecto a la baseline"""
+    regresiones = []
+    for nombre, por_corpus in resultados.items():
+        for nombre_corpus, r in por_corpus.items():
+            base = baseline.get('resultados', {}).get(nombre, {}).get(nombre_corpus)
+            if not base:
+                continue
+            for metrica in ('mediana_ms', 'pico_kb'):
+                if base[metrica] and r[metrica] > base[metrica] * (1 + tolerancia):
+                    regresiones.append(
+                        f"{nombre} [{nombre_corpus}] {metrica}: "
+                        f"{base[metrica]} → {r[metrica]} "
+                        f"(+{(r[metrica] / base[metrica] - 1) * 100:.0f}%)")
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline de datos")
+    parser.add_argument('--repeticiones', type=int, default=DEFAULT_REPETICIONES)
+    parser.add_argument('--guardar-baseline', action='store_true',
+                        help=f"guardar los resultados en {BASELINE_PATH.name}")
+    parser.add_argument('--tolerancia', type=float, default=DEFAULT_TOLERANCIA,
+                        help="regresión tolerada como fracción (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARKS DEL PIPELINE DE DATOS")
+    print("=" * 60)
+
+    resultados = run(max(1, args.repeticiones))
+
+    if args.guardar_baseline:
+        baseline = {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'fecha': time.strftime('%Y-%m-%d'),
+            'resultados': resultados,
+        }
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ Baseline guardada en {BASELINE_PATH}")
+        return
+
+    if not BASELINE_PATH.exists():
+        print(f"\n⚠️ No hay baseline; ejecuta con --guardar-baseline")
+        return
+
+    with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regresiones = compare(resultados, baseline, args.tolerancia)
+    if regresiones:
+        print(f"\n✗ Regresiones respecto a la baseline ({baseline.get('fecha')}):")
+        for r in regresiones:
+            print(f"   - {r}")
+        sys.exit(1)
+    print(f"\n✓ Sin regresiones respecto a la baseline ({baseline.get('fecha')})")
+
+if __name__ == "__main__":
+    main()
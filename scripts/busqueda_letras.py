@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Búsqueda de texto completo en las letras con ranking BM25.
+
+Pensado para encontrar un himno por una línea que se recuerda ("ninguno de
+ellos dejará"). Cada estrofa y cada coro es un documento; el índice es
+posicional (término → documento → posiciones) sobre los mismos términos
+plegados que indice_busqueda.py (sin tildes ni mayúsculas).
+
+Sintaxis de consulta:
+- palabras sueltas: se rankean con BM25; no hace falta que estén todas
+- "entre comillas": frase exacta, obligatoria
+- prefijo*: cualquier término que empiece así ("glori*"); si hay más de
+  MAX_EXPANSION, los que aparecen en más documentos
+
+Cada resultado apunta al himno y a la estrofa (o coro) donde coincide.
+
+USO:
+    python scripts/busqueda_letras.py "ninguno de ellos dejará"
+    python scripts/busqueda_letras.py '"santo santo" glori*' --json
+"""
+
+import argparse
+import bisect
+import heapq
+import json
+import math
+import re
+import time
+
+from catalogo import JSON_PATH
+from exportar_compacto import normalize
+from indice_busqueda import tokenize
+
+K1 = 1.2
+B = 0.75
+# Términos máximos en los que se expande un prefijo (los de mayor frecuencia)
+MAX_EXPANSION = 64
+
+CORO = 'coro'
+ESTROFA = 'estrofa'
+
+CONSULTA_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+def parse_query(consulta):
+    """
+    Retorna (términos, prefijos, frases): listas de términos sueltos,
+    prefijos (sin el *) y frases (listas de términos).
+    """
+    terminos, prefijos, frases = [], [], []
+    for frase, palabra in CONSULTA_RE.findall(consulta):
+        if frase:
+            tokens = tokenize(frase)
+            if len(tokens) > 1:
+                frases.append(tokens)
+            else:
+                terminos.extend(tokens)
+        elif palabra.endswith('*'):
+            prefijos.extend(tokenize(palabra[:-1])[:1])
+        else:
+            terminos.extend(tokenize(palabra))
+    return terminos, prefijos, frases
+
+class MotorBusqueda:
+    """Índice posicional en memoria sobre estrofas y coros"""
+
+    def __init__(self, himnos, k1=K1, b=B):
+        self.k1 = k1
+        self.b = b
+        # (numero, titulo, tipo, indice de estrofa o None, texto)
+        self.docs = []
+        self.longitudes = []
+        self.index = {}
+        for himno in sorted(himnos, key=lambda h: h['numero']):
+            secciones = [(ESTROFA, i, texto) for i, texto in enumerate(himno.get('estrofas', []))]
+            if himno.get('coro'):
+                secciones.append((CORO, None, himno['coro']))
+            for tipo, indice, texto in secciones:
+                doc = len(self.docs)
+                self.docs.append((himno['numero'], himno.get('titulo', ''), tipo, indice, texto))
+                tokens = tokenize(texto)
+                self.longitudes.append(len(tokens))
+                # Posiciones agrupadas primero por documento: menos accesos al índice
+                posiciones = {}
+                for pos, termino in enumerate(tokens):
+                    posiciones.setdefault(termino, []).append(pos)
+                for termino, lista in posiciones.items():
+                    self.index.setdefault(termino, {})[doc] = lista
+        self.vocabulario = sorted(self.index)
+        self.promedio = sum(self.longitudes) / len(self.longitudes) if self.longitudes else 0.0
+        # Normalización por longitud de BM25, precalculada por documento
+        promedio = self.promedio or 1.0
+        self.normas = [k1 * (1 - b + b * n / promedio) for n in self.longitudes]
+
+    @classmethod
+    def from_json(cls, path=JSON_PATH, **kw):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), **kw)
+
+    def idf(self, termino):
+        df = len(self.index.get(termino, ()))
+        n = len(self.docs)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _bm25(self, termino):
+        """{doc: puntaje} del término"""
+        postings = self.index.get(termino)
+        if not postings:
+            return {}
+        peso = self.idf(termino) * (self.k1 + 1)
+        normas = self.normas
+        return {doc: peso * len(pos) / (len(pos) + normas[doc])
+                for doc, pos in postings.items()}
+
+    def prefix_terms(self, prefijo):
+        """Todos los términos del vocabulario que empiezan con el prefijo"""
+        inicio = bisect.bisect_left(self.vocabulario, prefijo)
+        fin = bisect.bisect_left(self.vocabulario, prefijo + '\uffff')
+        return self.vocabulario[inicio:fin]
+
+    def expand(self, prefijo):
+        """
+        Términos del prefijo; si son más de MAX_EXPANSION, los que aparecen en
+        más documentos (no los primeros en orden alfabético).
+        """
+        candidatos = self.prefix_terms(prefijo)
+        if len(candidatos) <= MAX_EXPANSION:
+            return candidatos
+        return heapq.nlargest(MAX_EXPANSION, candidatos,
+                              key=lambda t: (len(self.index[t]), t))
+
+    def truncated_prefixes(self, consulta):
+        """Prefijos de la consulta que se expandieron a solo una parte de sus términos"""
+        _, prefijos, _ = parse_query(consulta)
+        return [p for p in prefijos if len(self.prefix_terms(p)) > MAX_EXPANSION]
+
+    def _phrase_docs(self, tokens):
+        """Documentos donde los tokens aparecen consecutivos"""
+        postings = [self.index.get(t) for t in tokens]
+        if not all(postings):
+            return set()
+        candidatos = set.intersection(*(set(p) for p in postings))
+        encontrados = set()
+        for doc in candidatos:
+            siguientes = [set(p[doc]) for p in postings[1:]]
+            for pos in postings[0][doc]:
+                if all(pos + i in s for i, s in enumerate(siguientes, 1)):
+                    encontrados.add(doc)
+                    break
+        return encontrados
+
+    def buscar(self, consulta, limite=10, por_himno=True):
+        """
+        Retorna los mejores resultados:
+        [{'numero', 'titulo', 'tipo', 'estrofa', 'puntaje', 'texto'}].
+        Con `por_himno` solo se deja la mejor estrofa de cada himno.
+        """
+        terminos, prefijos, frases = parse_query(consulta)
+        puntajes = {}
+
+        def sumar(parciales):
+            for doc, p in parciales.items():
+                puntajes[doc] = puntajes.get(doc, 0.0) + p
+
+        for termino in terminos:
+            sumar(self._bm25(termino))
+        for prefijo in prefijos:
+            # De los términos del prefijo cuenta el mejor de cada documento
+            mejores = {}
+            for termino in self.expand(prefijo):
+                for doc, p in self._bm25(termino).items():
+                    if p > mejores.get(doc, 0.0):
+                        mejores[doc] = p
+            sumar(mejores)
+
+        filtro = None
+        for tokens in frases:
+            docs = self._phrase_docs(tokens)
+            filtro = docs if filtro is None else filtro & docs
+            for termino in tokens:
+                sumar({doc: p for doc, p in self._bm25(termino).items() if doc in docs})
+        if filtro is not None:
+            puntajes = {doc: p for doc, p in puntajes.items() if doc in filtro}
+
+        resultados, vistos = [], set()
+        for doc, puntaje in self._ranking(puntajes, limite, por_himno):
+            numero, titulo, tipo, indice, texto = self.docs[doc]
+            if por_himno:
+                if numero in vistos:
+                    continue
+                vistos.add(numero)
+            resultados.append({
+                'numero': numero,
+                'titulo': titulo,
+                'tipo': tipo,
+                'estrofa': None if indice is None else indice + 1,
+                'puntaje': round(puntaje, 4),
+                'texto': normalize(texto),
+            })
+            if len(resultados) >= limite:
+                break
+        return resultados
+
+    def _ranking(self, puntajes, limite, por_himno):
+        """
+        Documentos de mayor a menor puntaje. Primero se prueba con un top-k
+        parcial; si al quitar estrofas del mismo himno no alcanza, se ordena todo.
+        """
+        clave = lambda item: (-item[1], item[0])
+        k = limite * 8 if por_himno else limite
+        if k < len(puntajes):
+            parcial = heapq.nsmallest(k, puntajes.items(), key=clave)
+            himnos = {self.docs[doc][0] for doc, _ in parcial}
+            if not por_himno or len(himnos) >= limite:
+                return parcial
+        return sorted(puntajes.items(), key=clave)
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda en las letras con BM25")
+    parser.add_argument('consulta')
+    parser.add_argument('--json-path', default=str(JSON_PATH), help="himnos.json a indexar")
+    parser.add_argument('--limite', type=int, default=10)
+    parser.add_argument('--todas', action='store_true',
+                        help="mostrar todas las estrofas que coinciden, no solo la mejor por himno")
+    parser.add_argument('--json', action='store_true', help="imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    motor = MotorBusqueda.from_json(args.json_path)
+    indexado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultados = motor.buscar(args.consulta, args.limite, por_himno=not args.todas)
+    consulta = time.perf_counter() - inicio
+
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+        return
+
+    for prefijo in motor.truncated_prefixes(args.consulta):
+        print(f"  ⚠️ '{prefijo}*' coincide con {len(motor.prefix_terms(prefijo))} términos; "
+              f"se usaron los {MAX_EXPANSION} más frecuentes. Agrega más letras.")
+
+    for r in resultados:
+        donde = 'coro' if r['tipo'] == CORO else f"estrofa {r['estrofa']}"
+        primera = r['texto'].strip().splitlines()[0] if r['texto'].strip() else ''
+        print(f"  {r['numero']:4d}  {r['titulo']}  [{donde}]  {r['puntaje']:.2f}")
+        print(f"        {primera}")
+    print(f"\n  {len(resultados)} resultado(s) | índice {indexado * 1000:.0f} ms | "
+          f"consulta {consulta * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Caché en disco de los rasgos de audio para analizar_estrofas.py.
+
+Decodificar los ~1.5 GB de MP3 cantados es lo que más tarda del análisis;
+los rasgos por frame ocupan una fracción de eso. Cada arreglo se guarda una
+vez por pista como .npy en `.sync/rasgos/<version>/<sha[:2]>/<sha>.<nombre>.npy`
+y se lee con memory mapping, así que volver a correr el análisis con otros
+parámetros no decodifica nada.
+
+- La clave es el sha256 del MP3: si el archivo cambia, cambia la clave.
+- Para no volver a hashear todo en cada corrida, `.sync/rasgos/indice.json`
+  recuerda tamaño, mtime y sha de cada ruta; solo se hashean los archivos
+  cuyo tamaño o mtime cambiaron.
+- La versión es un hash de los parámetros de extracción: si cambian, los
+  rasgos viejos quedan en otra carpeta y `limpiar` los borra.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+from manifiesto import BASE_DIR, SYNC_DIR, sha256_file
+
+CACHE_DIR = SYNC_DIR / "rasgos"
+INDICE_PATH = CACHE_DIR / "indice.json"
+
+def version_for(parametros):
+    """Versión (12 hex) de un dict de parámetros de extracción"""
+    data = json.dumps(parametros, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()[:12]
+
+class CacheRasgos:
+    """Arreglos .npy por sha256 de pista, para una versión de rasgos"""
+
+    def __init__(self, version, cache_dir=CACHE_DIR):
+        self.version = version
+        self.cache_dir = cache_dir
+        self.dir = cache_dir / version
+
+    def _path(self, sha, nombre):
+        return self.dir / sha[:2] / f"{sha}.{nombre}.npy"
+
+    def cargar(self, sha, nombres):
+        """{nombre: arreglo en memory map} o None si falta alguno"""
+        rasgos = {}
+        for nombre in nombres:
+            path = self._path(sha, nombre)
+            if not path.exists():
+                return None
+            try:
+                rasgos[nombre] = np.load(path, mmap_mode='r')
+            except (ValueError, OSError):
+                # Archivo truncado o de otro formato: se regenera
+                return None
+        return rasgos
+
+    def guardar(self, sha, rasgos):
+        for nombre, arreglo in rasgos.items():
+            path = self._path(sha, nombre)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + f'.{os.getpid()}.tmp')
+            with open(tmp, 'wb') as f:
+                np.save(f, np.ascontiguousarray(arreglo))
+            os.replace(tmp, path)
+
+    def limpiar(self, vigentes):
+        """
+        Borra las otras versiones y los rasgos de shas que ya no están en
+        `vigentes`. Retorna la cantidad de archivos borrados.
+        """
+        borrados = 0
+        if not self.cache_dir.exists():
+            return 0
+        for carpeta in self.cache_dir.iterdir():
+            if carpeta.is_dir() and carpeta.name != self.version:
+                borrados += sum(1 for p in carpeta.rglob('*.npy'))
+                shutil.rmtree(carpeta)
+        if self.dir.exists():
+            for path in self.dir.rglob('*.npy'):
+                if path.name.split('.')[0] not in vigentes:
+                    path.unlink()
+                    borrados += 1
+        return borrados
+
+    def tamaño(self):
+        if not self.dir.exists():
+            return 0
+        return sum(p.stat().st_size for p in self.dir.rglob('*.npy'))
+
+class IndiceHashes:
+    """sha256 de archivos, recalculado solo si cambian tamaño o mtime"""
+
+    def __init__(self, path=INDICE_PATH):
+        self.path = path
+        self.entradas = {}
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entradas = json.load(f)
+        self.hasheados = 0
+
+    def sha(self, archivo):
+        clave = archivo.relative_to(BASE_DIR).as_posix()
+        stat = archivo.stat()
+        entrada = self.entradas.get(clave)
+        if entrada and entrada['tamaño'] == stat.st_size and entrada['mtime_ns'] == stat.st_mtime_ns:
+            return entrada['sha256']
+        sha = sha256_file(archivo)
+        self.hasheados += 1
+        self.entradas[clave] = {'tamaño': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                'sha256': sha}
+        return sha
+
+    def podar(self):
+        """Olvida las rutas que ya no existen"""
+        self.entradas = {k: v for k, v in self.entradas.items() if (BASE_DIR / k).exists()}
+
+    def guardar(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.entradas, f, indent=2, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp, self.path)
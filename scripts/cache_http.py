@@ -0,0 +1,152 @@
+"""
+Caché HTTP en disco para los scripts de descarga.
+
+Guarda las respuestas GET 200 por URL en `.sync/cache.sqlite`, con el cuerpo
+comprimido (zlib), un TTL y un tamaño máximo con desalojo LRU. El modo
+offline responde solo desde la caché (aunque esté vencida) y nunca toca la
+red: sirve para re-validar cambios en los parsers contra todo el corpus.
+
+Se activa desde el entorno, así funciona igual bajo los cuatro scripts:
+
+    HIMNARIO_CACHE=1             activar la caché
+    HIMNARIO_CACHE_OFFLINE=1     solo caché, sin red (implica HIMNARIO_CACHE=1)
+    HIMNARIO_CACHE_TTL=86400     segundos antes de volver a pedir a la red
+    HIMNARIO_CACHE_MAX_MB=500    tamaño máximo (comprimido) antes de desalojar
+"""
+
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+BASE_DIR = Path(__file__).parent.parent
+CACHE_PATH = BASE_DIR / ".sync" / "cache.sqlite"
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+# Cabeceras que dejan de ser válidas al guardar el cuerpo ya descomprimido
+DROP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+def build_response(url, status, headers, body):
+    """Arma un requests.Response a partir de lo guardado"""
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response.reason = 'OK' if status == 200 else ''
+    response.headers = CaseInsensitiveDict(headers)
+    response.headers['Content-Length'] = str(len(body))
+    response.encoding = get_encoding_from_headers(response.headers)
+    # Sirve tanto para .content / .text como para .raw / iter_content
+    response._content = body
+    response._content_consumed = True
+    response.raw = io.BytesIO(body)
+    return response
+
+class CacheHTTP:
+    """Caché de respuestas por URL, segura para usar desde varios hilos"""
+
+    def __init__(self, path=CACHE_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES,
+                 offline=False):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.stats = {'aciertos': 0, 'fallos': 0}
+
+    def get(self, url):
+        """Respuesta guardada si está vigente (o cualquiera en modo offline)"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT status, headers, body, stored_at FROM entries WHERE url = ?",
+                (url,)).fetchone()
+            if row is None or (not self.offline and time.time() - row[3] > self.ttl):
+                self.stats['fallos'] += 1
+                return None
+            self.db.execute("UPDATE entries SET accessed_at = ? WHERE url = ?",
+                            (time.time(), url))
+            self.db.commit()
+            self.stats['aciertos'] += 1
+        status, headers, body, _ = row
+        return build_response(url, status, json.loads(headers), zlib.decompress(body))
+
+    def put(self, url, response):
+        """
+        Guarda una respuesta 200 (lee el cuerpo completo) y retorna una copia
+        reconstruida, útil cuando la original era un stream.
+        """
+        body = response.content
+        headers = {k: v for k, v in response.headers.items()
+                   if k.lower() not in DROP_HEADERS}
+        compressed = zlib.compress(body, 6)
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, response.status_code, json.dumps(headers), compressed,
+                 len(compressed), now, now))
+            self._evict()
+            self.db.commit()
+        return build_response(url, response.status_code, headers, body)
+
+    def touch(self, url):
+        """El servidor confirmó (304) que la copia sigue vigente"""
+        with self.lock:
+            now = time.time()
+            self.db.execute("UPDATE entries SET stored_at = ?, accessed_at = ? WHERE url = ?",
+                            (now, now, url))
+            self.db.commit()
+
+    def _evict(self):
+        """Desaloja las entradas menos usadas hasta quedar bajo max_bytes"""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.db.execute("SELECT url, size FROM entries ORDER BY accessed_at").fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            total -= size
+
+    def miss_response(self, url):
+        """Respuesta 504 para un recurso ausente en modo offline (como only-if-cached)"""
+        response = build_response(url, 504, {}, b'')
+        response.reason = 'Gateway Timeout (offline, no hay copia en cache)'
+        return response
+
+def cache_from_env():
+    """CacheHTTP configurada según las variables HIMNARIO_CACHE*, o None"""
+    offline = os.environ.get('HIMNARIO_CACHE_OFFLINE') == '1'
+    if not offline and os.environ.get('HIMNARIO_CACHE') != '1':
+        return None
+    return CacheHTTP(
+        ttl=float(os.environ.get('HIMNARIO_CACHE_TTL', DEFAULT_TTL)),
+        max_bytes=int(float(os.environ.get('HIMNARIO_CACHE_MAX_MB', 0)) * 1024 * 1024)
+        or DEFAULT_MAX_BYTES,
+        offline=offline,
+    )
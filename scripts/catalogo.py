@@ -0,0 +1,330 @@
+"""
+Catálogo de himnos en SQLite.
+
+En lugar de que cada script cargue todo assets/data/himnos.json, cambie
+algunos registros y vuelva a escribir el archivo completo, los scripts
+aplican cambios puntuales sobre un catálogo indexado y transaccional
+(`.sync/catalogo.sqlite`) y un exportador regenera himnos.json solo si su
+contenido realmente cambió.
+
+Tablas: himnos, estrofas, timestamps (stanza_timestamps) y media (URLs de
+audio). Los campos que no tienen tabla propia se guardan en `extra` (JSON),
+y `campos` conserva el orden de las claves para exportar el mismo JSON.
+La tabla audio guarda lo que escanear_audio.py lee de cada MP3 local
+(duración, bitrate, validez); no se exporta a himnos.json y sobrevive a las
+reimportaciones.
+
+Si himnos.json cambia por fuera (edición a mano, git pull), se detecta por
+su sha256 y el catálogo se vuelve a importar antes de usarlo.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+CATALOGO_PATH = BASE_DIR / ".sync" / "catalogo.sqlite"
+JSON_PATH = BASE_DIR / "assets" / "data" / "himnos.json"
+
+MEDIA_CAMPOS = {'mp3Cantado': 'cantado', 'mp3Instrumental': 'instrumental'}
+CAMPOS_BASE = ['numero', 'titulo', 'estrofas', 'coro', 'mp3Cantado', 'mp3Instrumental',
+               'referenciaBiblica']
+AUDIO_CAMPOS = ('tamaño', 'mtime_ns', 'duracion', 'bitrate', 'sample_rate', 'vbr', 'valido',
+                'error')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS himnos (
+    numero INTEGER PRIMARY KEY,
+    titulo TEXT NOT NULL,
+    coro TEXT,
+    referencia_biblica TEXT,
+    campos TEXT NOT NULL,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS estrofas (
+    numero INTEGER NOT NULL REFERENCES himnos (numero) ON DELETE CASCADE,
+    indice INTEGER NOT NULL,
+    texto TEXT NOT NULL,
+    PRIMARY KEY (numero, indice)
+);
+CREATE TABLE IF NOT EXISTS timestamps (
+    numero INTEGER NOT NULL REFERENCES himnos (numero) ON DELETE CASCADE,
+    indice INTEGER NOT NULL,
+    stanza_index INTEGER NOT NULL,
+    start REAL NOT NULL,
+    PRIMARY KEY (numero, indice)
+);
+CREATE TABLE IF NOT EXISTS media (
+    numero INTEGER NOT NULL REFERENCES himnos (numero) ON DELETE CASCADE,
+    tipo TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (numero, tipo)
+);
+CREATE TABLE IF NOT EXISTS audio (
+    numero INTEGER NOT NULL,
+    tipo TEXT NOT NULL,
+    tamaño INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    duracion REAL,
+    bitrate INTEGER,
+    sample_rate INTEGER,
+    vbr INTEGER,
+    valido INTEGER NOT NULL,
+    error TEXT,
+    PRIMARY KEY (numero, tipo)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def serialize(himnos):
+    """Mismo formato que usaban los scripts: json.dump(indent=2, ensure_ascii=False)"""
+    return json.dumps(himnos, ensure_ascii=False, indent=2)
+
+class Catalogo:
+    """Acceso al catálogo; un objeto por hilo/proceso"""
+
+    def __init__(self, path=CATALOGO_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: las transacciones las abre transaccion()
+        self.db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+        self._depth = 0
+
+    def close(self):
+        self.db.close()
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Transacción de escritura (BEGIN IMMEDIATE): otro script que escriba al
+        mismo tiempo espera en lugar de pisar los cambios.
+        """
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        self.db.execute("BEGIN IMMEDIATE")
+        self._depth = 1
+        try:
+            yield
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        else:
+            self.db.execute("COMMIT")
+        finally:
+            self._depth = 0
+
+    # --- meta -------------------------------------------------------------
+
+    def get_meta(self, clave):
+        row = self.db.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, clave, valor):
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (clave, valor))
+
+    # --- lectura ----------------------------------------------------------
+
+    def numeros(self):
+        return {row[0] for row in self.db.execute("SELECT numero FROM himnos")}
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM himnos").fetchone()[0]
+
+    def obtener(self, numero):
+        """Himno en el formato de himnos.json, o None"""
+        himnos = self._cargar("WHERE numero = ?", (numero,))
+        return himnos[0] if himnos else None
+
+    def todos(self):
+        """Todos los himnos ordenados por número"""
+        return self._cargar("", ())
+
+    def _cargar(self, where, params):
+        filas = self.db.execute(
+            f"SELECT numero, titulo, coro, referencia_biblica, campos, extra "
+            f"FROM himnos {where} ORDER BY numero", params).fetchall()
+        if not filas:
+            return []
+        filtro = "WHERE numero = ?" if where else ""
+
+        estrofas, timestamps, media = {}, {}, {}
+        for numero, texto in self.db.execute(
+                f"SELECT numero, texto FROM estrofas {filtro} ORDER BY numero, indice", params):
+            estrofas.setdefault(numero, []).append(texto)
+        for numero, stanza_index, start in self.db.execute(
+                f"SELECT numero, stanza_index, start FROM timestamps {filtro} "
+                f"ORDER BY numero, indice", params):
+            timestamps.setdefault(numero, []).append(
+                {'start': start, 'stanza_index': stanza_index})
+        for numero, tipo, url in self.db.execute(
+                f"SELECT numero, tipo, url FROM media {filtro}", params):
+            media.setdefault(numero, {})[tipo] = url
+
+        himnos = []
+        for numero, titulo, coro, referencia, campos, extra in filas:
+            valores = json.loads(extra)
+            valores.update({
+                'numero': numero,
+                'titulo': titulo,
+                'estrofas': estrofas.get(numero, []),
+                'coro': coro,
+                'referenciaBiblica': referencia,
+                'stanza_timestamps': timestamps.get(numero, []),
+            })
+            for campo, tipo in MEDIA_CAMPOS.items():
+                valores[campo] = media.get(numero, {}).get(tipo, '')
+            himnos.append({campo: valores[campo] for campo in json.loads(campos)
+                           if campo in valores})
+        return himnos
+
+    # --- escritura --------------------------------------------------------
+
+    def guardar(self, himno):
+        """Inserta o reemplaza un himno completo (formato de himnos.json)"""
+        numero = himno['numero']
+        existente = self.db.execute(
+            "SELECT campos FROM himnos WHERE numero = ?", (numero,)).fetchone()
+        campos = list(himno.keys())
+        if existente:
+            # Conservar el orden conocido y agregar claves nuevas al final
+            previos = json.loads(existente[0])
+            campos = previos + [c for c in campos if c not in previos]
+        conocidos = set(CAMPOS_BASE) | {'stanza_timestamps'}
+        extra = {k: v for k, v in himno.items() if k not in conocidos}
+
+        with self.transaccion():
+            self.db.execute(
+                "INSERT OR REPLACE INTO himnos (numero, titulo, coro, referencia_biblica, "
+                "campos, extra) VALUES (?, ?, ?, ?, ?, ?)",
+                (numero, himno.get('titulo', ''), himno.get('coro'),
+                 himno.get('referenciaBiblica'), json.dumps(campos),
+                 json.dumps(extra, ensure_ascii=False)))
+            self._escribir_estrofas(numero, himno.get('estrofas', []))
+            self._escribir_timestamps(numero, himno.get('stanza_timestamps', []))
+            self.db.execute("DELETE FROM media WHERE numero = ?", (numero,))
+            for campo, tipo in MEDIA_CAMPOS.items():
+                if himno.get(campo):
+                    self.db.execute("INSERT OR REPLACE INTO media VALUES (?, ?, ?)",
+                                    (numero, tipo, himno[campo]))
+
+    def actualizar(self, numero, **campos):
+        """
+        Actualiza solo los campos indicados de un himno existente
+        (p. ej. estrofas=[...], coro='...', stanza_timestamps=[...]).
+        """
+        himno = self.obtener(numero)
+        if himno is None:
+            raise KeyError(f"El himno {numero} no está en el catálogo")
+        himno.update(campos)
+        self.guardar(himno)
+
+    def fusionar(self, himno):
+        """
+        Inserta un himno o actualiza solo las claves que trae, conservando el
+        resto (p. ej. stanza_timestamps). Retorna True si algo cambió.
+        """
+        existente = self.obtener(himno['numero'])
+        if existente is None:
+            self.guardar(himno)
+            return True
+        nuevo = dict(existente, **himno)
+        if nuevo == existente:
+            return False
+        self.guardar(nuevo)
+        return True
+
+    def _escribir_estrofas(self, numero, estrofas):
+        self.db.execute("DELETE FROM estrofas WHERE numero = ?", (numero,))
+        self.db.executemany("INSERT INTO estrofas VALUES (?, ?, ?)",
+                            [(numero, i, texto) for i, texto in enumerate(estrofas)])
+
+    def _escribir_timestamps(self, numero, timestamps):
+        self.db.execute("DELETE FROM timestamps WHERE numero = ?", (numero,))
+        self.db.executemany("INSERT INTO timestamps VALUES (?, ?, ?, ?)",
+                            [(numero, i, t['stanza_index'], t['start'])
+                             for i, t in enumerate(timestamps)])
+
+    # --- audio local ------------------------------------------------------
+
+    def audio(self):
+        """{(numero, tipo): {tamaño, mtime_ns, duracion, ...}} de los MP3 escaneados"""
+        filas = self.db.execute(
+            f"SELECT numero, tipo, {', '.join(AUDIO_CAMPOS)} FROM audio")
+        return {(fila[0], fila[1]): dict(zip(AUDIO_CAMPOS, fila[2:])) for fila in filas}
+
+    def guardar_audio(self, numero, tipo, info):
+        """Inserta o reemplaza los datos de un MP3 local"""
+        valores = [info.get(campo) for campo in AUDIO_CAMPOS]
+        with self.transaccion():
+            self.db.execute(
+                f"INSERT OR REPLACE INTO audio (numero, tipo, {', '.join(AUDIO_CAMPOS)}) "
+                f"VALUES ({', '.join('?' * (len(valores) + 2))})", [numero, tipo] + valores)
+
+    def borrar_audio(self, numero, tipo):
+        with self.transaccion():
+            self.db.execute("DELETE FROM audio WHERE numero = ? AND tipo = ?", (numero, tipo))
+
+    # --- importación / exportación ---------------------------------------
+
+    def importar_json(self, json_path=JSON_PATH):
+        """Reemplaza el catálogo con el contenido de himnos.json"""
+        data = Path(json_path).read_bytes()
+        with self.transaccion():
+            self.db.execute("DELETE FROM himnos")
+            for himno in json.loads(data):
+                self.guardar(himno)
+            self.set_meta('json_sha256', sha256_bytes(data))
+
+    def sincronizar(self, json_path=JSON_PATH):
+        """Importa himnos.json si el catálogo está vacío o el archivo cambió por fuera"""
+        json_path = Path(json_path)
+        if not json_path.exists():
+            return False
+        sha = sha256_bytes(json_path.read_bytes())
+        if len(self) and self.get_meta('json_sha256') == sha:
+            return False
+        self.importar_json(json_path)
+        return True
+
+    def exportar_json(self, json_path=JSON_PATH):
+        """
+        Regenera himnos.json solo si el contenido cambió; retorna True si
+        escribió. La lectura, la escritura y el hash quedan en una misma
+        transacción para que otro script no cambie el catálogo entre medio.
+        """
+        json_path = Path(json_path)
+        with self.transaccion():
+            data = serialize(self.todos()).encode('utf-8')
+            sha = sha256_bytes(data)
+            escribir = not (json_path.exists()
+                            and sha256_bytes(json_path.read_bytes()) == sha)
+            if escribir:
+                json_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = json_path.with_name(json_path.name + '.tmp')
+                tmp.write_bytes(data)
+                os.replace(tmp, json_path)
+            self.set_meta('json_sha256', sha)
+        return escribir
+
+def abrir(json_path=JSON_PATH, path=CATALOGO_PATH):
+    """Abre el catálogo sincronizado con himnos.json"""
+    catalogo = Catalogo(path)
+    catalogo.sincronizar(json_path)
+    return catalogo
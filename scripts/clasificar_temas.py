@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Clasifica cada himno por tema una sola vez, en build.
+
+Antes BackgroundManager (lib/utils/background_manager.dart) buscaba en
+tiempo de ejecución cada palabra clave de _themeKeywords dentro del título,
+una por una. Aquí se clasifica con el título, la letra (estrofas y coro) y
+la referencia bíblica usando un autómata Aho-Corasick: todas las palabras
+clave se buscan en una sola pasada, lineal en el largo del texto.
+
+Puntaje de un tema = Σ peso del campo × idf de la palabra clave ×
+ocurrencias (máximo MAX_OCURRENCIAS por palabra y campo). El idf se calcula
+sobre el corpus, así palabras que están en casi todos los himnos ("gloria",
+"santo") pesan menos que las específicas ("pesebre", "calvario"). Las
+coincidencias son por palabra completa, sin tildes ni mayúsculas.
+
+Se guarda en el catálogo `tema` (o 'default') y `fondos`, la lista de
+imágenes ordenada por afinidad que la app usa directamente.
+
+USO:
+    python scripts/clasificar_temas.py               # clasificar y exportar
+    python scripts/clasificar_temas.py --explicar 1  # ver por qué
+    python scripts/clasificar_temas.py --simular     # solo reportar, sin guardar
+"""
+
+import argparse
+import math
+from collections import Counter, deque
+
+from catalogo import BASE_DIR, JSON_PATH, abrir
+from indice_busqueda import fold
+
+BACKGROUNDS_DIR = BASE_DIR / "assets" / "backgrounds"
+DEFAULT = 'default'
+# Fondos cuando ningún tema alcanza el umbral (igual que _defaultBackgrounds)
+FONDOS_DEFAULT = ['naturaleza', 'cielo']
+MAX_FONDOS = 6
+
+PESO_TITULO = 3.0
+PESO_LETRA = 1.0
+PESO_REFERENCIA = 4.0
+MAX_OCURRENCIAS = 3
+UMBRAL = 2.0
+
+# Desempate, igual que el orden de prioridad de _detectTheme
+PRIORIDAD = [
+    'navidad', 'resurreccion', 'cruz', 'segunda_venida', 'bautismo',
+    'comunion', 'espiritu', 'cielo', 'oracion', 'adoracion',
+    'evangelismo', 'familia', 'iglesia', 'fe', 'naturaleza',
+]
+
+# Palabras clave de _themeKeywords (las variantes sin tilde se unifican al plegar)
+# más algunas formas verbales que faltaban
+PALABRAS_CLAVE = {
+    'navidad': [
+        'navidad', 'navideño', 'navideña', 'noel', 'nochebuena',
+        'belén', 'pesebre', 'portal',
+        'nació', 'nacido', 'nacimiento', 'natividad',
+        'estrella', 'pastores', 'magos', 'reyes',
+        'maría', 'josé', 'emmanuel', 'emanuel',
+        'niño jesús', 'niño dios',
+        'al mundo paz', 'noche de paz', 'oh santísimo', 'venid fieles',
+        'ángeles cantando', 'gloria in excelsis',
+        'oh aldehuela', 'allá en el pesebre', 'campana', 'campanas',
+        'dulce jesús', 'el tamborilero', 'los peces', 'arre borriquito',
+        'blanca navidad', 'cascabel', 'feliz navidad', 'rey ha nacido',
+        'tu scendi dalle stelle', 'adeste fideles', 'infant holy',
+        'go tell it', 'joy to the world', 'silent night', 'away in a manger',
+        'hark the herald', 'o come all ye', 'first noel', 'what child is this',
+    ],
+    'adoracion': [
+        'alabanza', 'alabar', 'alabad', 'adoración', 'adorar', 'adorad',
+        'gloria', 'glorioso', 'glorifica', 'santo', 'santidad', 'majestad',
+        'cantad', 'canto', 'aleluya', 'hosanna', 'exaltad', 'magnifica',
+        'bendito', 'bendecir', 'engrandecer', 'exaltar',
+    ],
+    'cruz': [
+        'cruz', 'calvario', 'gólgota', 'golgotha', 'sangre', 'sacrificio',
+        'murió', 'morir', 'muerte', 'getsemaní', 'pasión',
+        'sufrimiento', 'corona', 'espinas', 'clavos', 'heridas',
+        'consumado', 'cordero', 'inmolado',
+    ],
+    'resurreccion': [
+        'resurrección', 'resucitó', 'victoria',
+        'vive', 'viviente', 'triunfo', 'vencedor', 'tumba vacía',
+        'levantó', 'tercer día', 'cristo vive', 'él vive',
+    ],
+    'segunda_venida': [
+        'viene', 'vendrá', 'regresará', 'regreso', 'venida', 'viniendo', 'volverá',
+        'segunda venida', 'pronto viene', 'nubes', 'ángeles',
+        'trompeta', 'arrebatados', 'manifestación',
+        'maranata', 'ven señor',
+    ],
+    'oracion': [
+        'oración', 'ora', 'orar', 'ruego', 'clamo', 'clamar',
+        'suplico', 'súplica', 'intercesión',
+        'pedir', 'rogad', 'hablar con dios', 'háblame',
+    ],
+    'fe': [
+        'fe', 'confía', 'confianza', 'confiar', 'creo', 'creer',
+        'fiel', 'firme', 'seguro', 'seguridad', 'refugio', 'amparo',
+        'roca', 'fortaleza', 'baluarte', 'esperanza',
+    ],
+    'naturaleza': [
+        'creación', 'tierra', 'monte', 'montaña',
+        'mar', 'océano', 'río', 'naturaleza',
+        'aves', 'flores', 'jardín', 'campo', 'sol', 'luna',
+    ],
+    'cielo': [
+        'cielo eterno', 'hogar celestial', 'mansión', 'mansiones',
+        'paraíso', 'gloria eterna', 'eternidad', 'reino',
+        'ciudad celestial', 'nueva jerusalén',
+        'más allá', 'hogar de dios',
+    ],
+    'espiritu': [
+        'espíritu santo', 'espíritu', 'consolador', 'paloma',
+        'pentecostés', 'fuego divino', 'llama divina',
+        'poder', 'unción', 'prometido', 'paráclito',
+    ],
+    'evangelismo': [
+        'evangelio', 'misión', 'predica', 'predicar', 'testifica',
+        'testificar', 'anuncia', 'anunciar', 'salva', 'salvar', 'salvación',
+        'mensaje', 'proclamad', 'id por todo', 'gran comisión',
+    ],
+    'familia': [
+        'hogar', 'familia', 'padres', 'hijos', 'madre', 'padre', 'niños',
+        'matrimonio', 'esposo', 'esposa', 'casa', 'unión familiar',
+    ],
+    'bautismo': [
+        'bautismo', 'bautiza', 'bautizar', 'agua', 'sepultados',
+        'regeneración', 'sumergir',
+    ],
+    'comunion': [
+        'cena', 'comunión', 'pan', 'vino', 'copa', 'cáliz',
+        'mesa del señor', 'memorial', 'partimiento',
+    ],
+    'iglesia': [
+        'iglesia', 'congregación', 'hermanos', 'pueblo',
+        'congregad', 'reunión', 'asamblea', 'comunidad',
+        'cuerpo de cristo', 'unidos',
+    ],
+}
+
+# Pasajes (libro y capítulo) asociados a un tema, para la referencia bíblica
+PASAJES = {
+    'navidad': ['lucas 2', 'mateo 1', 'mateo 2', 'isaías 9', 'miqueas 5'],
+    'cruz': ['isaías 53', 'mateo 27', 'marcos 15', 'lucas 23', 'juan 19'],
+    'resurreccion': ['mateo 28', 'marcos 16', 'lucas 24', 'juan 20', '1 corintios 15'],
+    'segunda_venida': ['mateo 24', 'hechos 1', '1 tesalonicenses 4', 'apocalipsis 1',
+                       'apocalipsis 22', 'tito 2'],
+    'cielo': ['juan 14', 'apocalipsis 21', 'apocalipsis 7', 'hebreos 11'],
+    'espiritu': ['hechos 2', 'joel 2', 'juan 16'],
+    'bautismo': ['romanos 6', 'mateo 3'],
+    'comunion': ['1 corintios 11', 'lucas 22'],
+    'adoracion': ['salmos', '1 crónicas 29', 'apocalipsis 4', 'apocalipsis 5'],
+    'evangelismo': ['marcos 16:15', 'romanos 10', 'isaías 52'],
+    'fe': ['hebreos 11:1', 'salmos 46', 'proverbios 3'],
+    'oracion': ['mateo 6', 'filipenses 4', 'santiago 5'],
+}
+
+class AhoCorasick:
+    """Autómata de búsqueda simultánea de muchos patrones"""
+
+    def __init__(self, patrones):
+        # patrones: iterable de (texto, dato)
+        self.transiciones = [{}]
+        self.fallo = [0]
+        self.salidas = [[]]
+        for patron, dato in patrones:
+            estado = 0
+            for c in patron:
+                siguiente = self.transiciones[estado].get(c)
+                if siguiente is None:
+                    siguiente = len(self.transiciones)
+                    self.transiciones[estado][c] = siguiente
+                    self.transiciones.append({})
+                    self.fallo.append(0)
+                    self.salidas.append([])
+                estado = siguiente
+            self.salidas[estado].append((len(patron), dato))
+
+        # Enlaces de fallo por BFS; cada estado hereda las salidas de su fallo
+        cola = deque(self.transiciones[0].values())
+        while cola:
+            estado = cola.popleft()
+            for c, siguiente in self.transiciones[estado].items():
+                cola.append(siguiente)
+                f = self.fallo[estado]
+                while f and c not in self.transiciones[f]:
+                    f = self.fallo[f]
+                destino = self.transiciones[f].get(c, 0)
+                self.fallo[siguiente] = destino if destino != siguiente else 0
+                self.salidas[siguiente] = self.salidas[siguiente] + self.salidas[self.fallo[siguiente]]
+
+    def buscar(self, texto):
+        """Produce (inicio, fin, dato) de cada coincidencia"""
+        estado = 0
+        transiciones, fallo, salidas = self.transiciones, self.fallo, self.salidas
+        for i, c in enumerate(texto):
+            while estado and c not in transiciones[estado]:
+                estado = fallo[estado]
+            estado = transiciones[estado].get(c, 0)
+            for largo, dato in salidas[estado]:
+                yield i - largo + 1, i + 1, dato
+
+def build_matcher():
+    """Autómata con todas las palabras clave y pasajes, ya plegados"""
+    patrones = {}
+    for tema, palabras in PALABRAS_CLAVE.items():
+        for palabra in palabras:
+            patrones.setdefault(fold(palabra), set()).add(tema)
+    for tema, pasajes in PASAJES.items():
+        for pasaje in pasajes:
+            patrones.setdefault(fold(pasaje), set()).add(tema)
+    return AhoCorasick((patron, (patron, frozenset(temas)))
+                       for patron, temas in sorted(patrones.items()))
+
+def is_word(texto, inicio, fin):
+    """La coincidencia no está pegada a otra letra o dígito"""
+    return ((inicio == 0 or not texto[inicio - 1].isalnum()) and
+            (fin == len(texto) or not texto[fin].isalnum()))
+
+def find_keywords(matcher, texto):
+    """Counter de palabras clave (patrón, temas) encontradas como palabra completa"""
+    texto = fold(texto or '')
+    return Counter(dato for inicio, fin, dato in matcher.buscar(texto)
+                   if is_word(texto, inicio, fin))
+
+def hymn_fields(himno):
+    letra = '\n'.join(himno.get('estrofas', []) + [himno.get('coro') or ''])
+    return [
+        ('titulo', PESO_TITULO, himno.get('titulo', '')),
+        ('letra', PESO_LETRA, letra),
+        ('referencia', PESO_REFERENCIA, himno.get('referenciaBiblica') or ''),
+    ]
+
+def keyword_idf(matcher, himnos):
+    """idf de cada palabra clave sobre el corpus (en cuántos himnos aparece)"""
+    df = Counter()
+    for himno in himnos:
+        encontradas = set()
+        for _, _, texto in hymn_fields(himno):
+            encontradas.update(find_keywords(matcher, texto))
+        df.update(encontradas)
+    total = len(himnos) or 1
+    return {dato: math.log(1 + total / n) for dato, n in df.items()}
+
+def score_hymn(matcher, idf, himno):
+    """Retorna ({tema: puntaje}, [(campo, patrón, tema, aporte)])"""
+    puntajes = Counter()
+    detalle = []
+    for campo, peso, texto in hymn_fields(himno):
+        for dato, n in find_keywords(matcher, texto).items():
+            patron, temas = dato
+            aporte = peso * idf.get(dato, 1.0) * min(n, MAX_OCURRENCIAS)
+            for tema in temas:
+                puntajes[tema] += aporte
+                detalle.append((campo, patron, tema, round(aporte, 2)))
+    return puntajes, detalle
+
+def rank_themes(puntajes):
+    """Temas sobre el umbral, de mayor a menor puntaje (desempata PRIORIDAD)"""
+    orden = {tema: i for i, tema in enumerate(PRIORIDAD)}
+    temas = [t for t, p in puntajes.items() if p >= UMBRAL]
+    return sorted(temas, key=lambda t: (-puntajes[t], orden.get(t, len(orden))))
+
+def available_backgrounds(backgrounds_dir=BACKGROUNDS_DIR):
+    """{tema: [rutas de asset]} según las imágenes que hay en assets/backgrounds"""
+    fondos = {}
+    if not backgrounds_dir.exists():
+        return fondos
+    for carpeta in sorted(p for p in backgrounds_dir.iterdir() if p.is_dir()):
+        imagenes = sorted(p for p in carpeta.iterdir()
+                          if p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.webp'))
+        if imagenes:
+            fondos[carpeta.name] = [p.relative_to(BASE_DIR).as_posix() for p in imagenes]
+    return fondos
+
+def rank_backgrounds(numero, temas, fondos):
+    """
+    Lista de fondos para el himno: imágenes de cada tema en orden de
+    afinidad, rotadas por número (como numero % largo en la app), y al
+    final las de FONDOS_DEFAULT.
+    """
+    lista = []
+    for tema in temas + FONDOS_DEFAULT:
+        imagenes = fondos.get(tema, [])
+        if imagenes:
+            k = numero % len(imagenes)
+            lista.extend(i for i in imagenes[k:] + imagenes[:k] if i not in lista)
+        if len(lista) >= MAX_FONDOS:
+            break
+    return lista[:MAX_FONDOS]
+
+def title_theme(titulo):
+    """El criterio anterior de la app (solo título, por prioridad), para comparar"""
+    texto = titulo.lower()
+    for tema in PRIORIDAD:
+        if any(palabra in texto for palabra in PALABRAS_CLAVE[tema]):
+            return tema
+    return DEFAULT
+
+def classify(himnos, fondos=None):
+    """Retorna {numero: (tema, fondos, puntajes, detalle)}"""
+    matcher = build_matcher()
+    idf = keyword_idf(matcher, himnos)
+    fondos = available_backgrounds() if fondos is None else fondos
+    resultado = {}
+    for himno in himnos:
+        puntajes, detalle = score_hymn(matcher, idf, himno)
+        temas = rank_themes(puntajes)
+        tema = temas[0] if temas else DEFAULT
+        resultado[himno['numero']] = (tema, rank_backgrounds(himno['numero'], temas, fondos),
+                                      puntajes, detalle)
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description="Clasificación de himnos por tema")
+    parser.add_argument('--explicar', type=int, metavar='NUMERO',
+                        help="mostrar puntajes y palabras clave de un himno")
+    parser.add_argument('--simular', action='store_true',
+                        help="solo reportar, sin escribir en el catálogo")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CLASIFICANDO HIMNOS POR TEMA")
+    print("=" * 60)
+
+    catalogo = abrir()
+    himnos = catalogo.todos()
+    resultado = classify(himnos)
+
+    if args.explicar is not None:
+        if args.explicar not in resultado:
+            print(f"\n✗ El himno {args.explicar} no está en el catálogo")
+            return
+        tema, fondos, puntajes, detalle = resultado[args.explicar]
+        himno = next(h for h in himnos if h['numero'] == args.explicar)
+        print(f"\n   Himno {args.explicar}: {himno['titulo']}")
+        print(f"   Tema: {tema} (antes, solo por título: {title_theme(himno['titulo'])})")
+        for t, p in puntajes.most_common():
+            print(f"   {t:16s} {p:6.2f}")
+        print("\n   Coincidencias:")
+        for campo, patron, t, aporte in sorted(detalle, key=lambda d: -d[3]):
+            print(f"   {campo:10s} {patron!r:24s} → {t:16s} +{aporte}")
+        print(f"\n   Fondos: {fondos}")
+        return
+
+    conteo = Counter(tema for tema, _, _, _ in resultado.values())
+    iguales = sum(1 for h in himnos if resultado[h['numero']][0] == title_theme(h['titulo']))
+    print(f"\n   {len(himnos)} himnos clasificados")
+    for tema, n in conteo.most_common():
+        print(f"   {tema:16s} {n:4d}")
+    print(f"\n   Coinciden con el criterio anterior (solo título): {iguales}/{len(himnos)}")
+
+    if args.simular:
+        return
+
+    with catalogo.transaccion():
+        cambiados = sum(catalogo.fusionar({'numero': n, 'tema': tema, 'fondos': fondos})
+                        for n, (tema, fondos, _, _) in resultado.items())
+    print(f"\n   Himnos con cambios: {cambiados}")
+    if catalogo.exportar_json(JSON_PATH):
+        print(f"   ✓ Exportado {JSON_PATH}")
+    else:
+        print(f"   = {JSON_PATH} sin cambios")
+
+if __name__ == "__main__":
+    main()
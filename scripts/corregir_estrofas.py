@@ -4,8 +4,10 @@ Toma el JSON actual y divide las estrofas que están en un solo bloque
 en estrofas separadas usando los números como marcadores.
 """
 
-import json
-import re
+import os
+
+from catalogo import abrir
+from parser_letras import parse_hymn, parse_many
 
 def parse_into_stanzas(text):
     """
@@ -17,70 +19,8 @@ def parse_into_stanzas(text):
     
     Retorna: lista de estrofas, coro (si existe)
     """
-    if not text:
-        return [], None
-    
-    lines = text.strip().split('\n')
-    estrofas = []
-    coro = None
-    current_section = []
-    in_coro = False
-    skip_title = True
-    
-    for line in lines:
-        stripped = line.strip()
-        
-        # Saltar línea de título (Himno #...)
-        if skip_title and stripped.startswith('Himno #'):
-            skip_title = False
-            continue
-        
-        skip_title = False
-        
-        # Detectar número de estrofa (un número solo en la línea)
-        if re.match(r'^\d+$', stripped):
-            # Guardar sección anterior si existe
-            if current_section:
-                section_text = '\n'.join(current_section).strip()
-                if section_text:
-                    if in_coro:
-                        coro = section_text
-                    else:
-                        estrofas.append(section_text)
-            current_section = []
-            in_coro = False
-            continue
-        
-        # Detectar coro
-        if stripped.lower().startswith('coro:') or stripped.lower() == 'coro':
-            # Guardar sección anterior
-            if current_section:
-                section_text = '\n'.join(current_section).strip()
-                if section_text:
-                    estrofas.append(section_text)
-            current_section = []
-            in_coro = True
-            # Si el coro tiene texto después de "Coro:"
-            if ':' in stripped:
-                resto = stripped.split(':', 1)[1].strip()
-                if resto:
-                    current_section.append(resto)
-            continue
-        
-        # Agregar línea a la sección actual
-        if stripped:
-            current_section.append(stripped)
-    
-    # Guardar última sección
-    if current_section:
-        section_text = '\n'.join(current_section).strip()
-        if section_text:
-            if in_coro:
-                coro = section_text
-            else:
-                estrofas.append(section_text)
-    
-    return estrofas, coro
+    # Solo se descarta el título si es la primera línea
+    return parse_hymn(text, title_anywhere=False)
 
 def main():
     print("=" * 50)
@@ -91,31 +31,38 @@ def main():
     output_file = "assets/data/himnos.json"
     
     print(f"\n1. Leyendo {input_file}...")
-    try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            himnos = json.load(f)
-    except FileNotFoundError:
+    if not os.path.exists(input_file):
         print(f"   Error: No se encuentra {input_file}")
         return
+    catalogo = abrir(input_file)
+    himnos = catalogo.todos()
     
     print(f"   Encontrados {len(himnos)} himnos")
     
     print("\n2. Procesando estrofas...")
     
     corregidos = 0
+    modificados = []
     con_coro = 0
     total_estrofas = 0
     
+    # Si solo hay 1 estrofa y es muy larga, probablemente necesita parseo.
+    # Los candidatos se parsean en lote (en paralelo si el corpus es grande).
+    candidatos = [h for h in himnos
+                  if len(h.get('estrofas', [])) == 1 and len(h['estrofas'][0]) > 200]
+    parseados = parse_many([h['estrofas'][0] for h in candidatos], title_anywhere=False)
+    resultados = {id(h): r for h, r in zip(candidatos, parseados)}
+    
     for himno in himnos:
         old_estrofas = himno.get('estrofas', [])
         
-        # Si solo hay 1 estrofa y es muy larga, probablemente necesita parseo
-        if len(old_estrofas) == 1 and len(old_estrofas[0]) > 200:
-            new_estrofas, coro = parse_into_stanzas(old_estrofas[0])
+        if id(himno) in resultados:
+            new_estrofas, coro = resultados[id(himno)]
             if len(new_estrofas) > 1:
                 himno['estrofas'] = new_estrofas
                 if coro and not himno.get('coro'):
                     himno['coro'] = coro
+                modificados.append(himno)
                 corregidos += 1
         elif len(old_estrofas) == 0:
             # Intentar parsear cualquier texto que haya
@@ -132,20 +79,21 @@ def main():
             con_coro += 1
         total_estrofas += len(himno.get('estrofas', []))
     
-    # Ordenar por número
-    himnos.sort(key=lambda x: x['numero'])
-    
     print(f"\n   Corregidos: {corregidos} himnos")
     print(f"   Con coro: {con_coro} himnos")
     print(f"   Total estrofas: {total_estrofas}")
     avg_estrofas = total_estrofas / len(himnos) if himnos else 0
     print(f"   Promedio estrofas: {avg_estrofas:.1f}")
     
-    print(f"\n3. Guardando en {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(himnos, f, ensure_ascii=False, indent=2)
+    # Solo se escriben los himnos corregidos
+    with catalogo.transaccion():
+        for himno in modificados:
+            catalogo.actualizar(himno['numero'], estrofas=himno['estrofas'],
+                                coro=himno.get('coro'))
     
-    import os
+    print(f"\n3. Guardando en {output_file}...")
+    if not catalogo.exportar_json(output_file):
+        print("   Sin cambios, se conserva")
     print(f"   Tamaño: {os.path.getsize(output_file) / 1024:.1f} KB")
     
     print("\n4. Mostrando ejemplos...")
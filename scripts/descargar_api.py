@@ -4,40 +4,58 @@ Fuente: API de jh0rman (https://sdah.my.to/hymn)
 Incluye: letras, estrofas y URLs de audio (cantado e instrumental)
 """
 
-import requests
+import argparse
 import json
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from catalogo import Catalogo
+from manifiesto import SYNC_DIR, Manifiesto, conditional_get
+from peticiones import Cliente
 
 API_BASE = "https://sdah.my.to"
+# Copia local de las respuestas, reutilizada cuando la API responde 304
+API_SYNC_DIR = SYNC_DIR / "api"
+
+# Concurrencia y tasa por defecto contra la API
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 10.0
+
+STATS_LOCK = threading.Lock()
 
-def get_all_hymns():
+def get_all_hymns(session, manifest):
     """Obtiene la lista completa de himnos con campos básicos"""
     print("   Obteniendo lista de himnos...")
     url = f"{API_BASE}/hymn"
-    response = requests.get(url, timeout=30)
-    if response.status_code == 200:
-        return response.json()
+    status, body, _ = conditional_get(session, url, manifest,
+                                      API_SYNC_DIR / "hymn.json", timeout=30)
+    if body is not None:
+        return json.loads(body)
     else:
-        print(f"   Error: {response.status_code}")
+        print(f"   Error: {status}")
         return []
 
-def get_hymn_details(number, retries=3):
-    """Obtiene los detalles completos de un himno (con estrofas)"""
+def get_hymn_details(session, manifest, number, stats=None):
+    """
+    Obtiene los detalles completos de un himno (con estrofas).
+    Los reintentos y límites de tasa los maneja el Cliente (peticiones.py).
+    """
     url = f"{API_BASE}/hymn/{number}"
     
-    for attempt in range(retries):
-        try:
-            response = requests.get(url, timeout=30)
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 404:
-                return None
-        except Exception as e:
-            if attempt < retries - 1:
-                time.sleep(1)
-            else:
-                print(f"   Error en himno {number}: {e}")
+    try:
+        status, body, cambiado = conditional_get(
+            session, url, manifest, API_SYNC_DIR / f"hymn_{number}.json", timeout=30)
+        if body is not None:
+            if stats is not None:
+                with STATS_LOCK:
+                    stats['cambiados' if cambiado else 'sin_cambios'] += 1
+            return json.loads(body)
+        elif status != 404:
+            print(f"   Error en himno {number}: status {status}")
+    except Exception as e:
+        print(f"   Error en himno {number}: {e}")
     return None
 
 def format_verses(hymn_data):
@@ -61,14 +79,53 @@ def format_verses(hymn_data):
     
     return estrofas, coro
 
+def build_himno(hymn_info, details):
+    """Arma el registro de un himno con los detalles, o con los datos básicos"""
+    if details:
+        estrofas, coro = format_verses(details)
+        
+        return {
+            "numero": hymn_info.get('number'),
+            "titulo": details.get('title', ''),
+            "estrofas": estrofas,
+            "coro": coro,
+            "mp3Cantado": details.get('mp3Url', ''),
+            "mp3Instrumental": details.get('mp3UrlInstr', ''),
+            "referenciaBiblica": details.get('bibleReference', '')
+        }
+    else:
+        # Usar datos básicos si no hay detalles
+        return {
+            "numero": hymn_info.get('number'),
+            "titulo": hymn_info.get('title', ''),
+            "estrofas": [],
+            "coro": None,
+            "mp3Cantado": hymn_info.get('mp3Url', ''),
+            "mp3Instrumental": hymn_info.get('mp3UrlInstr', ''),
+            "referenciaBiblica": hymn_info.get('bibleReference', '')
+        }
+
 def main():
+    parser = argparse.ArgumentParser(description="Descarga el himnario desde la API sdah.my.to")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="peticiones simultáneas como máximo (1 = secuencial)")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help="peticiones por segundo como máximo")
+    args = parser.parse_args()
+    workers = max(1, args.workers)
+    
     print("=" * 60)
     print("DESCARGANDO HIMNARIO ADVENTISTA COMPLETO (614 himnos)")
     print("Fuente: sdah.my.to API")
     print("=" * 60)
     
+    # Pool de conexiones, tasa máxima y concurrencia adaptativa (AIMD)
+    session = Cliente(max_por_host=workers, rate=args.rate)
+    manifest = Manifiesto()
+    stats = {'cambiados': 0, 'sin_cambios': 0}
+    
     print("\n1. Obteniendo lista de himnos desde la API...")
-    hymns_list = get_all_hymns()
+    hymns_list = get_all_hymns(session, manifest)
     
     if not hymns_list:
         print("   Error: No se pudo obtener la lista de himnos")
@@ -76,57 +133,47 @@ def main():
     
     print(f"   ✓ Encontrados {len(hymns_list)} himnos")
     
-    himnos = []
+    print(f"\n2. Descargando detalles de cada himno "
+          f"({workers} en paralelo, máx. {args.rate:g}/s)...")
+    inicio = time.monotonic()
     
-    print("\n2. Descargando detalles de cada himno...")
-    for i, hymn_info in enumerate(hymns_list, 1):
-        number = hymn_info.get('number')
-        
+    def fetch(hymn_info):
         # Obtener detalles completos con estrofas
-        details = get_hymn_details(number)
-        
-        if details:
-            estrofas, coro = format_verses(details)
-            
-            himno = {
-                "numero": number,
-                "titulo": details.get('title', ''),
-                "estrofas": estrofas,
-                "coro": coro,
-                "mp3Cantado": details.get('mp3Url', ''),
-                "mp3Instrumental": details.get('mp3UrlInstr', ''),
-                "referenciaBiblica": details.get('bibleReference', '')
-            }
-            himnos.append(himno)
-        else:
-            # Usar datos básicos si no hay detalles
-            himno = {
-                "numero": number,
-                "titulo": hymn_info.get('title', ''),
-                "estrofas": [],
-                "coro": None,
-                "mp3Cantado": hymn_info.get('mp3Url', ''),
-                "mp3Instrumental": hymn_info.get('mp3UrlInstr', ''),
-                "referenciaBiblica": hymn_info.get('bibleReference', '')
-            }
+        details = get_hymn_details(session, manifest, hymn_info.get('number'), stats=stats)
+        return build_himno(hymn_info, details)
+    
+    # map conserva el orden de la lista, así la salida es determinista
+    himnos = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for i, himno in enumerate(executor.map(fetch, hymns_list), 1):
             himnos.append(himno)
-        
-        if i % 50 == 0 or i == len(hymns_list):
-            print(f"   Progreso: {i}/{len(hymns_list)} himnos")
-        
-        # Pequeña pausa para no saturar la API
-        time.sleep(0.1)
+            if i % 50 == 0 or i == len(hymns_list):
+                print(f"   Progreso: {i}/{len(hymns_list)} himnos")
+    
+    print(f"   Tiempo: {time.monotonic() - inicio:.1f} s")
+    print(f"   Peticiones: {session.stats['peticiones']}, "
+          f"reintentos: {session.stats['reintentos']}, "
+          f"limitadas por el servidor: {session.stats['limitadas']}")
     
     # Ordenar por número
     himnos.sort(key=lambda x: x['numero'])
     
-    # Guardar JSON
+    manifest.save()
+    print(f"   Respuestas con cambios: {stats['cambiados']}, sin cambios: {stats['sin_cambios']}")
+    
+    # Actualizar solo los himnos que cambiaron; los campos que la API no
+    # trae (p. ej. stanza_timestamps) se conservan
     output_path = "assets/data/himnos.json"
-    print(f"\n3. Guardando en {output_path}...")
+    catalogo = Catalogo()
+    catalogo.sincronizar(output_path)
+    with catalogo.transaccion():
+        actualizados = sum(catalogo.fusionar(h) for h in himnos)
+    print(f"   Himnos actualizados en el catálogo: {actualizados}")
     
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(himnos, f, ensure_ascii=False, indent=2)
+    if catalogo.exportar_json(output_path):
+        print(f"\n3. Guardando en {output_path}...")
+    else:
+        print(f"\n3. {output_path} no cambió, se conserva")
     
     print(f"\n✓ ¡Completado!")
     print(f"  Total himnos: {len(himnos)}")
@@ -4,12 +4,20 @@ Descarga todos los archivos MP3 del Himnario Adventista para uso offline.
 Los guarda en assets/audio/cantado/ y assets/audio/instrumental/
 """
 
+import argparse
 import json
 import os
-import requests
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+from descargas import (CHUNK_SIZE, discard_part, expected_size, finalize, load_resume,
+                       range_complete, range_mismatch, range_stale, write_part)
+from manifiesto import Manifiesto, is_up_to_date
+from peticiones import Cliente, backoff_delay
+
 # Directorios de salida
 BASE_DIR = Path(__file__).parent.parent
 AUDIO_DIR = BASE_DIR / "assets" / "audio"
@@ -17,72 +25,244 @@ CANTADO_DIR = AUDIO_DIR / "cantado"
 INSTRUMENTAL_DIR = AUDIO_DIR / "instrumental"
 JSON_PATH = BASE_DIR / "assets" / "data" / "himnos.json"
 
+# Límites por defecto del modo paralelo
+DEFAULT_WORKERS = 8
+DEFAULT_POR_HOST = 4
+
+# Streaming: bytes inspeccionados para detectar MP3/HTML
+SNIFF_BYTES = 4096
+# Tope de lectura de una página HTML de confirmación
+MAX_HTML_BYTES = 256 * 1024
+
+CONFIRM_RE = re.compile(r'confirm=([0-9A-Za-z_\-]+)')
+CONFIRM_INPUT_RE = re.compile(r'name="confirm"\s+value="([^"]+)"')
+UUID_INPUT_RE = re.compile(r'name="uuid"\s+value="([^"]+)"')
+
 def create_directories():
     """Crear directorios para audio"""
     CANTADO_DIR.mkdir(parents=True, exist_ok=True)
     INSTRUMENTAL_DIR.mkdir(parents=True, exist_ok=True)
     print(f"Directorios creados: {AUDIO_DIR}")
 
-def download_file(url, filepath, max_retries=3):
-    """Descarga un archivo de Google Drive"""
+def read_head(chunks, size):
+    """Lee del iterador solo lo necesario para tener al menos `size` bytes"""
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= size:
+            break
+    return head
+
+def sniff(response):
+    """Retorna (chunks, head): el iterador de la respuesta y sus primeros bytes"""
+    if response.status_code not in (200, 206):
+        return iter(()), b''
+    chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+    return chunks, read_head(chunks, SNIFF_BYTES)
+
+def looks_like_mp3(head):
+    """Cabecera ID3 o sincronía de frame MPEG (11 bits en 1)"""
+    if head.startswith(b'ID3'):
+        return True
+    return len(head) >= 2 and head[0] == 0xFF and (head[1] & 0xE0) == 0xE0
+
+def is_html(response, head):
+    """La respuesta es una página HTML (error o confirmación de Drive)"""
+    if 'text/html' in response.headers.get('content-type', ''):
+        return True
+    return head.lstrip()[:15].lower().startswith((b'<!doctype html', b'<html'))
+
+def find_confirm_params(response, page):
+    """Busca el token de confirmación de Drive en las cookies o en la página"""
+    for name, value in response.cookies.items():
+        if name.startswith('download_warning'):
+            return {'confirm': value}
+    text = page.decode('utf-8', errors='ignore')
+    match = CONFIRM_RE.search(text) or CONFIRM_INPUT_RE.search(text)
+    if not match:
+        return None
+    params = {'confirm': match.group(1)}
+    uuid = UUID_INPUT_RE.search(text)
+    if uuid:
+        params['uuid'] = uuid.group(1)
+    return params
+
+def download_file(url, filepath, max_retries=3, manifest=None, cliente=None):
+    """
+    Descarga un archivo de Google Drive en streaming.
+    Solo se inspeccionan los primeros KB para distinguir el MP3 de la página
+    de confirmación; el resto va directo a disco por bloques, así que la
+    memoria usada no depende del tamaño del archivo.
+    Se escribe en `<archivo>.part` y, si se corta, se reanuda con Range.
+    Si se pasa `manifest`, la descarga queda registrada en él.
+    Los 429/403 por límite de tasa y los 5xx los reintenta el `cliente`.
+    """
     if not url or url.strip() == "":
         return False
     
     # Google Drive puede requerir confirmación para archivos grandes
-    session = requests.Session()
+    # (la cookie download_warning queda en la sesión del cliente)
+    session = cliente or Cliente()
     
     for attempt in range(max_retries):
         try:
-            response = session.get(url, stream=True, timeout=60)
+            offset, meta, headers = load_resume(filepath)
+            response = session.get(meta.get('url', url), headers=headers, stream=True, timeout=60)
+            chunks, head = sniff(response)
             
-            # Verificar si hay redirección o confirmación necesaria
-            if 'confirm=' in response.text[:1000]:
-                # Extraer token de confirmación
-                for line in response.text.split('\n'):
-                    if 'confirm=' in line:
-                        # Obtener el token
-                        token = line.split('confirm=')[1].split('"')[0] if 'confirm=' in line else None
-                        if token:
-                            url = url + f"&confirm={token}"
-                            response = session.get(url, stream=True, timeout=60)
-                            break
+            # Página de confirmación: leer a lo sumo MAX_HTML_BYTES y seguir el token
+            if response.status_code == 200 and not looks_like_mp3(head) and is_html(response, head):
+                page = head + read_head(chunks, MAX_HTML_BYTES - len(head))
+                params = find_confirm_params(response, page)
+                response.close()
+                if params:
+                    response = session.get(url, params=params, headers=headers, stream=True, timeout=60)
+                    chunks, head = sniff(response)
             
-            if response.status_code == 200:
-                content_type = response.headers.get('content-type', '')
-                # Verificar que es un archivo de audio, no HTML
-                if 'text/html' in content_type and len(response.content) < 50000:
-                    print(f"  ⚠️ Respuesta HTML en lugar de audio")
+            with response:
+                if range_complete(response, offset):
+                    if finalize(filepath):
+                        if manifest is not None:
+                            manifest.record(url, filepath, response)
+                        return True
                     return False
                 
-                with open(filepath, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                return True
-            else:
-                print(f"  ⚠️ Status {response.status_code}")
+                # El .part no corresponde a lo que tiene el servidor: de cero
+                if range_stale(response, offset) or range_mismatch(response, offset):
+                    print(f"  ↻ El .part no coincide con el servidor, se descarga de nuevo")
+                    discard_part(filepath)
+                    continue
+                
+                if response.status_code in (200, 206):
+                    # Verificar que es un archivo de audio, no HTML
+                    # (una continuación 206 no empieza con la cabecera del MP3)
+                    if response.status_code == 200 and not looks_like_mp3(head):
+                        if is_html(response, head):
+                            print(f"  ⚠️ Respuesta HTML en lugar de audio")
+                        else:
+                            print(f"  ⚠️ El contenido no parece MP3")
+                        return False
+                    
+                    if offset and response.status_code == 206:
+                        print(f"  ↻ Reanudando desde {offset / 1024 / 1024:.1f} MB")
+                    write_part(filepath, response, offset, chunks, head)
+                    if finalize(filepath, expected_size(response)):
+                        if manifest is not None:
+                            manifest.record(url, filepath, response)
+                        return True
+                    print(f"  ⚠️ Descarga incompleta, se reanudará")
+                else:
+                    print(f"  ⚠️ Status {response.status_code}")
                 
         except Exception as e:
             print(f"  ⚠️ Error intento {attempt + 1}: {e}")
-            time.sleep(2)
+            time.sleep(backoff_delay(attempt))
     
     return False
 
-def main():
-    print("=" * 60)
-    print("  HIMNARIO ADVENTISTA - Descarga de Audio Offline")
-    print("=" * 60)
-    
-    create_directories()
-    
-    # Cargar himnos
-    with open(JSON_PATH, 'r', encoding='utf-8') as f:
-        himnos = json.load(f)
-    
+class Progreso:
+    """Contadores compartidos entre hilos para mostrar el rendimiento global"""
+
+    def __init__(self, total):
+        self.total = total
+        self.completados = 0
+        self.descargados = 0
+        self.bytes = 0
+        self.inicio = time.monotonic()
+        self.lock = threading.Lock()
+
+    def registrar(self, descargado, size=0):
+        with self.lock:
+            self.completados += 1
+            if descargado:
+                self.descargados += 1
+                self.bytes += size
+
+    def resumen(self):
+        with self.lock:
+            elapsed = max(time.monotonic() - self.inicio, 1e-6)
+            return (f"{self.completados}/{self.total} | "
+                    f"{self.descargados / elapsed:.2f} archivos/s | "
+                    f"{self.bytes / elapsed / 1024 / 1024:.2f} MB/s")
+
+def build_tasks(himnos):
+    """Genera la lista de descargas (numero, tipo, url, filepath)"""
+    tasks = []
+    for himno in himnos:
+        numero = himno['numero']
+        tasks.append((numero, 'cantado', himno.get('mp3Cantado', ''),
+                      CANTADO_DIR / f"{numero}.mp3"))
+        tasks.append((numero, 'instrumental', himno.get('mp3Instrumental', ''),
+                      INSTRUMENTAL_DIR / f"{numero}.mp3"))
+    return tasks
+
+def download_parallel(himnos, cliente, workers=DEFAULT_WORKERS,
+                      manifest=None, actualizar=False):
+    """
+    Descarga los archivos con un pool de hilos.
+    `workers` limita las descargas simultáneas en total; el límite por
+    servidor lo lleva el `cliente` (máximo `max_por_host`, reducido de forma
+    adaptativa si el servidor responde 429/403). Con `actualizar`, los
+    archivos existentes se verifican con un GET condicional dentro del pool.
+    Retorna (cantado_ok, instrumental_ok, errores).
+    """
+    tasks = build_tasks(himnos)
+    ok = {'cantado': 0, 'instrumental': 0}
+    errores = []
+
+    # Saltar los que ya existen antes de ocupar un hilo
+    pendientes = []
+    for numero, tipo, url, filepath in tasks:
+        if filepath.exists() and not (actualizar and manifest is not None and
+                                      manifest.conditional_headers(url, filepath)):
+            ok[tipo] += 1
+        elif url:
+            pendientes.append((numero, tipo, url, filepath))
+
+    print(f"Ya existentes: {ok['cantado'] + ok['instrumental']}")
+    print(f"Pendientes: {len(pendientes)} "
+          f"(workers={workers}, por host={cliente.max_por_host})")
+
+    progreso = Progreso(len(pendientes))
+
+    def worker(numero, tipo, url, filepath):
+        with cliente.slot(url):
+            if is_up_to_date(url, filepath, manifest if actualizar else None, session=cliente):
+                progreso.registrar(False)
+                return 'sin_cambios'
+            exito = download_file(url, filepath, manifest=manifest, cliente=cliente)
+        size = filepath.stat().st_size if exito else 0
+        progreso.registrar(exito, size)
+        return exito
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(worker, numero, tipo, url, filepath): (numero, tipo)
+            for numero, tipo, url, filepath in pendientes
+        }
+        for future in as_completed(futures):
+            numero, tipo = futures[future]
+            try:
+                exito = future.result()
+            except Exception as e:
+                print(f"  ⚠️ Error himno {numero} {tipo}: {e}")
+                exito = False
+            if exito == 'sin_cambios':
+                ok[tipo] += 1
+                print(f"  = Himno {numero} {tipo} sin cambios | {progreso.resumen()}")
+            elif exito:
+                ok[tipo] += 1
+                print(f"  ✓ Himno {numero} {tipo} | {progreso.resumen()}")
+            else:
+                errores.append(f"Himno {numero} {tipo}")
+                print(f"  ✗ Himno {numero} {tipo} | {progreso.resumen()}")
+
+    return ok['cantado'], ok['instrumental'], errores
+
+def download_sequential(himnos, cliente, manifest=None, actualizar=False):
+    """Descarga los archivos uno por uno (modo original)"""
+    verificar = manifest if actualizar else None
     total = len(himnos)
-    print(f"\nTotal de himnos: {total}")
-    print(f"Archivos a descargar: {total * 2} (cantado + instrumental)")
-    print("-" * 60)
-    
     cantado_ok = 0
     instrumental_ok = 0
     errores = []
@@ -97,12 +277,12 @@ def main():
         url_cantado = himno.get('mp3Cantado', '')
         filepath_cantado = CANTADO_DIR / f"{numero}.mp3"
         
-        if filepath_cantado.exists():
+        if is_up_to_date(url_cantado, filepath_cantado, verificar, session=cliente):
             print(f"  ✓ Cantado ya existe")
             cantado_ok += 1
         elif url_cantado:
             print(f"  ⬇ Descargando cantado...")
-            if download_file(url_cantado, filepath_cantado):
+            if download_file(url_cantado, filepath_cantado, manifest=manifest, cliente=cliente):
                 print(f"  ✓ Cantado descargado")
                 cantado_ok += 1
             else:
@@ -113,20 +293,59 @@ def main():
         url_instrumental = himno.get('mp3Instrumental', '')
         filepath_instrumental = INSTRUMENTAL_DIR / f"{numero}.mp3"
         
-        if filepath_instrumental.exists():
+        if is_up_to_date(url_instrumental, filepath_instrumental, verificar, session=cliente):
             print(f"  ✓ Instrumental ya existe")
             instrumental_ok += 1
         elif url_instrumental:
             print(f"  ⬇ Descargando instrumental...")
-            if download_file(url_instrumental, filepath_instrumental):
+            if download_file(url_instrumental, filepath_instrumental, manifest=manifest,
+                             cliente=cliente):
                 print(f"  ✓ Instrumental descargado")
                 instrumental_ok += 1
             else:
                 print(f"  ✗ Error instrumental")
                 errores.append(f"Himno {numero} instrumental")
-        
-        # Pausa para no sobrecargar
-        time.sleep(0.5)
+
+    return cantado_ok, instrumental_ok, errores
+
+def main():
+    parser = argparse.ArgumentParser(description="Descarga el audio del himnario para uso offline")
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f"descargas simultáneas en total (1 = modo secuencial, "
+                             f"sugerido {DEFAULT_WORKERS})")
+    parser.add_argument('--por-host', type=int, default=DEFAULT_POR_HOST,
+                        help="descargas simultáneas máximas contra un mismo servidor")
+    parser.add_argument('--actualizar', action='store_true',
+                        help="verificar los archivos existentes con peticiones condicionales "
+                             "(ETag/Last-Modified) y bajar solo los que cambiaron")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  HIMNARIO ADVENTISTA - Descarga de Audio Offline")
+    print("=" * 60)
+    
+    create_directories()
+    
+    # Cargar himnos
+    with open(JSON_PATH, 'r', encoding='utf-8') as f:
+        himnos = json.load(f)
+    
+    total = len(himnos)
+    print(f"\nTotal de himnos: {total}")
+    print(f"Archivos a descargar: {total * 2} (cantado + instrumental)")
+    print("-" * 60)
+    
+    manifest = Manifiesto()
+    cliente = Cliente(max_por_host=max(1, args.por_host))
+    inicio = time.monotonic()
+    if args.workers > 1:
+        cantado_ok, instrumental_ok, errores = download_parallel(
+            himnos, cliente, workers=args.workers,
+            manifest=manifest, actualizar=args.actualizar)
+    else:
+        cantado_ok, instrumental_ok, errores = download_sequential(
+            himnos, cliente, manifest=manifest, actualizar=args.actualizar)
+    manifest.save()
     
     print("\n" + "=" * 60)
     print("  RESUMEN")
@@ -134,6 +353,9 @@ def main():
     print(f"  Cantados descargados: {cantado_ok}/{total}")
     print(f"  Instrumentales descargados: {instrumental_ok}/{total}")
     print(f"  Errores: {len(errores)}")
+    print(f"  Tiempo total: {time.monotonic() - inicio:.1f} s")
+    print(f"  Reintentos: {cliente.stats['reintentos']}, "
+          f"limitadas por el servidor: {cliente.stats['limitadas']}")
     
     if errores:
         print("\n  Archivos con error:")
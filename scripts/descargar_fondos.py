@@ -10,11 +10,15 @@ INSTRUCCIONES:
 2. python descargar_fondos.py
 """
 
-import requests
+import argparse
 import os
-import time
 from pathlib import Path
 
+from descargas import (CHUNK_SIZE, discard_part, expected_size, finalize, load_resume,
+                       range_complete, range_mismatch, range_stale, write_part)
+from manifiesto import Manifiesto, is_up_to_date
+from peticiones import Cliente
+
 # Configuración
 BASE_DIR = Path(__file__).parent.parent
 OUTPUT_DIR = BASE_DIR / "assets" / "backgrounds"
@@ -23,6 +27,9 @@ IMAGE_SIZE = "1920x1080"
 # API de Unsplash (source.unsplash.com no requiere API key)
 UNSPLASH_URL = "https://source.unsplash.com/{size}/?{query}"
 
+# Sin pausas fijas: el cliente espera solo cuando Unsplash lo pide (429/Retry-After)
+CLIENTE = Cliente(max_por_host=1)
+
 # Categorías y términos de búsqueda
 CATEGORIAS = {
     "adoracion": [
@@ -151,26 +158,55 @@ def create_directories():
         path.mkdir(parents=True, exist_ok=True)
     print(f"✓ Directorios creados en: {OUTPUT_DIR}")
 
-def download_image(query, output_path):
-    """Descargar imagen de Unsplash"""
+def image_url(query):
+    """URL de búsqueda de Unsplash (también es la clave en el manifiesto)"""
+    return UNSPLASH_URL.format(size=IMAGE_SIZE, query=query)
+
+def download_image(query, output_path, manifest=None):
+    """
+    Descargar imagen de Unsplash.
+    Se escribe en `<imagen>.part`; si quedó a medias se pide el resto a la
+    misma URL final (Unsplash redirige a una foto aleatoria) con Range.
+    """
     try:
-        url = UNSPLASH_URL.format(size=IMAGE_SIZE, query=query)
-        response = requests.get(url, timeout=30)
+        offset, meta, headers = load_resume(output_path)
+        url = meta.get('url') or image_url(query)
         
-        if response.status_code == 200:
-            with open(output_path, 'wb') as f:
-                f.write(response.content)
-            return True
-        else:
-            print(f"  ✗ Error HTTP {response.status_code}")
+        with CLIENTE.get(url, headers=headers, stream=True, timeout=30) as response:
+            if range_complete(response, offset):
+                completo = finalize(output_path)
+            elif offset and (range_stale(response, offset) or
+                             range_mismatch(response, offset)):
+                # El .part no corresponde a lo que tiene el servidor: de cero
+                discard_part(output_path)
+                completo = None
+            elif response.status_code in (200, 206):
+                write_part(output_path, response, offset,
+                           response.iter_content(chunk_size=CHUNK_SIZE))
+                completo = finalize(output_path, expected_size(response))
+            else:
+                print(f"  ✗ Error HTTP {response.status_code}")
+                return False
+            
+            if completo is None:
+                print(f"  ↻ El .part no coincide con el servidor, se descarga de nuevo")
+                return download_image(query, output_path, manifest)
+            if completo:
+                if manifest is not None:
+                    manifest.record(image_url(query), output_path, response)
+                return True
+            print(f"  ✗ Descarga incompleta, se reanudará")
             return False
             
     except Exception as e:
         print(f"  ✗ Error: {e}")
         return False
 
-def download_category(categoria, queries):
-    """Descargar todas las imágenes de una categoría"""
+def download_category(categoria, queries, manifest=None, actualizar=False):
+    """
+    Descargar todas las imágenes de una categoría.
+    Con `actualizar`, las existentes se verifican con un GET condicional.
+    """
     print(f"\n📁 Categoría: {categoria.upper()}")
     
     exitosos = 0
@@ -178,24 +214,28 @@ def download_category(categoria, queries):
         filename = f"{categoria}_{idx}.jpg"
         output_path = OUTPUT_DIR / categoria / filename
         
-        # Si ya existe, saltar
-        if output_path.exists():
+        # Si ya existe (y no cambió), saltar
+        if is_up_to_date(image_url(query), output_path,
+                         manifest if actualizar else None, session=CLIENTE, timeout=30):
             print(f"  ⊘ Ya existe: {filename}")
             exitosos += 1
             continue
         
         print(f"  ⬇ Descargando: {filename}")
-        if download_image(query, output_path):
+        if download_image(query, output_path, manifest=manifest):
             print(f"  ✓ Guardado: {filename}")
             exitosos += 1
-        
-        # Pausa para no sobrecargar
-        time.sleep(1.5)
     
     print(f"  ✓ {exitosos}/{len(queries)} listas")
     return exitosos
 
 def main():
+    parser = argparse.ArgumentParser(description="Descarga los fondos del himnario")
+    parser.add_argument('--actualizar', action='store_true',
+                        help="verificar las imágenes existentes con peticiones condicionales "
+                             "(ETag/Last-Modified) y bajar solo las que cambiaron")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("DESCARGADOR DE FONDOS - HIMNARIO ADVENTISTA")
     print("=" * 60)
@@ -206,10 +246,12 @@ def main():
     
     create_directories()
     
+    manifest = Manifiesto()
     total_exitosos = 0
     for categoria, queries in CATEGORIAS.items():
-        exitosos = download_category(categoria, queries)
+        exitosos = download_category(categoria, queries, manifest, args.actualizar)
         total_exitosos += exitosos
+    manifest.save()
     
     print("\n" + "=" * 60)
     print("RESUMEN")
@@ -2,46 +2,100 @@
 Script para descargar los 614 himnos del Himnario Adventista
 Fuente: GitHub Claudio-Osorio/himnario-adventista
 Versión 3: Parseo mejorado - usando lista inicial + parseo correcto de estrofas
+
+Por defecto descarga el repositorio completo en una sola petición (tarball) y
+extrae los .txt en memoria; `--modo contents` usa la API de contenidos
+archivo por archivo como antes.
 """
 
+import argparse
 import requests
 import json
 import re
 import os
-import time
+import tarfile
+
+from parser_letras import parse_hymn
+from peticiones import Cliente
+
+REPO_API = "https://api.github.com/repos/Claudio-Osorio/himnario-adventista"
+
+# Reintentos, Retry-After y X-RateLimit-* de GitHub los maneja el cliente
+CLIENTE = Cliente()
 
 def get_file_list():
     """Obtiene la lista de archivos del repositorio (solo primera página)"""
-    url = "https://api.github.com/repos/Claudio-Osorio/himnario-adventista/contents"
-    response = requests.get(url)
+    url = f"{REPO_API}/contents"
+    response = CLIENTE.get(url, timeout=30)
     if response.status_code == 200:
         return response.json()
     else:
         print(f"Error: {response.status_code}")
         return []
 
-def download_hymn(file_info, retries=3):
-    """Descarga el contenido de un himno con reintentos"""
+def download_hymn(file_info):
+    """
+    Descarga el contenido de un himno. Ante un límite de tasa el cliente
+    espera lo que indica GitHub (Retry-After / X-RateLimit-Reset) y reintenta.
+    """
     download_url = file_info.get('download_url')
     if not download_url:
         return None
     
-    for attempt in range(retries):
-        try:
-            response = requests.get(download_url, timeout=30)
-            response.encoding = 'utf-8'
-            if response.status_code == 200:
-                return response.text
-            elif response.status_code == 403:
-                print(f"   Rate limit, esperando...")
-                time.sleep(60)
-        except Exception as e:
-            if attempt < retries - 1:
-                time.sleep(2)
-            else:
-                print(f"Error descargando {file_info['name']}: {e}")
+    try:
+        response = CLIENTE.get(download_url, timeout=30)
+        response.encoding = 'utf-8'
+        if response.status_code == 200:
+            return response.text
+        print(f"Error descargando {file_info['name']}: status {response.status_code}")
+    except Exception as e:
+        print(f"Error descargando {file_info['name']}: {e}")
     return None
 
+def iter_tarball_hymns():
+    """
+    Descarga el repositorio completo como tarball en una sola petición y
+    produce (nombre, contenido) de cada .txt de la raíz a medida que se
+    extrae del stream, sin escribir nada a disco.
+    """
+    url = f"{REPO_API}/tarball"
+    try:
+        with CLIENTE.get(url, stream=True, cachear=True, timeout=60) as response:
+            if response.status_code != 200:
+                print(f"Error: {response.status_code}")
+                return
+            response.raw.decode_content = True
+            # 'r|gz' lee el tar secuencialmente, sin necesidad de seek
+            with tarfile.open(fileobj=response.raw, mode='r|gz') as tar:
+                for member in tar:
+                    # Los miembros vienen como "<owner>-<repo>-<sha>/<archivo>"
+                    if not member.isfile() or member.name.count('/') != 1:
+                        continue
+                    filename = member.name.split('/', 1)[1]
+                    if not filename.endswith('.txt'):
+                        continue
+                    data = tar.extractfile(member).read()
+                    yield filename, data.decode('utf-8', errors='replace')
+    except (requests.RequestException, tarfile.TarError) as e:
+        print(f"Error descargando el tarball: {e}")
+
+def iter_contents_hymns():
+    """Produce (nombre, contenido) descargando cada .txt por separado"""
+    files = get_file_list()
+    
+    if not files:
+        print("No se pudieron obtener los archivos")
+        return
+    
+    # Filtrar solo archivos .txt
+    txt_files = [f for f in files if f['name'].endswith('.txt')]
+    print(f"   Encontrados {len(txt_files)} archivos de himnos")
+    
+    for file_info in txt_files:
+        content = download_hymn(file_info)
+        if content:
+            yield file_info['name'], content
+
 def parse_hymn_filename(filename):
     """Parsea el nombre del archivo para obtener número y título"""
     # Formato: "1 - Himno #1 Cantad alegres al Señor.txt"
@@ -60,110 +114,51 @@ def parse_lyrics(content):
     - Número de estrofa solo en una línea (1, 2, 3, etc.)
     - Texto de la estrofa
     - Coro marcado con "Coro:" o "Coro"
+    El parseo lo hace parser_letras (compartido con corregir_estrofas.py).
     """
-    lines = content.strip().replace('\r\n', '\n').replace('\r', '\n').split('\n')
-    
-    estrofas = []
-    coro = None
-    current_section = []
-    in_coro = False
-    
-    # Saltar línea de título
-    start_idx = 0
-    for i, line in enumerate(lines):
-        if line.strip().startswith('Himno #'):
-            start_idx = i + 1
-            break
-    
-    for line in lines[start_idx:]:
-        stripped = line.strip()
-        
-        # Detectar número de estrofa (un número solo, con espacios opcionales)
-        if re.match(r'^\s*\d+\s*$', stripped):
-            # Guardar sección anterior si existe
-            if current_section:
-                section_text = '\n'.join(current_section).strip()
-                if section_text:
-                    if in_coro:
-                        coro = section_text
-                    else:
-                        estrofas.append(section_text)
-            current_section = []
-            in_coro = False
-            continue
-        
-        # Detectar coro
-        if stripped.lower().startswith('coro:') or stripped.lower() == 'coro':
-            # Guardar sección anterior
-            if current_section:
-                section_text = '\n'.join(current_section).strip()
-                if section_text:
-                    estrofas.append(section_text)
-            current_section = []
-            in_coro = True
-            # Si el coro tiene texto después de "Coro:"
-            if ':' in stripped:
-                resto = stripped.split(':', 1)[1].strip()
-                if resto:
-                    current_section.append(resto)
-            continue
-        
-        # Agregar línea a la sección actual
-        if stripped:
-            current_section.append(stripped)
-    
-    # Guardar última sección
-    if current_section:
-        section_text = '\n'.join(current_section).strip()
-        if section_text:
-            if in_coro:
-                coro = section_text
-            else:
-                estrofas.append(section_text)
-    
-    return estrofas, coro
+    return parse_hymn(content)
 
 def main():
+    parser = argparse.ArgumentParser(description="Descarga las letras desde GitHub")
+    parser.add_argument('--modo', choices=['tarball', 'contents'], default='tarball',
+                        help="tarball: todo el repositorio en una petición (por defecto); "
+                             "contents: un archivo por petición")
+    args = parser.parse_args()
+    
     print("=" * 50)
     print("DESCARGANDO HIMNARIO ADVENTISTA (614 himnos)")
     print("Versión 3: Parseo mejorado de estrofas")
     print("=" * 50)
     
-    print("\n1. Obteniendo lista de archivos...")
-    files = get_file_list()
-    
-    if not files:
-        print("No se pudieron obtener los archivos")
-        return
-    
-    # Filtrar solo archivos .txt
-    txt_files = [f for f in files if f['name'].endswith('.txt')]
-    print(f"   Encontrados {len(txt_files)} archivos de himnos")
+    if args.modo == 'tarball':
+        print("\n1. Descargando el repositorio completo (tarball)...")
+        fuente = iter_tarball_hymns()
+    else:
+        print("\n1. Obteniendo lista de archivos...")
+        fuente = iter_contents_hymns()
     
     himnos = []
     
     print("\n2. Descargando y procesando himnos...")
-    for i, file_info in enumerate(txt_files, 1):
-        content = download_hymn(file_info)
-        if content:
-            numero, titulo = parse_hymn_filename(file_info['name'])
-            if numero:
-                estrofas, coro = parse_lyrics(content)
-                
-                himno = {
-                    "numero": numero,
-                    "titulo": titulo,
-                    "estrofas": estrofas,
-                    "coro": coro
-                }
-                himnos.append(himno)
-                
-                if i % 50 == 0 or i == len(txt_files):
-                    print(f"   Progreso: {i}/{len(txt_files)} himnos")
+    for i, (filename, content) in enumerate(fuente, 1):
+        numero, titulo = parse_hymn_filename(filename)
+        if numero:
+            estrofas, coro = parse_lyrics(content)
+            
+            himno = {
+                "numero": numero,
+                "titulo": titulo,
+                "estrofas": estrofas,
+                "coro": coro
+            }
+            himnos.append(himno)
         
-        # Pequeña pausa para evitar rate limit
-        if i % 100 == 0:
-            time.sleep(1)
+        if i % 50 == 0:
+            print(f"   Progreso: {i} himnos")
+    
+    if not himnos:
+        print("No se pudieron obtener los himnos")
+        return
     
     # Ordenar por número
     himnos.sort(key=lambda x: x['numero'])
@@ -0,0 +1,145 @@
+"""
+Utilidades compartidas por los scripts de descarga.
+
+Descargas reanudables: el contenido se escribe en un archivo `.part` junto
+al destino y solo se mueve (de forma atómica) a la ruta final cuando está
+completo. Si la descarga se corta, el siguiente intento pide el resto con
+una cabecera Range en lugar de empezar desde cero. Si el servidor indica
+que el `.part` ya no corresponde al recurso (416 con otro tamaño, o un 206
+que no continúa desde el final del `.part`), se descarta y se empieza de
+nuevo.
+"""
+
+import json
+import os
+import re
+
+PART_SUFFIX = ".part"
+CHUNK_SIZE = 64 * 1024
+
+CONTENT_RANGE_RE = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+CONTENT_RANGE_TOTAL_RE = re.compile(r'bytes\s+\*/(\d+)')
+
+def part_path(filepath):
+    """Ruta del archivo temporal de una descarga"""
+    return filepath.with_name(filepath.name + PART_SUFFIX)
+
+def meta_path(filepath):
+    """Ruta de los metadatos de reanudación (URL final y validadores)"""
+    return filepath.with_name(filepath.name + PART_SUFFIX + ".json")
+
+def load_resume(filepath):
+    """
+    Retorna (offset, meta, headers) para continuar una descarga.
+    `meta` guarda la URL final y el ETag/Last-Modified de la respuesta
+    original; `headers` incluye Range e If-Range cuando hay bytes previos.
+    """
+    part = part_path(filepath)
+    offset = part.stat().st_size if part.exists() else 0
+    meta = {}
+    if offset and meta_path(filepath).exists():
+        try:
+            with open(meta_path(filepath), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+
+    headers = {}
+    if offset:
+        headers['Range'] = f"bytes={offset}-"
+        # Si el recurso cambió, el servidor devuelve 200 con el archivo completo
+        validator = meta.get('etag') or meta.get('last_modified')
+        if validator:
+            headers['If-Range'] = validator
+    return offset, meta, headers
+
+def save_resume_meta(filepath, response):
+    """Guarda la URL final y los validadores para una futura reanudación"""
+    meta = {
+        'url': response.url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+    with open(meta_path(filepath), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+def expected_size(response):
+    """Tamaño total del recurso según Content-Range o Content-Length"""
+    if response.status_code == 206:
+        match = CONTENT_RANGE_RE.search(response.headers.get('Content-Range', ''))
+        if match and match.group(3) != '*':
+            return int(match.group(3))
+        return None
+    length = response.headers.get('Content-Length')
+    # Con compresión, Content-Length no corresponde a los bytes en disco
+    if length and not response.headers.get('Content-Encoding'):
+        return int(length)
+    return None
+
+def range_complete(response, offset):
+    """Un 416 con 'bytes */N' y N == offset indica que el .part ya está completo"""
+    if response.status_code != 416 or not offset:
+        return False
+    match = CONTENT_RANGE_TOTAL_RE.search(response.headers.get('Content-Range', ''))
+    return bool(match) and int(match.group(1)) == offset
+
+def range_stale(response, offset):
+    """
+    Un 416 cuyo total no coincide con el `.part`: el recurso cambió o se
+    achicó, y reanudar ese `.part` fallaría siempre.
+    """
+    return response.status_code == 416 and bool(offset) and not range_complete(response, offset)
+
+def is_resumed(response, offset):
+    """El servidor respetó el Range y envía la continuación exacta"""
+    if response.status_code != 206 or not offset:
+        return False
+    match = CONTENT_RANGE_RE.search(response.headers.get('Content-Range', ''))
+    return bool(match) and int(match.group(1)) == offset
+
+def range_mismatch(response, offset):
+    """Un 206 que no empieza en `offset`: no se puede añadir ni tomar como el archivo"""
+    if response.status_code != 206:
+        return False
+    match = CONTENT_RANGE_RE.search(response.headers.get('Content-Range', ''))
+    return not match or int(match.group(1)) != offset
+
+def discard_part(filepath):
+    """Borra el `.part` y sus metadatos para que el próximo intento empiece de cero"""
+    for path in (part_path(filepath), meta_path(filepath)):
+        if path.exists():
+            path.unlink()
+
+def write_part(filepath, response, offset, chunks, head=b''):
+    """
+    Escribe el cuerpo de la respuesta en el `.part`, añadiendo al final si el
+    servidor respondió 206 desde `offset` o reescribiendo si envió todo (200).
+    Cualquier otro 206 es un error: hay que llamar antes a `range_mismatch`.
+    """
+    if range_mismatch(response, offset):
+        raise ValueError(f"Content-Range no continúa desde el byte {offset}")
+    save_resume_meta(filepath, response)
+    mode = 'ab' if is_resumed(response, offset) else 'wb'
+    with open(part_path(filepath), mode) as f:
+        if head:
+            f.write(head)
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+
+def finalize(filepath, expected=None):
+    """
+    Mueve el `.part` a su ruta final si tiene el tamaño esperado.
+    Si está incompleto lo deja en disco para reanudarlo y retorna False.
+    """
+    part = part_path(filepath)
+    if not part.exists():
+        return False
+    if expected is not None and part.stat().st_size != expected:
+        return False
+    os.replace(part, filepath)
+    meta = meta_path(filepath)
+    if meta.exists():
+        meta.unlink()
+    return True
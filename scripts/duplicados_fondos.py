@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Detecta fondos duplicados o casi idénticos con hashes perceptuales.
+
+descargar_fondos.py baja resultados aleatorios para búsquedas que se
+solapan entre categorías, así que la misma foto (o un recorte casi igual)
+puede quedar dos veces en el bundle. Para cada imagen de
+assets/backgrounds/ se calculan dos hashes de 64 bits:
+
+- dHash: signo del gradiente horizontal en una grilla de 9x8.
+- pHash: signo de los 8x8 coeficientes bajos de la DCT de 32x32 respecto
+  de su mediana.
+
+Las imágenes se reducen y apilan en un arreglo de NumPy y ambos hashes se
+calculan en lote. Se guardan por sha256 en .sync/fondos_hashes.json, así que
+en una actualización solo se decodifican las imágenes nuevas. Las
+distancias de Hamming se calculan con XOR y una tabla de popcount por byte,
+por bloques.
+
+Dos imágenes son casi duplicadas si ambas distancias están dentro del
+umbral. Con --colapsar se borra de cada grupo todo menos la imagen de mayor
+resolución.
+
+USO:
+    python scripts/duplicados_fondos.py
+    python scripts/duplicados_fondos.py --umbral 6 --colapsar
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from manifiesto import BASE_DIR, SYNC_DIR, sha256_file
+from procesar_fondos import list_sources
+
+CACHE_PATH = SYNC_DIR / "fondos_hashes.json"
+DART_PATH = BASE_DIR / "lib" / "utils" / "background_manager.dart"
+
+# Bits distintos (de 64) hasta los que dos imágenes se consideran iguales
+DEFAULT_UMBRAL = 8
+LADO_DCT = 32
+LADO_HASH = 8
+# Filas de la matriz de distancias que se calculan a la vez
+BLOQUE = 1024
+
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def dct_matrix(n=LADO_DCT):
+    """Matriz de la DCT-II ortonormal de n puntos"""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    m[0] /= np.sqrt(2)
+    return m
+
+def load_gray(fuentes, lado=LADO_DCT):
+    """Arreglo (N, lado, lado) float de las imágenes en escala de grises"""
+    lote = np.empty((len(fuentes), lado, lado), dtype=np.float64)
+    for i, fuente in enumerate(fuentes):
+        with Image.open(fuente) as original:
+            original.draft('L', (lado * 4, lado * 4))
+            imagen = ImageOps.exif_transpose(original).convert('L')
+            lote[i] = np.asarray(imagen.resize((lado, lado), Image.BOX))
+    return lote
+
+def pack_bits(bits):
+    """(N, 64) bool → (N,) uint64, bit más significativo primero"""
+    return np.packbits(bits, axis=1).view('>u8').ravel().astype(np.uint64)
+
+def dhash(lote):
+    """dHash de 64 bits de un lote (N, h, w) en escala de grises"""
+    n, alto, ancho = lote.shape
+    # Promedio por celdas de una grilla de 9x8
+    filas = np.array_split(np.arange(alto), LADO_HASH)
+    columnas = np.array_split(np.arange(ancho), LADO_HASH + 1)
+    celdas = np.stack([np.stack([lote[:, f][:, :, c].mean(axis=(1, 2)) for c in columnas], axis=1)
+                       for f in filas], axis=1)
+    return pack_bits((celdas[:, :, 1:] > celdas[:, :, :-1]).reshape(n, -1))
+
+def phash(lote):
+    """pHash de 64 bits de un lote (N, 32, 32) en escala de grises"""
+    m = dct_matrix(lote.shape[1])
+    coeficientes = np.einsum('ih,nhw,jw->nij', m, lote, m)[:, :LADO_HASH, :LADO_HASH]
+    planos = coeficientes.reshape(len(lote), -1)
+    # El coeficiente DC no entra en la mediana: solo refleja el brillo medio
+    medianas = np.median(planos[:, 1:], axis=1, keepdims=True)
+    return pack_bits(planos > medianas)
+
+def hamming(a, b):
+    """Distancias de Hamming entre cada hash de `a` (M,) y de `b` (N,): (M, N)"""
+    xor = np.bitwise_xor(a[:, None], b[None, :])
+    return POPCOUNT[xor.view(np.uint8)].reshape(*xor.shape, 8).sum(axis=2, dtype=np.uint8)
+
+class IndiceHamming:
+    """Hashes dHash y pHash de un conjunto de imágenes, con búsqueda por distancia"""
+
+    def __init__(self, claves, dhashes, phashes):
+        self.claves = list(claves)
+        self.dhashes = np.asarray(dhashes, dtype=np.uint64)
+        self.phashes = np.asarray(phashes, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.claves)
+
+    def cercanos(self, dh, ph, umbral=DEFAULT_UMBRAL):
+        """[(clave, distancia dHash, distancia pHash)] dentro del umbral"""
+        d = hamming(np.array([dh], dtype=np.uint64), self.dhashes)[0]
+        p = hamming(np.array([ph], dtype=np.uint64), self.phashes)[0]
+        return [(self.claves[i], int(d[i]), int(p[i]))
+                for i in np.flatnonzero((d <= umbral) & (p <= umbral))]
+
+    def pares(self, umbral=DEFAULT_UMBRAL):
+        """[(i, j, distancia dHash, distancia pHash)] con i < j dentro del umbral"""
+        pares = []
+        for inicio in range(0, len(self), BLOQUE):
+            fin = min(inicio + BLOQUE, len(self))
+            d = hamming(self.dhashes[inicio:fin], self.dhashes)
+            p = hamming(self.phashes[inicio:fin], self.phashes)
+            filas, columnas = np.nonzero((d <= umbral) & (p <= umbral))
+            for f, j in zip(filas, columnas):
+                i = inicio + f
+                if i < j:
+                    pares.append((i, int(j), int(d[f, j]), int(p[f, j])))
+        return pares
+
+def group_pairs(n, pares):
+    """Grupos (componentes conexas) de índices unidos por los pares"""
+    padre = list(range(n))
+
+    def raiz(i):
+        while padre[i] != i:
+            padre[i] = padre[padre[i]]
+            i = padre[i]
+        return i
+
+    for i, j, *_ in pares:
+        padre[raiz(i)] = raiz(j)
+    grupos = {}
+    for i in range(n):
+        grupos.setdefault(raiz(i), []).append(i)
+    return [g for g in grupos.values() if len(g) > 1]
+
+def load_cache(path=CACHE_PATH):
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_cache(cache, path=CACHE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def build_index(fuentes, cache):
+    """
+    Retorna (IndiceHamming, cantidad decodificada). Solo se decodifican las
+    imágenes cuyo sha256 no está en la caché; la caché se actualiza en su lugar.
+    """
+    claves = [f.relative_to(BASE_DIR).as_posix() for f in fuentes]
+    shas = [sha256_file(f) for f in fuentes]
+    pendientes = [i for i, sha in enumerate(shas) if sha not in cache]
+    if pendientes:
+        lote = load_gray([fuentes[i] for i in pendientes])
+        for i, dh, ph in zip(pendientes, dhash(lote), phash(lote)):
+            cache[shas[i]] = {'dhash': f"{int(dh):016x}", 'phash': f"{int(ph):016x}"}
+    vigentes = set(shas)
+    for sha in [s for s in cache if s not in vigentes]:
+        del cache[sha]
+    indice = IndiceHamming(claves,
+                           [int(cache[s]['dhash'], 16) for s in shas],
+                           [int(cache[s]['phash'], 16) for s in shas])
+    return indice, len(pendientes)
+
+def pixel_count(path):
+    with Image.open(path) as imagen:
+        return imagen.size[0] * imagen.size[1]
+
+def dart_references(claves, path=DART_PATH):
+    """Claves que aparecen literalmente en background_manager.dart"""
+    if not path.exists():
+        return []
+    texto = path.read_text(encoding='utf-8')
+    return [c for c in claves if f"'{c}'" in texto]
+
+def main():
+    parser = argparse.ArgumentParser(description="Fondos duplicados por hash perceptual")
+    parser.add_argument('--umbral', type=int, default=DEFAULT_UMBRAL,
+                        help=f"bits distintos tolerados (default {DEFAULT_UMBRAL})")
+    parser.add_argument('--colapsar', action='store_true',
+                        help="borrar los duplicados, dejando la imagen de mayor resolución")
+    parser.add_argument('--forzar', action='store_true', help="ignorar la caché")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("DUPLICADOS EN FONDOS")
+    print("=" * 60)
+
+    fuentes = [f for _, f in list_sources()]
+    cache = {} if args.forzar else load_cache()
+    inicio = time.perf_counter()
+    indice, decodificadas = build_index(fuentes, cache)
+    save_cache(cache)
+    grupos = group_pairs(len(indice), indice.pares(args.umbral))
+    print(f"\n   {len(indice)} imágenes ({decodificadas} decodificadas) en "
+          f"{(time.perf_counter() - inicio) * 1000:.0f} ms, umbral {args.umbral} bits")
+
+    if not grupos:
+        print("   ✓ Sin duplicados")
+        return
+
+    sobrantes = []
+    for grupo in grupos:
+        # Se conserva la de mayor resolución; a igualdad, la primera
+        orden = sorted(grupo, key=lambda i: (-pixel_count(fuentes[i]), i))
+        print(f"\n   ⚠️  Grupo de {len(grupo)}:")
+        print(f"      = {indice.claves[orden[0]]}")
+        for i in orden[1:]:
+            d = hamming(indice.dhashes[[orden[0]]], indice.dhashes[[i]])[0, 0]
+            p = hamming(indice.phashes[[orden[0]]], indice.phashes[[i]])[0, 0]
+            print(f"      - {indice.claves[i]}  (dHash {d}, pHash {p})")
+            sobrantes.append(i)
+
+    tamaño = sum(fuentes[i].stat().st_size for i in sobrantes)
+    print(f"\n📊 {len(sobrantes)} duplicados, {tamaño / 1024:.0f} KB recuperables")
+
+    if not args.colapsar:
+        print("   Usa --colapsar para borrarlos")
+        return
+
+    for i in sobrantes:
+        fuentes[i].unlink()
+        print(f"   🗑 {indice.claves[i]}")
+    referencias = dart_references([indice.claves[i] for i in sobrantes])
+    if referencias:
+        print(f"\n⚠️  Siguen referenciados en {DART_PATH.relative_to(BASE_DIR)}:")
+        for clave in referencias:
+            print(f"      {clave}")
+    print("\n   Vuelve a correr el pipeline para reclasificar temas y regenerar variantes")
+
+if __name__ == "__main__":
+    main()
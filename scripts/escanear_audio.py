@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Escanea los MP3 locales sin decodificarlos: duración, bitrate, frecuencia de
+muestreo y validez de cada archivo, guardados en la tabla audio del catálogo.
+
+descargar_audio.py solo revisa los primeros KB de la descarga; un archivo
+truncado, relleno con ceros o que en realidad es HTML queda en disco sin que
+nada lo note. Este script abre cada archivo de assets/audio/** con mmap y lee
+solo cabeceras:
+
+- Etiquetas ID3v2 al inicio (se saltan por su tamaño), ID3v1 y APEv2 al final.
+- El primer frame MPEG, confirmado con el siguiente (misma versión, capa y
+  frecuencia), para no tomar por sincronía un 0xFFE dentro de la etiqueta.
+- Cabecera Xing/Info o VBRI del primer frame: cantidad de frames y bytes,
+  de donde sale la duración exacta en VBR. Sin ellas se asume CBR.
+- Algunos sondeos repartidos por el archivo y el último frame: si en algún
+  punto no hay una cadena de frames válidos, o el último frame se sale del
+  archivo, el MP3 está dañado o truncado.
+
+Los archivos cuyo tamaño y mtime no cambiaron desde el último escaneo no se
+vuelven a abrir. Los escaneos corren en un pool de procesos.
+
+USO:
+    python scripts/escanear_audio.py
+    python scripts/escanear_audio.py --forzar
+    python scripts/escanear_audio.py --borrar    # borra los inválidos para re-descargarlos
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from catalogo import BASE_DIR, abrir
+
+AUDIO_DIR = BASE_DIR / "assets" / "audio"
+TIPOS = ('cantado', 'instrumental')
+
+# Bytes después de las etiquetas en los que se busca el primer frame
+MAX_BUSQUEDA = 64 * 1024
+# Puntos intermedios del archivo donde se verifica que sigue habiendo frames
+SONDEOS = 8
+# Frames consecutivos que tiene que haber en cada sondeo
+CADENA = 3
+# Frame más largo posible (MPEG-1 capa II, 384 kbps, 32 kHz, con padding)
+MAX_FRAME = 1729
+# Bytes al final desde donde se recorren los últimos frames
+COLA = 8 * 1024
+# Diferencia tolerada entre los bytes que declara Xing/VBRI y los del archivo
+TOLERANCIA_BYTES = 0.02
+MIN_DURACION_S = 1.0
+
+# kbps por [versión MPEG-1?][capa] e índice
+BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Hz por bits de versión (0: 2.5, 2: 2, 3: 1)
+SAMPLE_RATES = {0: (11025, 12000, 8000), 2: (22050, 24000, 16000), 3: (44100, 48000, 32000)}
+
+def parse_frame_header(data, pos):
+    """
+    Cabecera de frame MPEG en `pos`, o None si no es válida.
+    Retorna {version, capa, bitrate, sample_rate, muestras, largo, mono}.
+    """
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version = (b1 >> 3) & 3
+    capa = 4 - ((b1 >> 1) & 3)
+    indice_bitrate = b2 >> 4
+    indice_sr = (b2 >> 2) & 3
+    # Versión y capa reservadas, bitrate libre o inválido, frecuencia inválida
+    if version == 1 or capa == 4 or indice_bitrate in (0, 15) or indice_sr == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = BITRATES[(mpeg1, capa)][indice_bitrate]
+    sample_rate = SAMPLE_RATES[version][indice_sr]
+    padding = (b2 >> 1) & 1
+    if capa == 1:
+        muestras = 384
+        largo = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        muestras = 1152 if capa == 2 or mpeg1 else 576
+        largo = muestras // 8 * bitrate * 1000 // sample_rate + padding
+    return {'version': version, 'capa': capa, 'bitrate': bitrate, 'sample_rate': sample_rate,
+            'muestras': muestras, 'largo': largo, 'mono': (b3 >> 6) == 3}
+
+def same_stream(a, b):
+    return (a['version'], a['capa'], a['sample_rate']) == (b['version'], b['capa'],
+                                                          b['sample_rate'])
+
+def chain_at(data, pos, fin, referencia, cadena=CADENA):
+    """True si desde `pos` hay `cadena` frames seguidos del mismo stream (o el fin)"""
+    for _ in range(cadena):
+        if pos >= fin:
+            return True
+        frame = parse_frame_header(data, pos)
+        if frame is None or not same_stream(frame, referencia):
+            return False
+        pos += frame['largo']
+    return True
+
+def find_frame(data, desde, hasta, fin, referencia=None):
+    """
+    Posición y cabecera del primer frame en [desde, hasta) seguido de una
+    cadena válida, o (None, None).
+    """
+    pos = data.find(b'\xff', desde, hasta)
+    while pos != -1:
+        frame = parse_frame_header(data, pos)
+        if frame and (referencia is None or same_stream(frame, referencia)):
+            if chain_at(data, pos + frame['largo'], fin, frame, CADENA - 1):
+                return pos, frame
+        pos = data.find(b'\xff', pos + 1, hasta)
+    return None, None
+
+def skip_id3v2(data):
+    """Bytes ocupados por las etiquetas ID3v2 al inicio"""
+    pos = 0
+    while data[pos:pos + 3] == b'ID3' and pos + 10 <= len(data):
+        flags = data[pos + 5]
+        tamaño = 0
+        for byte in data[pos + 6:pos + 10]:
+            tamaño = (tamaño << 7) | (byte & 0x7F)
+        pos += 10 + tamaño + (10 if flags & 0x10 else 0)
+    return min(pos, len(data))
+
+def trailing_tags(data, inicio):
+    """Fin del audio, descontando ID3v1 y APEv2 al final"""
+    fin = len(data)
+    if fin - inicio >= 128 and data[fin - 128:fin - 125] == b'TAG':
+        fin -= 128
+    if fin - inicio >= 32 and data[fin - 32:fin - 24] == b'APETAGEX':
+        tamaño, _, flags = struct.unpack_from('<III', data, fin - 20)
+        fin -= tamaño + (32 if flags & 0x80000000 else 0)
+    return max(fin, inicio)
+
+def vbr_header(data, pos, frame):
+    """(frames, bytes, 'xing'|'info'|'vbri') del primer frame, o None"""
+    if frame['version'] == 3:
+        lado = 17 if frame['mono'] else 32
+    else:
+        lado = 9 if frame['mono'] else 17
+    xing = pos + 4 + lado
+    etiqueta = bytes(data[xing:xing + 4])
+    if etiqueta in (b'Xing', b'Info') and xing + 16 <= len(data):
+        flags, = struct.unpack_from('>I', data, xing + 4)
+        desde = xing + 8
+        frames = bytes_ = None
+        if flags & 1:
+            frames, = struct.unpack_from('>I', data, desde)
+            desde += 4
+        if flags & 2:
+            bytes_, = struct.unpack_from('>I', data, desde)
+        return frames, bytes_, etiqueta.decode('ascii').lower()
+    vbri = pos + 4 + 32
+    if data[vbri:vbri + 4] == b'VBRI' and vbri + 18 <= len(data):
+        bytes_, frames = struct.unpack_from('>II', data, vbri + 10)
+        return frames, bytes_, 'vbri'
+    return None
+
+def scan_data(data):
+    """
+    Analiza el contenido de un MP3 (bytes o mmap) leyendo solo cabeceras.
+    Retorna {duracion, bitrate, sample_rate, vbr, valido, error}.
+    """
+    resultado = {'duracion': None, 'bitrate': None, 'sample_rate': None, 'vbr': None,
+                 'valido': False, 'error': None}
+    if len(data) == 0:
+        resultado['error'] = 'vacio'
+        return resultado
+    inicio = skip_id3v2(data)
+    fin = trailing_tags(data, inicio)
+    pos, frame = find_frame(data, inicio, min(fin, inicio + MAX_BUSQUEDA), fin)
+    if pos is None:
+        resultado['error'] = 'html' if b'<html' in bytes(data[:1024]).lower() else 'sin_frames'
+        return resultado
+
+    resultado['sample_rate'] = frame['sample_rate']
+    audio = fin - pos
+    vbr = vbr_header(data, pos, frame)
+    if vbr and vbr[0]:
+        frames, bytes_, tipo = vbr
+        duracion = frames * frame['muestras'] / frame['sample_rate']
+        bytes_ = bytes_ or audio
+        resultado['vbr'] = tipo != 'info'
+        resultado['bitrate'] = round(bytes_ * 8 / duracion / 1000) if duracion else None
+    else:
+        bytes_ = None
+        duracion = audio * 8 / (frame['bitrate'] * 1000)
+        resultado['vbr'] = False
+        resultado['bitrate'] = frame['bitrate']
+    resultado['duracion'] = round(duracion, 2)
+
+    # Declarado más largo que lo que hay: la descarga se cortó
+    if bytes_ and audio < bytes_ * (1 - TOLERANCIA_BYTES):
+        resultado['error'] = 'truncado'
+        return resultado
+
+    # Sondeos: cerca de cada punto tiene que aparecer una cadena de frames
+    for k in range(1, SONDEOS + 1):
+        punto = pos + audio * k // (SONDEOS + 1)
+        if punto + MAX_FRAME >= fin:
+            break
+        hallado, _ = find_frame(data, punto, punto + MAX_FRAME, fin, frame)
+        if hallado is None:
+            resultado['error'] = 'datos_corruptos'
+            return resultado
+
+    # Desde un frame confirmado de la cola, de frame en frame hasta el final:
+    # si el último se sale del archivo, la descarga se cortó
+    p, _ = find_frame(data, max(pos, fin - COLA), fin, fin, frame)
+    while p is not None and p < fin:
+        actual = parse_frame_header(data, p)
+        if actual is None:
+            # Basura o una etiqueta no reconocida después del audio
+            break
+        if p + actual['largo'] > fin + 1:
+            resultado['error'] = 'truncado'
+            return resultado
+        p += actual['largo']
+
+    if duracion < MIN_DURACION_S:
+        resultado['error'] = 'muy_corto'
+        return resultado
+    resultado['valido'] = True
+    return resultado
+
+def scan_file(path):
+    """scan_data de un archivo abierto con mmap (corre en un proceso del pool)"""
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return scan_data(b'')
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return scan_data(data)
+    except OSError as e:
+        return {'duracion': None, 'bitrate': None, 'sample_rate': None, 'vbr': None,
+                'valido': False, 'error': f"ilegible: {e.strerror or e}"}
+
+def list_files(audio_dir=AUDIO_DIR):
+    """[(numero, tipo, path)] de los MP3 locales"""
+    archivos = []
+    for tipo in TIPOS:
+        carpeta = audio_dir / tipo
+        if not carpeta.exists():
+            continue
+        for path in carpeta.glob('*.mp3'):
+            if path.stem.isdigit():
+                archivos.append((int(path.stem), tipo, path))
+    return sorted(archivos)
+
+def format_duration(segundos):
+    return f"{int(segundos) // 60}:{int(segundos) % 60:02d}" if segundos else "-"
+
+def main():
+    parser = argparse.ArgumentParser(description="Escaneo de cabeceras de los MP3 locales")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--forzar', action='store_true', help="volver a escanear todo")
+    parser.add_argument('--borrar', action='store_true',
+                        help="borrar los archivos inválidos para que se vuelvan a descargar")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("ESCANEO DE AUDIO")
+    print("=" * 60)
+
+    catalogo = abrir()
+    previos = catalogo.audio()
+    archivos = list_files()
+    pendientes = []
+    for numero, tipo, path in archivos:
+        stat = path.stat()
+        previo = previos.get((numero, tipo))
+        if (args.forzar or not previo or previo['tamaño'] != stat.st_size
+                or previo['mtime_ns'] != stat.st_mtime_ns):
+            pendientes.append((numero, tipo, path, stat))
+
+    inicio = time.perf_counter()
+    if pendientes:
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            resultados = executor.map(scan_file, [p for _, _, p, _ in pendientes],
+                                      chunksize=32)
+            with catalogo.transaccion():
+                for (numero, tipo, _, stat), info in zip(pendientes, resultados):
+                    info.update(tamaño=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                    catalogo.guardar_audio(numero, tipo, info)
+    vigentes = {(numero, tipo) for numero, tipo, _ in archivos}
+    with catalogo.transaccion():
+        for clave in set(previos) - vigentes:
+            catalogo.borrar_audio(*clave)
+    print(f"\n   {len(archivos)} archivos ({len(pendientes)} escaneados) en "
+          f"{time.perf_counter() - inicio:.1f} s")
+    if not archivos:
+        print("   ⚠️  No hay MP3 locales; corre descargar_audio.py")
+        return
+
+    datos = catalogo.audio()
+    for tipo in TIPOS:
+        filas = [d for (_, t), d in datos.items() if t == tipo and d['valido']]
+        if not filas:
+            continue
+        total = sum(d['duracion'] for d in filas)
+        vbr = sum(1 for d in filas if d['vbr'])
+        print(f"\n📊 {tipo}: {len(filas)} válidos, {total / 3600:.1f} h, "
+              f"promedio {format_duration(total / len(filas))}, "
+              f"{sum(d['bitrate'] for d in filas) / len(filas):.0f} kbps, {vbr} VBR")
+
+    invalidos = sorted((clave, d) for clave, d in datos.items() if not d['valido'])
+    if not invalidos:
+        print("\n   ✓ Todos los archivos son válidos")
+        return
+    print(f"\n⚠️  {len(invalidos)} archivos inválidos:")
+    for (numero, tipo), d in invalidos:
+        print(f"   ✗ {tipo}/{numero}.mp3: {d['error']}")
+    if not args.borrar:
+        print("\n   Usa --borrar y vuelve a correr descargar_audio.py para re-descargarlos")
+        return
+    with catalogo.transaccion():
+        for (numero, tipo), _ in invalidos:
+            (AUDIO_DIR / tipo / f"{numero}.mp3").unlink(missing_ok=True)
+            catalogo.borrar_audio(numero, tipo)
+            print(f"   🗑 {tipo}/{numero}.mp3")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Exporta el catálogo en formato compacto para el arranque de la app.
+
+himnos.json (pretty-printed, ~770 KB) se decodifica completo al abrir la
+app antes de poder buscar. Este script escribe en assets/data/compacto/:
+
+- indice.json: solo [numero, titulo] de cada himno, que es lo que necesita
+  la búsqueda de la pantalla principal.
+- letras_NNN.json: los registros completos en bloques de TAM_BLOQUE himnos
+  por rango de número; la app carga un bloque recién al abrir un himno.
+
+Todo minificado y con saltos de línea normalizados a \\n. Los archivos solo
+se reescriben si su contenido cambió. Al final reporta el tamaño y el
+tiempo de decodificación comparados con himnos.json.
+
+USO:
+    python scripts/exportar_compacto.py
+"""
+
+import argparse
+import json
+import os
+import time
+
+from catalogo import JSON_PATH, abrir
+
+COMPACTO_DIR = JSON_PATH.parent / "compacto"
+INDICE_NAME = "indice.json"
+TAM_BLOQUE = 50
+VERSION = 1
+
+def normalize(texto):
+    """Normaliza \\r\\n y \\r a \\n"""
+    if not isinstance(texto, str):
+        return texto
+    return texto.replace('\r\n', '\n').replace('\r', '\n')
+
+def compact_record(himno):
+    registro = dict(himno)
+    registro['titulo'] = normalize(registro.get('titulo'))
+    registro['estrofas'] = [normalize(e) for e in registro.get('estrofas', [])]
+    registro['coro'] = normalize(registro.get('coro'))
+    return registro
+
+def dumps_min(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+def block_name(bloque):
+    return f"letras_{bloque:03d}.json"
+
+def build_files(himnos, tam_bloque=TAM_BLOQUE):
+    """Retorna {nombre de archivo: contenido} del export compacto"""
+    bloques = {}
+    for himno in himnos:
+        bloques.setdefault((himno['numero'] - 1) // tam_bloque, []).append(compact_record(himno))
+
+    indice = {
+        'version': VERSION,
+        'bloque': tam_bloque,
+        'himnos': [[h['numero'], normalize(h['titulo'])] for h in himnos],
+    }
+    archivos = {INDICE_NAME: dumps_min(indice)}
+    for bloque, registros in sorted(bloques.items()):
+        archivos[block_name(bloque)] = dumps_min(registros)
+    return archivos
+
+def write_files(archivos, output_dir=COMPACTO_DIR):
+    """Escribe solo los archivos que cambiaron y borra bloques sobrantes; retorna los escritos"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    escritos = []
+    for nombre, contenido in archivos.items():
+        path = output_dir / nombre
+        data = contenido.encode('utf-8')
+        if path.exists() and path.read_bytes() == data:
+            continue
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        escritos.append(nombre)
+    for path in output_dir.glob('letras_*.json'):
+        if path.name not in archivos:
+            path.unlink()
+    return escritos
+
+def decode_ms(texto, repeticiones=20):
+    """Mejor tiempo de json.loads en ms"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        json.loads(texto)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+def report(original, archivos):
+    kb = lambda texto: len(texto.encode('utf-8')) / 1024
+    bloques = [c for n, c in archivos.items() if n != INDICE_NAME]
+    total = sum(kb(c) for c in archivos.values())
+    indice = archivos[INDICE_NAME]
+
+    print(f"\n   {'archivo':22s} {'tamaño':>10s} {'decodificar':>12s}")
+    print(f"   {'himnos.json':22s} {kb(original):8.1f} KB {decode_ms(original):9.2f} ms")
+    print(f"   {'compacto/' + INDICE_NAME:22s} {kb(indice):8.1f} KB {decode_ms(indice):9.2f} ms")
+    if bloques:
+        mayor = max(bloques, key=len)
+        print(f"   {'bloque más grande':22s} {kb(mayor):8.1f} KB {decode_ms(mayor):9.2f} ms")
+    print(f"   {'compacto/ (total)':22s} {total:8.1f} KB")
+    print(f"\n   Arranque: {kb(indice):.1f} KB en lugar de {kb(original):.1f} KB "
+          f"({(1 - kb(indice) / kb(original)) * 100:.0f}% menos)")
+    print(f"   Catálogo completo: {(1 - total / kb(original)) * 100:.0f}% menos")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export compacto del catálogo para la app")
+    parser.add_argument('--bloque', type=int, default=TAM_BLOQUE,
+                        help="himnos por archivo de letras")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("EXPORTANDO CATÁLOGO COMPACTO")
+    print("=" * 60)
+
+    catalogo = abrir()
+    himnos = catalogo.todos()
+    print(f"\n   {len(himnos)} himnos, bloques de {args.bloque}")
+
+    archivos = build_files(himnos, max(1, args.bloque))
+    escritos = write_files(archivos)
+    if escritos:
+        print(f"   ✓ Escritos {len(escritos)} de {len(archivos)} archivos en {COMPACTO_DIR}")
+    else:
+        print(f"   = Sin cambios en {COMPACTO_DIR}")
+
+    report(JSON_PATH.read_text(encoding='utf-8'), archivos)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Índice invertido de búsqueda para títulos, números y letras.
+
+Se construye en tiempo de build a partir de himnos.json (o de varios
+himnarios) y se guarda compacto en .sync/busqueda.json, fuera de los assets
+que se empaquetan con la app:
+
+- Los textos se pliegan (minúsculas, sin tildes ni diéresis: "Dá" → "da")
+  y se separan en términos.
+- terminos: vocabulario ordenado; cada término tiene su lista de postings.
+- trigramas: trigrama → términos que lo contienen, para buscar partes de
+  palabras ("glor" encuentra "gloria", "gloriosa") sin recorrer todo.
+- Cada posting es doc * SECCIONES + sección, donde sección 0 es el título,
+  1 el coro y 2 + i la estrofa i. Las listas se guardan ordenadas y en
+  deltas para que el JSON sea chico.
+
+Una consulta exige que todos sus términos aparezcan en el himno (en
+cualquier sección, como substring de una palabra) y los números buscan por
+prefijo, igual que la pantalla principal.
+
+USO:
+    python scripts/indice_busqueda.py construir
+    python scripts/indice_busqueda.py construir --himnario adventista=assets/data/himnos.json
+    python scripts/indice_busqueda.py buscar "da gloria"
+    python scripts/indice_busqueda.py buscar "ninguno dejara" --json
+"""
+
+import argparse
+import bisect
+import heapq
+import itertools
+import json
+import os
+import re
+import time
+import unicodedata
+from pathlib import Path
+
+from catalogo import JSON_PATH
+from manifiesto import SYNC_DIR
+
+INDICE_PATH = SYNC_DIR / "busqueda.json"
+VERSION = 1
+
+SECCIONES = 64
+TITULO = 0
+CORO = 1
+PRIMERA_ESTROFA = 2
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+class _TablaPlegado(dict):
+    """Tabla para str.translate que pliega cada carácter la primera vez que aparece"""
+
+    def __missing__(self, codigo):
+        descompuesto = unicodedata.normalize('NFD', chr(codigo))
+        plegado = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+        self[codigo] = plegado
+        return plegado
+
+_PLEGADO = _TablaPlegado()
+
+def fold(texto):
+    """Minúsculas y sin marcas diacríticas ("Señor" → "senor")"""
+    texto = texto.lower()
+    return texto if texto.isascii() else texto.translate(_PLEGADO)
+
+def tokenize(texto):
+    return TOKEN_RE.findall(fold(texto or ''))
+
+def trigrams(termino):
+    return {termino[i:i + 3] for i in range(len(termino) - 2)}
+
+def section_name(seccion):
+    if seccion == TITULO:
+        return 'titulo'
+    if seccion == CORO:
+        return 'coro'
+    return f"estrofa {seccion - PRIMERA_ESTROFA + 1}"
+
+def hymn_sections(himno):
+    """(sección, texto) de un himno"""
+    yield TITULO, himno.get('titulo', '')
+    if himno.get('coro'):
+        yield CORO, himno['coro']
+    for i, estrofa in enumerate(himno.get('estrofas', [])):
+        if PRIMERA_ESTROFA + i < SECCIONES:
+            yield PRIMERA_ESTROFA + i, estrofa
+
+def delta_encode(valores):
+    anterior, salida = 0, []
+    for v in valores:
+        salida.append(v - anterior)
+        anterior = v
+    return salida
+
+def delta_decode(deltas):
+    total, salida = 0, []
+    for d in deltas:
+        total += d
+        salida.append(total)
+    return salida
+
+def build_index(himnarios):
+    """
+    himnarios: {nombre: lista de himnos}. Retorna el índice serializable.
+    """
+    docs = []
+    postings = {}
+    for h_id, (nombre, himnos) in enumerate(himnarios.items()):
+        for himno in sorted(himnos, key=lambda x: x['numero']):
+            doc = len(docs)
+            docs.append([h_id, himno['numero'], himno.get('titulo', '')])
+            for seccion, texto in hymn_sections(himno):
+                clave = doc * SECCIONES + seccion
+                for termino in set(tokenize(texto)):
+                    postings.setdefault(termino, set()).add(clave)
+
+    terminos = sorted(postings)
+    por_trigrama = {}
+    for t_id, termino in enumerate(terminos):
+        for tri in trigrams(termino):
+            por_trigrama.setdefault(tri, []).append(t_id)
+
+    return {
+        'version': VERSION,
+        'secciones': SECCIONES,
+        'himnarios': list(himnarios),
+        'docs': docs,
+        'terminos': terminos,
+        'postings': [delta_encode(sorted(postings[t])) for t in terminos],
+        'trigramas': {tri: delta_encode(ids) for tri, ids in sorted(por_trigrama.items())},
+    }
+
+class IndiceBusqueda:
+    """API de consulta sobre el índice serializado"""
+
+    def __init__(self, data):
+        self.secciones = data['secciones']
+        self.himnarios = data['himnarios']
+        self.docs = data['docs']
+        self.terminos = data['terminos']
+        self._postings = data['postings']
+        self._trigramas = data['trigramas']
+        # Listas decodificadas a medida que se usan
+        self._cache_postings = {}
+        self._cache_trigramas = {}
+        self._cache_consultas = {}
+        self._por_numero = {}
+        for doc, (_, numero, _) in enumerate(self.docs):
+            self._por_numero.setdefault(str(numero), []).append(doc)
+        self._numeros = sorted(self._por_numero)
+
+    @classmethod
+    def load(cls, path=INDICE_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _postings_de(self, t_id):
+        if t_id not in self._cache_postings:
+            self._cache_postings[t_id] = delta_decode(self._postings[t_id])
+        return self._cache_postings[t_id]
+
+    def _terminos_con(self, parte):
+        """ids de los términos que contienen `parte`"""
+        if len(parte) < 3:
+            # Sin trigramas: se recorre el vocabulario (unos miles de términos;
+            # el resultado queda en la caché de consultas)
+            return [t for t, termino in enumerate(self.terminos) if parte in termino]
+        candidatos = None
+        for tri in trigrams(parte):
+            if tri not in self._cache_trigramas:
+                self._cache_trigramas[tri] = set(delta_decode(self._trigramas.get(tri, [])))
+            ids = self._cache_trigramas[tri]
+            candidatos = ids if candidatos is None else candidatos & ids
+            if not candidatos:
+                return []
+        return [t for t in candidatos if parte in self.terminos[t]]
+
+    def _docs(self, parte):
+        """
+        ({doc: máscara de secciones}, docs con `parte` en el título primero)
+        """
+        if parte not in self._cache_consultas:
+            docs = {}
+            for t_id in self._terminos_con(parte):
+                for clave in self._postings_de(t_id):
+                    doc, seccion = divmod(clave, self.secciones)
+                    docs[doc] = docs.get(doc, 0) | (1 << seccion)
+            ordenados = sorted(docs, key=lambda d: (not docs[d] & 1, d))
+            self._cache_consultas[parte] = (docs, ordenados)
+        return self._cache_consultas[parte]
+
+    def buscar(self, consulta, limite=10):
+        """
+        Retorna hasta `limite` resultados
+        [{'himnario', 'numero', 'titulo', 'secciones': [...]}], primero los
+        que coinciden por número y luego por cuántas partes hay en el título.
+        """
+        partes = tokenize(consulta)
+        if not partes:
+            return []
+
+        # Documentos con todas las partes; se intersecta desde la lista más corta
+        consultas = sorted((self._docs(parte) for parte in partes), key=lambda c: len(c[0]))
+        por_parte = [docs for docs, _ in consultas]
+        por_doc = por_parte[0]
+        for docs in por_parte[1:]:
+            por_doc = {doc: mascara | docs[doc] for doc, mascara in por_doc.items()
+                       if doc in docs}
+            if not por_doc:
+                break
+
+        # Número exacto o por prefijo, como el campo de número de la app
+        por_numero = []
+        if len(partes) == 1 and partes[0].isdigit():
+            inicio = bisect.bisect_left(self._numeros, partes[0])
+            fin = bisect.bisect_left(self._numeros, partes[0] + '\uffff')
+            for numero in self._numeros[inicio:fin]:
+                por_numero.extend(self._por_numero[numero])
+            exactos = self._por_numero.get(partes[0], [])
+            por_numero = exactos + sorted((d for d in por_numero if d not in exactos),
+                                          key=lambda d: self.docs[d][1])
+
+        def orden(doc):
+            # Más partes de la consulta en el título primero
+            return (-sum(docs.get(doc, 0) & 1 for docs in por_parte), doc)
+
+        restantes = max(0, limite - len(por_numero))
+        elegidos = set(por_numero)
+        if len(consultas) == 1:
+            # Una sola parte: el orden ya está precalculado
+            candidatos = (d for d in consultas[0][1] if d not in elegidos)
+            docs = por_numero[:limite] + list(itertools.islice(candidatos, restantes))
+        else:
+            docs = por_numero[:limite] + heapq.nsmallest(
+                restantes, (d for d in por_doc if d not in elegidos), key=orden)
+        resultados = []
+        for doc in docs:
+            h_id, numero, titulo = self.docs[doc]
+            mascara = por_doc.get(doc, 0)
+            resultados.append({
+                'himnario': self.himnarios[h_id],
+                'numero': numero,
+                'titulo': titulo,
+                'secciones': [section_name(s) for s in range(self.secciones)
+                              if mascara >> s & 1],
+            })
+        return resultados
+
+def load_hymnals(especificaciones):
+    """['nombre=ruta', ...] → {nombre: himnos}; por defecto himnos.json"""
+    if not especificaciones:
+        especificaciones = [f"adventista={JSON_PATH}"]
+    himnarios = {}
+    for spec in especificaciones:
+        nombre, _, ruta = spec.partition('=')
+        if not ruta:
+            nombre, ruta = Path(spec).stem, spec
+        with open(ruta, 'r', encoding='utf-8') as f:
+            himnarios[nombre] = json.load(f)
+    return himnarios
+
+def write_index(indice, path=INDICE_PATH):
+    """Escribe el índice minificado si cambió; retorna True si escribió"""
+    data = json.dumps(indice, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists() and path.read_bytes() == data:
+        return False
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+def cmd_construir(args):
+    print("=" * 60)
+    print("CONSTRUYENDO ÍNDICE DE BÚSQUEDA")
+    print("=" * 60)
+    himnarios = load_hymnals(args.himnario)
+    inicio = time.perf_counter()
+    indice = build_index(himnarios)
+    print(f"\n   Himnos: {len(indice['docs'])} en {len(himnarios)} himnario(s)")
+    print(f"   Términos: {len(indice['terminos'])}, trigramas: {len(indice['trigramas'])}")
+    print(f"   Tiempo: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+    salida = Path(args.salida)
+    if write_index(indice, salida):
+        print(f"   ✓ Guardado en {salida} ({salida.stat().st_size / 1024:.1f} KB)")
+    else:
+        print(f"   = Sin cambios en {salida}")
+
+def cmd_buscar(args):
+    indice = IndiceBusqueda.load(args.indice)
+    inicio = time.perf_counter()
+    resultados = indice.buscar(args.consulta, args.limite)
+    ms = (time.perf_counter() - inicio) * 1000
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+        return
+    for r in resultados:
+        print(f"  {r['numero']:4d}  {r['titulo']}  [{', '.join(r['secciones'])}]")
+    print(f"\n  {len(resultados)} resultado(s) en {ms:.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice de búsqueda del himnario")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    construir = sub.add_parser('construir', help="construir el índice")
+    construir.add_argument('--himnario', action='append', metavar='NOMBRE=RUTA',
+                           help="himnario a indexar (repetible); por defecto himnos.json")
+    construir.add_argument('--salida', default=str(INDICE_PATH))
+    construir.set_defaults(func=cmd_construir)
+
+    buscar = sub.add_parser('buscar', help="consultar el índice")
+    buscar.add_argument('consulta')
+    buscar.add_argument('--indice', default=str(INDICE_PATH))
+    buscar.add_argument('--limite', type=int, default=10)
+    buscar.add_argument('--json', action='store_true', help="imprimir resultados en JSON")
+    buscar.set_defaults(func=cmd_buscar)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Manifiesto de sincronización compartido por los scripts de descarga.
+
+Guarda por cada recurso descargado su URL, ETag, Last-Modified, tamaño y
+sha256 en un archivo JSON-lines (`.sync/manifest.jsonl`). Con esos datos
+las siguientes ejecuciones envían peticiones condicionales
+(If-None-Match / If-Modified-Since) y solo transfieren lo que cambió.
+
+Cada actualización se agrega como una línea nueva (la última gana), así un
+corte a mitad de la ejecución no pierde lo ya registrado; `save()` compacta
+el archivo al terminar.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+SYNC_DIR = BASE_DIR / ".sync"
+MANIFEST_PATH = SYNC_DIR / "manifest.jsonl"
+
+def sha256_file(filepath, chunk_size=1024 * 1024):
+    """sha256 de un archivo leído por bloques"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class Manifiesto:
+    """Estado de sincronización por URL, seguro para usar desde varios hilos"""
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = Path(path)
+        self.entries = {}
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Línea cortada por una interrupción
+                    continue
+                self.entries[entry['url']] = entry
+
+    def get(self, url):
+        with self.lock:
+            return self.entries.get(url)
+
+    def conditional_headers(self, url, filepath):
+        """
+        Cabeceras condicionales para `url` si la copia local coincide con lo
+        registrado (existe y tiene el mismo tamaño). Si no, retorna {}.
+        """
+        entry = self.get(url)
+        if not entry or not Path(filepath).exists():
+            return {}
+        if Path(filepath).stat().st_size != entry.get('size'):
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def source_url(self, url):
+        """URL final registrada (tras redirecciones o confirmaciones)"""
+        entry = self.get(url)
+        return entry.get('source', url) if entry else url
+
+    def record(self, url, filepath, response):
+        """Registra la copia local de `url` tras una descarga exitosa"""
+        filepath = Path(filepath)
+        entry = {
+            'url': url,
+            'source': response.url,
+            'path': os.path.relpath(filepath, BASE_DIR),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'size': filepath.stat().st_size,
+            'sha256': sha256_file(filepath),
+            'updated': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        }
+        with self.lock:
+            self.entries[url] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return entry
+
+    def save(self):
+        """Reescribe el manifiesto con una línea por URL (escritura atómica)"""
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for url in sorted(self.entries):
+                    f.write(json.dumps(self.entries[url], ensure_ascii=False) + '\n')
+            os.replace(tmp, self.path)
+
+def is_up_to_date(url, filepath, manifest=None, session=None, timeout=60):
+    """
+    El archivo local está al día. Sin manifiesto basta con que exista; con
+    manifiesto se envía un GET condicional y solo un 304 lo confirma.
+    Cualquier otro status (200, 404, 410, 5xx) retorna False: el llamador
+    intenta la descarga y reporta el error si el recurso ya no está.
+    Los archivos sin ETag/Last-Modified registrados se consideran al día.
+    """
+    filepath = Path(filepath)
+    if not filepath.exists():
+        return False
+    if manifest is None:
+        return True
+    headers = manifest.conditional_headers(url, filepath)
+    if not headers:
+        return True
+    if session is None:
+        import requests
+        session = requests
+    try:
+        with session.get(manifest.source_url(url), headers=headers,
+                         stream=True, timeout=timeout) as response:
+            if response.status_code == 304:
+                return True
+            if response.status_code != 200:
+                print(f"  ⚠️ Status {response.status_code} al verificar {filepath.name}")
+            return False
+    except Exception as e:
+        print(f"  ⚠️ No se pudo verificar: {e}")
+        return True
+
+def conditional_get(session, url, manifest, filepath, **kwargs):
+    """
+    GET condicional que guarda el cuerpo en `filepath`.
+    Retorna (status, contenido_bytes, cambiado). Con 304 se reutiliza la
+    copia local sin transferir el cuerpo; con 200 `cambiado` indica si el
+    sha256 difiere de lo registrado.
+    """
+    filepath = Path(filepath)
+    headers = manifest.conditional_headers(url, filepath)
+    response = session.get(url, headers=headers, **kwargs)
+    if response.status_code == 304:
+        return 304, filepath.read_bytes(), False
+    if response.status_code != 200:
+        return response.status_code, None, False
+
+    previous = manifest.get(url)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    tmp = filepath.with_name(filepath.name + '.tmp')
+    tmp.write_bytes(response.content)
+    os.replace(tmp, filepath)
+    entry = manifest.record(url, filepath, response)
+    cambiado = not previous or previous.get('sha256') != entry['sha256']
+    return 200, response.content, cambiado
@@ -0,0 +1,112 @@
+"""
+Parser único de letras de himnos.
+
+Reemplaza las dos máquinas de estado casi iguales que había en
+descargar_himnos.parse_lyrics() y corregir_estrofas.parse_into_stanzas().
+Recorre el texto una sola vez con patrones precompilados y produce las
+secciones (estrofas y coro) a medida que se cierran.
+
+Formato esperado:
+- Primera línea: "Himno #N Título"
+- Número de estrofa solo en una línea (1, 2, 3, etc.)
+- Texto de la estrofa
+- Coro marcado con "Coro:" o "Coro"
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+NUMERO_RE = re.compile(r'\d+')
+CORO_RE = re.compile(r'coro(?::(.*))?', re.IGNORECASE)
+TITULO_PREFIX = 'Himno #'
+
+ESTROFA = 'estrofa'
+CORO = 'coro'
+
+# Por debajo de este número de textos el pool cuesta más de lo que ahorra
+PARALLEL_MIN = 2000
+
+def iter_sections(text, title_anywhere=True):
+    """
+    Produce (tipo, texto) por cada sección, con tipo 'estrofa' o 'coro'.
+
+    Con `title_anywhere` se descarta todo hasta la primera línea "Himno #"
+    (como hacía parse_lyrics); si no, solo se descarta si es la primera
+    línea (como hacía parse_into_stanzas).
+    """
+    if not text:
+        return
+    lines = text.strip().replace('\r\n', '\n').replace('\r', '\n').split('\n')
+
+    start = 0
+    if title_anywhere:
+        for i, line in enumerate(lines):
+            if line.strip().startswith(TITULO_PREFIX):
+                start = i + 1
+                break
+    elif lines[0].strip().startswith(TITULO_PREFIX):
+        start = 1
+
+    current = []
+    in_coro = False
+
+    for i in range(start, len(lines)):
+        stripped = lines[i].strip()
+        if not stripped:
+            continue
+        first = stripped[0]
+
+        # Número de estrofa: cierra la sección anterior
+        if first.isdigit() and NUMERO_RE.fullmatch(stripped):
+            if current:
+                yield (CORO if in_coro else ESTROFA), '\n'.join(current)
+            current = []
+            in_coro = False
+            continue
+
+        # Inicio de coro: lo anterior se guarda como estrofa
+        if first in 'cC':
+            match = CORO_RE.fullmatch(stripped)
+            if match:
+                if current:
+                    yield ESTROFA, '\n'.join(current)
+                current = []
+                in_coro = True
+                # Si el coro tiene texto después de "Coro:"
+                resto = (match.group(1) or '').strip()
+                if resto:
+                    current.append(resto)
+                continue
+
+        current.append(stripped)
+
+    # Última sección
+    if current:
+        yield (CORO if in_coro else ESTROFA), '\n'.join(current)
+
+def parse_hymn(text, title_anywhere=True):
+    """Retorna (estrofas, coro); si hay varios coros gana el último"""
+    estrofas = []
+    coro = None
+    for tipo, texto in iter_sections(text, title_anywhere):
+        if tipo == CORO:
+            coro = texto
+        else:
+            estrofas.append(texto)
+    return estrofas, coro
+
+def parse_many(texts, title_anywhere=True, workers=None, chunksize=64):
+    """
+    Parsea un lote de textos y retorna la lista de (estrofas, coro) en el
+    mismo orden. Lotes grandes se reparten en un pool de procesos.
+    """
+    texts = list(texts)
+    parse = partial(parse_hymn, title_anywhere=title_anywhere)
+    if workers is None:
+        workers = 1 if len(texts) < PARALLEL_MIN else (os.cpu_count() or 1)
+    if workers <= 1:
+        return [parse(text) for text in texts]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse, texts, chunksize=chunksize))
@@ -0,0 +1,273 @@
+"""
+Capa de peticiones HTTP compartida por los scripts de descarga.
+
+- Respeta Retry-After y las cabeceras X-RateLimit-Remaining / X-RateLimit-Reset
+  (si el servidor dice que no quedan peticiones, se pausa ese host hasta el reset).
+- Reintenta errores transitorios con backoff exponencial y jitter.
+- Ajusta la concurrencia por host con AIMD: sube de a poco mientras todo va
+  bien y se reduce a la mitad con cada 429/403 por límite de tasa.
+- Si HIMNARIO_CACHE está activo, los GET pasan por la caché en disco
+  (ver cache_http.py), incluido el modo offline.
+"""
+
+import email.utils
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache_http import cache_from_env
+
+RETRY_STATUS = {500, 502, 503, 504}
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+# Espera máxima que aceptamos de un Retry-After / X-RateLimit-Reset
+MAX_WAIT = 15 * 60
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Backoff exponencial con jitter completo: uniforme en [0, base * 2^attempt]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def parse_retry_after(value):
+    """Retry-After en segundos o como fecha HTTP; retorna segundos o None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+def rate_limit_wait(response):
+    """
+    Segundos que el servidor pide esperar, según Retry-After o según
+    X-RateLimit-Remaining = 0 con X-RateLimit-Reset (epoch). None si no indica nada.
+    """
+    wait = parse_retry_after(response.headers.get('Retry-After'))
+    if wait is not None:
+        return min(wait, MAX_WAIT)
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    reset = response.headers.get('X-RateLimit-Reset')
+    if remaining == '0' and reset and reset.isdigit():
+        return min(max(0.0, int(reset) - time.time()), MAX_WAIT)
+    return None
+
+def is_throttled(response):
+    """429, o 403 acompañado de cabeceras de límite de tasa (p. ej. GitHub)"""
+    if response.status_code == 429:
+        return True
+    if response.status_code == 403:
+        return (response.headers.get('Retry-After') is not None or
+                response.headers.get('X-RateLimit-Remaining') == '0')
+    return False
+
+class TokenBucket:
+    """
+    Limitador de tasa: como máximo `rate` peticiones por segundo, con
+    ráfagas de hasta `capacity`. Compartido por todos los hilos.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class LimiteAdaptativo:
+    """
+    Semáforo con límite AIMD: +1 por cada ventana de `limit` respuestas
+    correctas (aditivo) y /2 con cada respuesta limitada (multiplicativo).
+    """
+
+    def __init__(self, max_limit, min_limit=1):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(self.max_limit)
+        self.in_use = 0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.in_use >= int(self.limit):
+                self.cond.wait()
+            self.in_use += 1
+
+    def release(self):
+        with self.cond:
+            self.in_use -= 1
+            self.cond.notify_all()
+
+    def on_success(self):
+        with self.cond:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self.cond.notify_all()
+
+    def on_throttle(self):
+        with self.cond:
+            self.limit = max(self.min_limit, self.limit / 2)
+
+class Cliente:
+    """
+    Sesión HTTP con reintentos, respeto de límites de tasa y concurrencia
+    adaptativa por host. `get()` acepta los mismos argumentos que
+    `requests.Session.get`, así que puede usarse donde se espera una sesión.
+
+    Las peticiones normales ocupan un lugar del límite del host solo mientras
+    esperan la respuesta. Para descargas con `stream=True` el llamador debe
+    envolver toda la transferencia con `with cliente.slot(url):`.
+
+    Con caché, los GET normales se guardan siempre; los `stream=True` solo
+    si se pasa `cachear=True` (el cuerpo se lee completo para guardarlo).
+    """
+
+    def __init__(self, max_por_host=4, max_retries=DEFAULT_MAX_RETRIES, rate=None,
+                 session=None, cache=None):
+        self.session = session or requests.Session()
+        if session is None:
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, max_por_host))
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        self.max_por_host = max_por_host
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate) if rate else None
+        self.limites = {}
+        self.pausas = {}
+        self.lock = threading.Lock()
+        self.cache = cache if cache is not None else cache_from_env()
+        self.stats = {'peticiones': 0, 'reintentos': 0, 'limitadas': 0, 'cache': 0}
+
+    def _host(self, url):
+        return urlparse(url).netloc
+
+    def limite(self, url):
+        """Limitador AIMD del host de `url`"""
+        host = self._host(url)
+        with self.lock:
+            if host not in self.limites:
+                self.limites[host] = LimiteAdaptativo(self.max_por_host)
+            return self.limites[host]
+
+    @contextmanager
+    def slot(self, url):
+        """Ocupa un lugar en el límite de concurrencia del host"""
+        limite = self.limite(url)
+        limite.acquire()
+        try:
+            yield
+        finally:
+            limite.release()
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _pause(self, host, seconds):
+        """Ningún hilo vuelve a pedir a `host` hasta que pasen `seconds`"""
+        with self.lock:
+            until = time.monotonic() + seconds
+            self.pausas[host] = max(self.pausas.get(host, 0.0), until)
+
+    def _wait_pause(self, host):
+        with self.lock:
+            until = self.pausas.get(host, 0.0)
+        wait = until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Envía la petición con reintentos. Retorna la última respuesta (aunque
+        sea de error) o relanza la excepción de red del último intento.
+        """
+        host = self._host(url)
+        limite = self.limite(url)
+        stream = kwargs.get('stream', False)
+        cachear = kwargs.pop('cachear', False)
+
+        cache_url = None
+        if self.cache is not None:
+            cache_url = requests.Request(method, url, params=kwargs.get('params')).prepare().url
+            cached = self.cache.get(cache_url) if method == 'GET' else None
+            if cached is not None:
+                self._count('cache')
+                return cached
+            if self.cache.offline:
+                return self.cache.miss_response(cache_url)
+            if method != 'GET' or (stream and not cachear):
+                cache_url = None
+
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            self._wait_pause(host)
+            if self.bucket is not None:
+                self.bucket.acquire()
+
+            if not stream:
+                limite.acquire()
+            try:
+                self._count('peticiones')
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+                self._count('reintentos')
+                time.sleep(backoff_delay(attempt))
+                continue
+            finally:
+                if not stream:
+                    limite.release()
+
+            if is_throttled(response):
+                self._count('limitadas')
+                limite.on_throttle()
+                wait = rate_limit_wait(response)
+                self._pause(host, wait if wait is not None else backoff_delay(attempt))
+                if last:
+                    return response
+                response.close()
+                self._count('reintentos')
+                continue
+
+            if response.status_code in RETRY_STATUS and not last:
+                response.close()
+                self._count('reintentos')
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            limite.on_success()
+            # Sin peticiones restantes: pausar el host hasta el reset
+            if response.headers.get('X-RateLimit-Remaining') == '0':
+                wait = rate_limit_wait(response)
+                if wait:
+                    self._pause(host, wait)
+            if cache_url is not None:
+                if response.status_code == 200:
+                    return self.cache.put(cache_url, response)
+                if response.status_code == 304:
+                    self.cache.touch(cache_url)
+            return response
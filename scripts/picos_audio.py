@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Precalcula la forma de onda de cada MP3 para la barra de reproducción.
+
+Dibujar la forma de onda en el reproductor obligaría a decodificar el MP3
+en el teléfono. Este script guarda, por cada archivo de
+assets/audio/cantado/ y assets/audio/instrumental/, PICOS pares
+(mínimo, máximo) en int8 en assets/audio/picos/<tipo>/<n>.picos, con los
+inicios de estrofa de stanza_timestamps como marcadores.
+
+Formato (little-endian):
+
+    4s   'PICO'
+    u8   versión (1)
+    u8   reservado (0)
+    u16  cantidad de pares
+    u32  duración en ms
+    f32  escala: amplitud (0-1) que corresponde a ±127
+    u16  cantidad de marcadores
+    u32  × marcadores: inicio de cada sección en ms
+    i8   × 2 × pares: mínimo y máximo de cada tramo
+
+Las pistas cantadas salen de la caché de rasgos de analizar_estrofas.py
+(su envolvente mín/máx a 100 Hz) y solo se decodifican si no están; las
+instrumentales se decodifican en paralelo en un pool de procesos. Si solo
+cambiaron los timestamps se reescriben los marcadores sin decodificar.
+
+USO:
+    python scripts/picos_audio.py
+    python scripts/picos_audio.py --forzar
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from analizar_estrofas import (ENVOLVENTE_HOP, SAMPLE_RATE, decode_audio, envelope,
+                               load_features)
+from cache_audio import IndiceHashes
+from catalogo import abrir
+from manifiesto import BASE_DIR, SYNC_DIR
+
+AUDIO_DIR = BASE_DIR / "assets" / "audio"
+OUTPUT_DIR = AUDIO_DIR / "picos"
+ESTADO_PATH = SYNC_DIR / "picos.json"
+TIPOS = ('cantado', 'instrumental')
+
+MAGIC = b'PICO'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHIfH')
+PICOS = 800
+
+def compute_peaks(envolvente, picos=PICOS):
+    """
+    Reduce una envolvente (n, 2) mín/máx a `picos` pares int8.
+    Retorna (arreglo (picos, 2) int8, escala).
+    """
+    envolvente = np.asarray(envolvente, dtype=np.float32)
+    if len(envolvente) == 0:
+        return np.zeros((picos, 2), dtype=np.int8), 1.0
+    bordes = np.linspace(0, len(envolvente), picos + 1).astype(np.int64)[:-1]
+    bordes = np.minimum(bordes, len(envolvente) - 1)
+    minimos = np.minimum.reduceat(envolvente[:, 0], bordes)
+    maximos = np.maximum.reduceat(envolvente[:, 1], bordes)
+    escala = float(max(np.abs(minimos).max(), np.abs(maximos).max()))
+    if escala <= 0:
+        return np.zeros((picos, 2), dtype=np.int8), 1.0
+    pares = np.stack([minimos, maximos], axis=1) / escala * 127
+    return np.clip(np.round(pares), -127, 127).astype(np.int8), escala
+
+def encode(picos, duracion_ms, escala, marcadores):
+    """Bytes de un archivo .picos"""
+    cabecera = HEADER.pack(MAGIC, VERSION, 0, len(picos), duracion_ms, escala, len(marcadores))
+    return (cabecera + struct.pack(f'<{len(marcadores)}I', *marcadores)
+            + np.ascontiguousarray(picos, dtype=np.int8).tobytes())
+
+def decode(data):
+    """{'picos', 'duracion_ms', 'escala', 'marcadores'} de los bytes de un .picos"""
+    magic, version, _, n, duracion_ms, escala, m = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("no es un archivo .picos de esta versión")
+    desde = HEADER.size
+    marcadores = list(struct.unpack_from(f'<{m}I', data, desde))
+    desde += 4 * m
+    picos = np.frombuffer(data, dtype=np.int8, count=2 * n, offset=desde).reshape(n, 2)
+    return {'picos': picos, 'duracion_ms': duracion_ms, 'escala': escala,
+            'marcadores': marcadores}
+
+def markers(himno):
+    """Inicio de cada sección en ms, según stanza_timestamps"""
+    return [int(round(t['start'] * 1000)) for t in himno.get('stanza_timestamps') or []]
+
+def output_path(tipo, numero, output_dir=OUTPUT_DIR):
+    return output_dir / tipo / f"{numero}.picos"
+
+def write_file(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def process_track(tarea):
+    """
+    Picos de una pista (corre en un proceso del pool). Las cantadas pasan
+    por la caché de rasgos; retorna (picos, duración en ms, escala).
+    """
+    tipo, path, sha = tarea
+    if tipo == 'cantado':
+        rasgos, _ = load_features(path, sha)
+        envolvente = rasgos['envolvente']
+    else:
+        envolvente = envelope(decode_audio(path))
+    picos, escala = compute_peaks(envolvente)
+    return picos, int(round(len(envolvente) * ENVOLVENTE_HOP / SAMPLE_RATE * 1000)), escala
+
+def load_state(path=ESTADO_PATH):
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_state(estado, path=ESTADO_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def remove_stale(vigentes, output_dir=OUTPUT_DIR):
+    """Borra .picos cuyo MP3 ya no existe"""
+    borrados = 0
+    for tipo in TIPOS:
+        carpeta = output_dir / tipo
+        if not carpeta.exists():
+            continue
+        for path in carpeta.glob('*.picos'):
+            if path not in vigentes:
+                path.unlink()
+                borrados += 1
+    return borrados
+
+def main():
+    parser = argparse.ArgumentParser(description="Formas de onda precalculadas del audio")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--forzar', action='store_true', help="recalcular todo")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("PICOS DE AUDIO")
+    print("=" * 60)
+
+    himnos = {h['numero']: h for h in abrir().todos()}
+    indice = IndiceHashes()
+    estado = {} if args.forzar else load_state()
+    pendientes, solo_marcadores, vigentes = [], [], set()
+    for tipo in TIPOS:
+        for mp3 in sorted((AUDIO_DIR / tipo).glob('*.mp3'), key=lambda p: p.stem):
+            if not mp3.stem.isdigit():
+                continue
+            numero = int(mp3.stem)
+            salida = output_path(tipo, numero)
+            vigentes.add(salida)
+            clave = salida.relative_to(BASE_DIR).as_posix()
+            sha = indice.sha(mp3)
+            marcadores = markers(himnos.get(numero, {}))
+            previo = estado.get(clave)
+            if previo and previo['sha256'] == sha and salida.exists():
+                if previo['marcadores'] != marcadores:
+                    solo_marcadores.append((clave, salida, marcadores))
+                continue
+            pendientes.append((clave, salida, marcadores, (tipo, mp3, sha)))
+    indice.guardar()
+
+    print(f"\n   {len(vigentes)} pistas: {len(pendientes)} por calcular, "
+          f"{len(solo_marcadores)} con marcadores nuevos")
+
+    for clave, salida, marcadores in solo_marcadores:
+        actual = decode(salida.read_bytes())
+        write_file(salida, encode(actual['picos'], actual['duracion_ms'], actual['escala'],
+                                  marcadores))
+        estado[clave]['marcadores'] = marcadores
+
+    inicio = time.perf_counter()
+    errores = 0
+    if pendientes:
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            futuros = {executor.submit(process_track, p[3]): p for p in pendientes}
+            for futuro in as_completed(futuros):
+                clave, salida, marcadores, (tipo, mp3, sha) = futuros[futuro]
+                try:
+                    picos, duracion_ms, escala = futuro.result()
+                except Exception as e:
+                    errores += 1
+                    print(f"   ✗ {clave}: {e}")
+                    continue
+                write_file(salida, encode(picos, duracion_ms, escala, marcadores))
+                estado[clave] = {'sha256': sha, 'marcadores': marcadores}
+                print(f"   ✓ {clave} ({duracion_ms / 1000:.0f} s)")
+        print(f"\n   Calculados en {time.perf_counter() - inicio:.1f} s, {errores} errores")
+
+    borrados = remove_stale(vigentes)
+    if borrados:
+        print(f"   🗑 {borrados} archivos .picos obsoletos borrados")
+    vigentes_claves = {p.relative_to(BASE_DIR).as_posix() for p in vigentes}
+    save_state({k: v for k, v in estado.items() if k in vigentes_claves})
+
+    tamaño = sum(p.stat().st_size for p in vigentes if p.exists())
+    if vigentes:
+        print(f"\n📊 {tamaño / 1024:.0f} KB en total, "
+              f"{tamaño / len(vigentes):.0f} bytes por pista")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Ejecuta el pipeline de datos del himnario re-ejecutando solo lo necesario.
+
+Cada etapa declara su script, sus dependencias y los archivos que lee y
+escribe. Antes de correr una etapa se calcula su huella: sha256 del código
+(el script y los módulos locales que importa), de los argumentos y del
+contenido de sus entradas. Si la huella coincide con la de la última
+ejecución y las salidas existen, la etapa se omite.
+
+Las etapas remotas (descargas) no se pueden fingerprintear porque su
+entrada es la red; se ejecutan siempre, pero como usan peticiones
+condicionales (manifiesto.py) y el catálogo solo exporta cuando algo
+cambió, una corrida sin novedades deja las entradas de las etapas
+siguientes intactas y estas se omiten.
+
+Las etapas independientes (p. ej. audio y fondos) corren en paralelo. La
+salida de cada script queda en .sync/logs/<etapa>.log.
+
+USO:
+    python scripts/pipeline.py                 # todo lo que esté desactualizado
+    python scripts/pipeline.py estrofas        # una etapa y sus dependencias
+    python scripts/pipeline.py --sin-red       # omitir las descargas
+    python scripts/pipeline.py --forzar        # ignorar las huellas guardadas
+    python scripts/pipeline.py --lista         # mostrar las etapas
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from manifiesto import BASE_DIR, SYNC_DIR, sha256_file
+
+SCRIPTS_DIR = Path(__file__).parent
+STATE_PATH = SYNC_DIR / "pipeline.json"
+LOGS_DIR = SYNC_DIR / "logs"
+
+HIMNOS_JSON = "assets/data/himnos.json"
+
+IMPORT_RE = re.compile(r'^\s*(?:from\s+(\w+)\s+import|import\s+(\w+))', re.MULTILINE)
+
+class Etapa:
+    """Una etapa del pipeline: un script con sus entradas y salidas"""
+
+    def __init__(self, nombre, script, args=(), depende=(), entradas=(), salidas=(),
+                 remota=False):
+        self.nombre = nombre
+        self.script = script
+        self.args = list(args)
+        self.depende = list(depende)
+        # Rutas relativas a la raíz del repositorio (archivos o directorios)
+        self.entradas = list(entradas)
+        self.salidas = list(salidas)
+        self.remota = remota
+
+# Orden en que antes se corrían los scripts a mano. Las etapas que
+# reescriben himnos.json van en cadena para no pisarse.
+ETAPAS = [
+    Etapa('api', 'descargar_api.py', salidas=[HIMNOS_JSON], remota=True),
+    Etapa('faltantes', 'agregar_faltantes.py', depende=['api'],
+          entradas=[HIMNOS_JSON], salidas=[HIMNOS_JSON]),
+    Etapa('estrofas', 'corregir_estrofas.py', depende=['faltantes'],
+          entradas=[HIMNOS_JSON], salidas=[HIMNOS_JSON]),
+    # temas arma la lista de fondos de cada himno con lo que hay en assets/backgrounds
+    Etapa('temas', 'clasificar_temas.py', depende=['estrofas', 'fondos'],
+          entradas=[HIMNOS_JSON, 'assets/backgrounds'], salidas=[HIMNOS_JSON]),
+    Etapa('audio', 'descargar_audio.py', args=['--workers', '8'], depende=['estrofas'],
+          entradas=[HIMNOS_JSON], salidas=['assets/audio'], remota=True),
+    Etapa('escaneo', 'escanear_audio.py', depende=['audio'],
+          entradas=['assets/audio/cantado', 'assets/audio/instrumental']),
+    Etapa('timestamps', 'analizar_estrofas.py', args=['--pendientes'],
+          depende=['temas', 'audio'],
+          entradas=[HIMNOS_JSON, 'assets/audio/cantado'],
+          salidas=[HIMNOS_JSON, 'assets/data/low_confidence_himnos.json']),
+    Etapa('compacto', 'exportar_compacto.py', depende=['timestamps'],
+          entradas=[HIMNOS_JSON], salidas=['assets/data/compacto']),
+    Etapa('busqueda', 'indice_busqueda.py', args=['construir'], depende=['timestamps'],
+          entradas=[HIMNOS_JSON], salidas=['.sync/busqueda.json']),
+    Etapa('picos', 'picos_audio.py', depende=['timestamps'],
+          entradas=[HIMNOS_JSON, 'assets/audio/cantado', 'assets/audio/instrumental'],
+          salidas=['assets/audio/picos']),
+    Etapa('fondos', 'descargar_fondos.py', salidas=['assets/backgrounds'], remota=True),
+    Etapa('imagenes', 'procesar_fondos.py', depende=['fondos'],
+          entradas=['assets/backgrounds'],
+          salidas=['assets/fondos', 'assets/data/fondos_variantes.json']),
+    Etapa('duplicados', 'duplicados_fondos.py', depende=['fondos'],
+          entradas=['assets/backgrounds']),
+    Etapa('placeholders', 'placeholders_fondos.py', depende=['fondos'],
+          entradas=['assets/backgrounds'], salidas=['assets/data/fondos_placeholders.json']),
+]
+
+def local_modules(script, vistos=None):
+    """El script y los módulos de scripts/ que importa, recursivamente"""
+    vistos = set() if vistos is None else vistos
+    path = SCRIPTS_DIR / script
+    if script in vistos or not path.exists():
+        return vistos
+    vistos.add(script)
+    for match in IMPORT_RE.finditer(path.read_text(encoding='utf-8')):
+        modulo = (match.group(1) or match.group(2)) + '.py'
+        local_modules(modulo, vistos)
+    return vistos
+
+def hash_path(path):
+    """sha256 de un archivo o de todos los archivos de un directorio"""
+    h = hashlib.sha256()
+    if path.is_dir():
+        for archivo in sorted(p for p in path.rglob('*') if p.is_file()):
+            h.update(str(archivo.relative_to(path)).encode('utf-8'))
+            h.update(sha256_file(archivo).encode('ascii'))
+    elif path.exists():
+        h.update(sha256_file(path).encode('ascii'))
+    else:
+        h.update(b'<no existe>')
+    return h.hexdigest()
+
+def fingerprint(etapa):
+    """Huella de la etapa: código, argumentos y contenido de las entradas"""
+    h = hashlib.sha256()
+    for modulo in sorted(local_modules(etapa.script)):
+        h.update(modulo.encode('utf-8'))
+        h.update(sha256_file(SCRIPTS_DIR / modulo).encode('ascii'))
+    h.update(json.dumps(etapa.args).encode('utf-8'))
+    for entrada in etapa.entradas:
+        h.update(entrada.encode('utf-8'))
+        h.update(hash_path(BASE_DIR / entrada).encode('ascii'))
+    return h.hexdigest()
+
+def load_state(path=STATE_PATH):
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_state(state, path=STATE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+def is_fresh(etapa, huella, state):
+    """
+    Al día si la huella coincide con la de la última ejecución o con la
+    calculada al final de esa corrida (las etapas que reescriben himnos.json
+    en cadena cambian las entradas de las anteriores).
+    """
+    previo = state.get(etapa.nombre)
+    if not previo or huella not in (previo.get('huella'), previo.get('huella_final')):
+        return False
+    return all((BASE_DIR / salida).exists() for salida in etapa.salidas)
+
+def select(nombres):
+    """Etapas pedidas más sus dependencias, en el orden declarado"""
+    por_nombre = {e.nombre: e for e in ETAPAS}
+    elegidas = set()
+
+    def agregar(nombre):
+        if nombre in elegidas:
+            return
+        elegidas.add(nombre)
+        for dep in por_nombre[nombre].depende:
+            agregar(dep)
+
+    for nombre in nombres or por_nombre:
+        agregar(nombre)
+    return [e for e in ETAPAS if e.nombre in elegidas]
+
+def run_stage(etapa):
+    """Ejecuta el script de la etapa desde la raíz del repo; retorna (ok, segundos)"""
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    inicio = time.monotonic()
+    with open(LOGS_DIR / f"{etapa.nombre}.log", 'w', encoding='utf-8') as log:
+        proceso = subprocess.run(
+            [sys.executable, str(SCRIPTS_DIR / etapa.script), *etapa.args],
+            cwd=BASE_DIR, stdout=log, stderr=subprocess.STDOUT)
+    return proceso.returncode == 0, time.monotonic() - inicio
+
+def run_pipeline(etapas, state, forzar=False, sin_red=False, workers=None):
+    """
+    Ejecuta las etapas respetando dependencias, en paralelo cuando se puede.
+    Retorna {nombre: (estado, segundos)} con estado 'ok', 'al día',
+    'omitida' o 'error'.
+    """
+    resultados = {}
+    lock = threading.Lock()
+    nombres = {e.nombre for e in etapas}
+    pendientes = list(etapas)
+    en_curso = {}
+
+    def ejecutar(etapa):
+        if etapa.remota and sin_red:
+            return 'omitida', 0.0
+        # La huella se calcula recién ahora: las dependencias ya escribieron
+        huella = fingerprint(etapa)
+        if not etapa.remota and not forzar and is_fresh(etapa, huella, state):
+            return 'al día', 0.0
+        ok, segundos = run_stage(etapa)
+        if ok:
+            with lock:
+                state[etapa.nombre] = {'huella': huella, 'segundos': round(segundos, 2),
+                                       'fecha': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        return ('ok' if ok else 'error'), segundos
+
+    with ThreadPoolExecutor(max_workers=workers or len(etapas) or 1) as executor:
+        while pendientes or en_curso:
+            for etapa in list(pendientes):
+                deps = [d for d in etapa.depende if d in nombres]
+                if any(resultados.get(d, ('',))[0] == 'error' for d in deps):
+                    resultados[etapa.nombre] = ('error', 0.0)
+                    print(f"   ✗ {etapa.nombre}: dependencia con error, no se ejecuta")
+                    pendientes.remove(etapa)
+                elif all(d in resultados for d in deps):
+                    print(f"   ▶ {etapa.nombre}")
+                    en_curso[executor.submit(ejecutar, etapa)] = etapa
+                    pendientes.remove(etapa)
+            if not en_curso:
+                continue
+            listos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in listos:
+                etapa = en_curso.pop(futuro)
+                estado, segundos = futuro.result()
+                resultados[etapa.nombre] = (estado, segundos)
+                icono = {'ok': '✓', 'al día': '=', 'omitida': '-', 'error': '✗'}[estado]
+                detalle = f" (ver {LOGS_DIR / (etapa.nombre + '.log')})" if estado == 'error' else ''
+                print(f"   {icono} {etapa.nombre}: {estado} {segundos:.1f} s{detalle}")
+
+    # Huella de cada etapa con las entradas tal como quedaron al final
+    for etapa in etapas:
+        if etapa.nombre in state and resultados[etapa.nombre][0] in ('ok', 'al día'):
+            state[etapa.nombre]['huella_final'] = fingerprint(etapa)
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline de datos del himnario")
+    parser.add_argument('etapas', nargs='*', help="etapas a ejecutar (por defecto todas)")
+    parser.add_argument('--forzar', action='store_true', help="ignorar las huellas guardadas")
+    parser.add_argument('--sin-red', action='store_true', help="omitir las etapas de descarga")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="etapas simultáneas como máximo")
+    parser.add_argument('--lista', action='store_true', help="mostrar las etapas y salir")
+    args = parser.parse_args()
+
+    validas = [e.nombre for e in ETAPAS]
+    for nombre in args.etapas:
+        if nombre not in validas:
+            parser.error(f"etapa desconocida: {nombre} (válidas: {', '.join(validas)})")
+
+    if args.lista:
+        for e in ETAPAS:
+            deps = f" ← {', '.join(e.depende)}" if e.depende else ''
+            remota = ' [red]' if e.remota else ''
+            print(f"  {e.nombre:12s} {e.script}{remota}{deps}")
+        return
+
+    print("=" * 60)
+    print("PIPELINE DE DATOS")
+    print("=" * 60)
+
+    state = load_state()
+    inicio = time.monotonic()
+    etapas = select(args.etapas)
+    resultados = run_pipeline(etapas, state, forzar=args.forzar,
+                              sin_red=args.sin_red, workers=args.workers)
+    save_state(state)
+
+    print(f"\n  {'etapa':12s} {'estado':8s} {'tiempo':>8s}")
+    for etapa in etapas:
+        estado, segundos = resultados[etapa.nombre]
+        print(f"  {etapa.nombre:12s} {estado:8s} {segundos:7.1f}s")
+    print(f"\n  Total: {time.monotonic() - inicio:.1f} s")
+
+    if any(estado == 'error' for estado, _ in resultados.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
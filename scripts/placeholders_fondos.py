@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Placeholders borrosos de los fondos, calculados en build.
+
+Para que el reproductor pinte algo mientras se decodifica el fondo real,
+este script calcula para cada imagen de assets/backgrounds/:
+
+- blurhash: cadena BlurHash estándar (4x3 componentes), decodificable por
+  cualquier implementación.
+- miniatura: PNG de pocos píxeles en base64, que la app pinta ampliada y
+  desenfocada sin dependencias extra.
+- color: color promedio (#rrggbb).
+
+Todas las imágenes se reducen a la misma grilla y se apilan en un solo
+arreglo de NumPy; la conversión a lineal y la DCT de BlurHash se hacen en
+lote con einsum. El resultado va a assets/data/fondos_placeholders.json,
+indexado por ruta de asset, y solo se reescribe si cambió.
+
+USO:
+    python scripts/placeholders_fondos.py
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import time
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from catalogo import BASE_DIR, JSON_PATH
+from procesar_fondos import list_sources
+
+MANIFEST_PATH = JSON_PATH.parent / "fondos_placeholders.json"
+
+COMPONENTES_X = 4
+COMPONENTES_Y = 3
+# Grilla a la que se reduce cada imagen antes de la DCT
+GRILLA = (64, 36)
+MINIATURA = (8, 5)
+
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+def encode83(valor, largo):
+    return ''.join(BASE83[(valor // 83 ** (largo - i - 1)) % 83] for i in range(largo))
+
+def srgb_to_linear(valores):
+    v = valores / 255.0
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+def linear_to_srgb(valores):
+    v = np.clip(valores, 0.0, 1.0)
+    srgb = np.where(v <= 0.0031308, v * 12.92, 1.055 * v ** (1 / 2.4) - 0.055)
+    return (srgb * 255 + 0.5).astype(np.int64)
+
+def load_batch(fuentes, grilla=GRILLA, miniatura=MINIATURA):
+    """
+    Retorna (arreglo (N, alto, ancho, 3) uint8, miniaturas PNG, tamaños originales).
+    """
+    pixeles, miniaturas, tamaños = [], [], []
+    for fuente in fuentes:
+        with Image.open(fuente) as original:
+            tamaños.append(original.size)
+            # draft hace que el JPEG se decodifique ya reducido
+            original.draft('RGB', (grilla[0] * 2, grilla[1] * 2))
+            imagen = ImageOps.exif_transpose(original).convert('RGB')
+            pixeles.append(np.asarray(imagen.resize(grilla, Image.BILINEAR)))
+            buffer = io.BytesIO()
+            imagen.resize(miniatura, Image.BOX).save(buffer, 'PNG', optimize=True)
+            miniaturas.append(base64.b64encode(buffer.getvalue()).decode('ascii'))
+    return np.stack(pixeles), miniaturas, tamaños
+
+def blurhash_factors(lote, cx=COMPONENTES_X, cy=COMPONENTES_Y):
+    """Factores DCT de BlurHash de todo el lote: (N, cy, cx, 3)"""
+    _, alto, ancho, _ = lote.shape
+    lineal = srgb_to_linear(lote.astype(np.float64))
+    base_x = np.cos(np.pi * np.arange(cx)[:, None] * np.arange(ancho)[None, :] / ancho)
+    base_y = np.cos(np.pi * np.arange(cy)[:, None] * np.arange(alto)[None, :] / alto)
+    factores = np.einsum('nhwc,jh,iw->njic', lineal, base_y, base_x) / (ancho * alto)
+    normalizacion = np.full((cy, cx), 2.0)
+    normalizacion[0, 0] = 1.0
+    return factores * normalizacion[None, :, :, None]
+
+def encode_blurhash(factores):
+    """Cadena BlurHash de los factores (cy, cx, 3) de una imagen"""
+    cy, cx, _ = factores.shape
+    dc = factores[0, 0]
+    ac = factores.reshape(-1, 3)[1:]
+
+    hash_ = encode83((cx - 1) + (cy - 1) * 9, 1)
+    if len(ac):
+        cuantizado = int(max(0, min(82, np.floor(np.abs(ac).max() * 166 - 0.5))))
+        maximo = (cuantizado + 1) / 166
+        hash_ += encode83(cuantizado, 1)
+    else:
+        maximo = 1.0
+        hash_ += encode83(0, 1)
+
+    r, g, b = linear_to_srgb(dc)
+    hash_ += encode83((int(r) << 16) + (int(g) << 8) + int(b), 4)
+
+    q = np.floor(np.sign(ac / maximo) * np.abs(ac / maximo) ** 0.5 * 9 + 9.5)
+    q = np.clip(q, 0, 18).astype(np.int64)
+    for qr, qg, qb in q:
+        hash_ += encode83(int(qr) * 19 * 19 + int(qg) * 19 + int(qb), 2)
+    return hash_
+
+def build_manifest(fuentes):
+    """{ruta de asset: {blurhash, miniatura, color, ancho, alto}}"""
+    if not fuentes:
+        return {}
+    lote, miniaturas, tamaños = load_batch(fuentes)
+    factores = blurhash_factors(lote)
+    promedios = lote.reshape(len(fuentes), -1, 3).mean(axis=1).round().astype(int)
+    manifest = {}
+    for i, fuente in enumerate(fuentes):
+        r, g, b = promedios[i]
+        manifest[fuente.relative_to(BASE_DIR).as_posix()] = {
+            'blurhash': encode_blurhash(factores[i]),
+            'miniatura': miniaturas[i],
+            'color': f"#{r:02x}{g:02x}{b:02x}",
+            'ancho': tamaños[i][0],
+            'alto': tamaños[i][1],
+        }
+    return manifest
+
+def write_manifest(manifest, path=MANIFEST_PATH):
+    """Escribe el manifiesto si cambió; retorna True si escribió"""
+    data = json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+    if path.exists() and path.read_bytes() == data:
+        return False
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+def main():
+    argparse.ArgumentParser(description="Placeholders borrosos de los fondos").parse_args()
+
+    print("=" * 60)
+    print("PLACEHOLDERS DE FONDOS")
+    print("=" * 60)
+
+    fuentes = [f for _, f in list_sources()]
+    inicio = time.perf_counter()
+    manifest = build_manifest(fuentes)
+    print(f"\n   {len(manifest)} imágenes en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    if write_manifest(manifest):
+        print(f"   ✓ Guardado {MANIFEST_PATH} ({MANIFEST_PATH.stat().st_size / 1024:.1f} KB)")
+    else:
+        print(f"   = Sin cambios en {MANIFEST_PATH}")
+
+if __name__ == "__main__":
+    main()
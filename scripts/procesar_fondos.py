@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Genera variantes redimensionadas de los fondos para la app.
+
+Las imágenes de assets/backgrounds/<categoria>/ son de hasta ~3000 px y la
+app las decodificaba a tamaño completo incluso en teléfonos. Este script
+produce, por cada imagen, una variante por tamaño en
+assets/fondos/<variante>/<archivo> (JPEG progresivo o WebP), nunca más
+grande que el original.
+
+Las imágenes se procesan en paralelo en un pool de procesos. El sha256 de
+cada fuente y los parámetros de codificación se guardan en
+.sync/fondos_variantes.json; si no cambiaron y las variantes existen, la
+imagen se omite. Al final se reporta cuánto se ahorra por categoría.
+
+La app no arma la ruta de la variante a mano: assets/data/fondos_variantes.json
+indica, por cada fondo original, el archivo de cada variante (con la extensión
+del formato con que se generó). Los originales no van en el bundle.
+
+USO:
+    python scripts/procesar_fondos.py
+    python scripts/procesar_fondos.py --formato webp --calidad 75
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+from manifiesto import BASE_DIR, SYNC_DIR, sha256_file
+
+SOURCE_DIR = BASE_DIR / "assets" / "backgrounds"
+OUTPUT_DIR = BASE_DIR / "assets" / "fondos"
+CACHE_PATH = SYNC_DIR / "fondos_variantes.json"
+MANIFEST_PATH = BASE_DIR / "assets" / "data" / "fondos_variantes.json"
+
+# Caja máxima (ancho, alto) de cada variante; se conserva la proporción
+VARIANTES = {
+    'miniatura': (320, 180),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+}
+EXTENSIONES = ('.jpg', '.jpeg', '.png', '.webp')
+DEFAULT_FORMATO = 'jpg'
+DEFAULT_CALIDAD = 80
+
+def list_sources(source_dir=SOURCE_DIR):
+    """[(categoria, ruta)] de todas las imágenes fuente"""
+    fuentes = []
+    for carpeta in sorted(p for p in source_dir.iterdir() if p.is_dir()):
+        for imagen in sorted(carpeta.iterdir()):
+            if imagen.suffix.lower() in EXTENSIONES:
+                fuentes.append((carpeta.name, imagen))
+    return fuentes
+
+def output_path(fuente, variante, formato, output_dir=OUTPUT_DIR):
+    return output_dir / variante / f"{fuente.stem}.{formato}"
+
+def save_image(imagen, path, formato, calidad):
+    tmp = path.with_name(path.name + '.tmp')
+    if formato == 'webp':
+        imagen.save(tmp, 'WEBP', quality=calidad, method=6)
+    else:
+        imagen.save(tmp, 'JPEG', quality=calidad, optimize=True, progressive=True)
+    os.replace(tmp, path)
+
+def process_image(tarea):
+    """
+    Genera las variantes de una imagen (corre en un proceso del pool).
+    Retorna {variante: bytes}.
+    """
+    fuente, formato, calidad, output_dir = tarea
+    tamaños = {}
+    with Image.open(fuente) as original:
+        imagen = ImageOps.exif_transpose(original).convert('RGB')
+        for variante, caja in VARIANTES.items():
+            copia = imagen.copy()
+            # thumbnail nunca agranda; reducing_gap acelera la reducción grande
+            copia.thumbnail(caja, Image.LANCZOS, reducing_gap=3.0)
+            path = output_path(fuente, variante, formato, output_dir)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            save_image(copia, path, formato, calidad)
+            tamaños[variante] = path.stat().st_size
+    return tamaños
+
+def load_cache(path=CACHE_PATH):
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_cache(cache, path=CACHE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp, path)
+
+def is_cached(entrada, sha, parametros, fuente, formato, output_dir):
+    return (entrada and entrada.get('sha256') == sha and entrada.get('parametros') == parametros
+            and all(output_path(fuente, v, formato, output_dir).exists() for v in VARIANTES))
+
+def remove_stale(fuentes, formato, output_dir=OUTPUT_DIR):
+    """Borra variantes cuyas fuentes ya no existen o de otro formato"""
+    esperados = {output_path(f, v, formato, output_dir) for _, f in fuentes for v in VARIANTES}
+    borrados = 0
+    for variante in VARIANTES:
+        carpeta = output_dir / variante
+        if not carpeta.exists():
+            continue
+        for path in carpeta.iterdir():
+            if path.is_file() and path not in esperados:
+                path.unlink()
+                borrados += 1
+    return borrados
+
+def build_manifest(fuentes, formato, output_dir=OUTPUT_DIR):
+    """{ruta del original: {variante: ruta de asset}} de las variantes que existen"""
+    manifest = {}
+    for _, fuente in fuentes:
+        variantes = {}
+        for variante in VARIANTES:
+            path = output_path(fuente, variante, formato, output_dir)
+            if path.exists():
+                variantes[variante] = path.relative_to(BASE_DIR).as_posix()
+        if variantes:
+            manifest[fuente.relative_to(BASE_DIR).as_posix()] = variantes
+    return manifest
+
+def write_manifest(manifest, path=MANIFEST_PATH):
+    """Escribe el manifiesto si cambió; retorna True si escribió"""
+    data = json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+    if path.exists() and path.read_bytes() == data:
+        return False
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+def report(fuentes, cache):
+    """Bytes de las fuentes y de cada variante por categoría"""
+    totales = {}
+    for categoria, fuente in fuentes:
+        entrada = cache.get(fuente.relative_to(BASE_DIR).as_posix(), {})
+        t = totales.setdefault(categoria, dict.fromkeys(['fuente', *VARIANTES], 0))
+        t['fuente'] += fuente.stat().st_size
+        for variante, n in entrada.get('bytes', {}).items():
+            t[variante] += n
+
+    kb = lambda n: f"{n / 1024:9.1f}"
+    print(f"\n   {'categoría':16s} {'fuente KB':>9s} " +
+          ' '.join(f"{v + ' KB':>13s}" for v in VARIANTES) + f" {'ahorro 1080p':>13s}")
+    suma = dict.fromkeys(['fuente', *VARIANTES], 0)
+    for categoria, t in sorted(totales.items()):
+        for k in suma:
+            suma[k] += t[k]
+        ahorro = (1 - t['1080p'] / t['fuente']) * 100 if t['fuente'] else 0
+        print(f"   {categoria:16s} {kb(t['fuente'])} " +
+              ' '.join(f"{kb(t[v]):>13s}" for v in VARIANTES) + f" {ahorro:12.0f}%")
+    if suma['fuente']:
+        print(f"   {'TOTAL':16s} {kb(suma['fuente'])} " +
+              ' '.join(f"{kb(suma[v]):>13s}" for v in VARIANTES) +
+              f" {(1 - suma['1080p'] / suma['fuente']) * 100:12.0f}%")
+        print(f"\n   En un teléfono (720p) se cargan {suma['720p'] / 1024 / 1024:.1f} MB "
+              f"en lugar de {suma['fuente'] / 1024 / 1024:.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Variantes redimensionadas de los fondos")
+    parser.add_argument('--formato', choices=['jpg', 'webp'], default=DEFAULT_FORMATO)
+    parser.add_argument('--calidad', type=int, default=DEFAULT_CALIDAD)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--forzar', action='store_true', help="ignorar la caché")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("PROCESANDO FONDOS")
+    print("=" * 60)
+
+    fuentes = list_sources()
+    nombres = [f.stem for _, f in fuentes]
+    repetidos = {n for n in nombres if nombres.count(n) > 1}
+    if repetidos:
+        print(f"\n✗ Nombres repetidos entre categorías: {', '.join(sorted(repetidos))}")
+        return
+
+    cache = {} if args.forzar else load_cache()
+    parametros = {'formato': args.formato, 'calidad': args.calidad, 'variantes': VARIANTES}
+    parametros = json.loads(json.dumps(parametros))
+
+    pendientes = []
+    for _, fuente in fuentes:
+        clave = fuente.relative_to(BASE_DIR).as_posix()
+        sha = sha256_file(fuente)
+        if is_cached(cache.get(clave), sha, parametros, fuente, args.formato, OUTPUT_DIR):
+            continue
+        pendientes.append((clave, sha, fuente))
+
+    print(f"\n   {len(fuentes)} imágenes, {len(pendientes)} por procesar "
+          f"({len(fuentes) - len(pendientes)} sin cambios)")
+
+    if pendientes:
+        tareas = [(fuente, args.formato, args.calidad, OUTPUT_DIR) for _, _, fuente in pendientes]
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            for (clave, sha, fuente), tamaños in zip(pendientes,
+                                                     executor.map(process_image, tareas)):
+                cache[clave] = {'sha256': sha, 'parametros': parametros, 'bytes': tamaños}
+                print(f"   ✓ {clave}")
+
+    vigentes = {f.relative_to(BASE_DIR).as_posix() for _, f in fuentes}
+    cache = {k: v for k, v in cache.items() if k in vigentes}
+    borrados = remove_stale(fuentes, args.formato)
+    if borrados:
+        print(f"   🗑 {borrados} variantes obsoletas borradas")
+    save_cache(cache)
+    if write_manifest(build_manifest(fuentes, args.formato)):
+        print(f"   ✓ Guardado {MANIFEST_PATH.relative_to(BASE_DIR)}")
+
+    report(fuentes, cache)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de los descargadores contra el servidor simulado.
+
+Levanta servidor_simulado.py en un puerto libre, ejecuta cada descargador
+(api, himnos en modo tarball y contents, audio, fondos) apuntando a él, con
+todas las salidas en un directorio temporal, y reporta peticiones/s, MB/s,
+errores inyectados por el servidor y tiempo total.
+
+USO:
+    python scripts/prueba_carga.py --himnos 100 --latencia 30 --errores 0.05
+    python scripts/prueba_carga.py --descargadores audio --workers 16 --ancho-banda 2mb
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Sin caché: cada corrida debe pasar por la red simulada
+for variable in ('HIMNARIO_CACHE', 'HIMNARIO_CACHE_OFFLINE'):
+    os.environ.pop(variable, None)
+
+from catalogo import Catalogo
+from manifiesto import Manifiesto
+from peticiones import Cliente
+from servidor_simulado import add_server_arguments, server_from_args
+
+DESCARGADORES = ['api', 'himnos-tarball', 'himnos-contents', 'audio', 'fondos']
+
+@contextlib.contextmanager
+def parcheado(modulo, **valores):
+    """Reemplaza atributos de un módulo durante la corrida"""
+    originales = {nombre: getattr(modulo, nombre) for nombre in valores}
+    for nombre, valor in valores.items():
+        setattr(modulo, nombre, valor)
+    try:
+        yield
+    finally:
+        for nombre, valor in originales.items():
+            setattr(modulo, nombre, valor)
+
+@contextlib.contextmanager
+def ejecucion(tmp, argv, verbose):
+    """cwd temporal, sys.argv del script y salida silenciada"""
+    cwd, argv_original = os.getcwd(), sys.argv
+    os.chdir(tmp)
+    sys.argv = argv
+    salida = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with salida:
+            yield
+    finally:
+        os.chdir(cwd)
+        sys.argv = argv_original
+
+def manifiesto_en(tmp):
+    return lambda: Manifiesto(Path(tmp) / "manifest.jsonl")
+
+def run_api(base, tmp, args):
+    import descargar_api as mod
+    with parcheado(mod, API_BASE=base, API_SYNC_DIR=Path(tmp) / "api",
+                   Manifiesto=manifiesto_en(tmp),
+                   Catalogo=lambda: Catalogo(Path(tmp) / "catalogo.sqlite")):
+        with ejecucion(tmp, ['descargar_api.py', '--workers', str(args.workers),
+                             '--rate', str(args.rate)], args.verbose):
+            mod.main()
+
+def run_himnos(modo):
+    def run(base, tmp, args):
+        import descargar_himnos as mod
+        repo = f"{base}/repos/Claudio-Osorio/himnario-adventista"
+        with parcheado(mod, REPO_API=repo, CLIENTE=Cliente()):
+            with ejecucion(tmp, ['descargar_himnos.py', '--modo', modo], args.verbose):
+                mod.main()
+    return run
+
+def run_audio(base, tmp, args):
+    import descargar_audio as mod
+    audio_dir = Path(tmp) / "audio"
+    json_path = Path(tmp) / "himnos.json"
+    himnos = [{'numero': n, 'titulo': f"Himno {n}",
+               'mp3Cantado': f"{base}/uc?export=download&id=c{n}",
+               'mp3Instrumental': f"{base}/uc?export=download&id=i{n}"}
+              for n in range(1, args.himnos + 1)]
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(himnos, f)
+    with parcheado(mod, JSON_PATH=json_path, AUDIO_DIR=audio_dir,
+                   CANTADO_DIR=audio_dir / "cantado",
+                   INSTRUMENTAL_DIR=audio_dir / "instrumental",
+                   Manifiesto=manifiesto_en(tmp)):
+        with ejecucion(tmp, ['descargar_audio.py', '--workers', str(args.workers),
+                             '--por-host', str(args.por_host)], args.verbose):
+            mod.main()
+
+def run_fondos(base, tmp, args):
+    import descargar_fondos as mod
+    with parcheado(mod, OUTPUT_DIR=Path(tmp) / "backgrounds",
+                   UNSPLASH_URL=f"{base}/unsplash/{{size}}/?{{query}}",
+                   CLIENTE=Cliente(max_por_host=1), Manifiesto=manifiesto_en(tmp)):
+        with ejecucion(tmp, ['descargar_fondos.py'], args.verbose):
+            mod.main()
+
+RUNNERS = {
+    'api': run_api,
+    'himnos-tarball': run_himnos('tarball'),
+    'himnos-contents': run_himnos('contents'),
+    'audio': run_audio,
+    'fondos': run_fondos,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de los descargadores")
+    add_server_arguments(parser)
+    parser.add_argument('--descargadores', default=','.join(DESCARGADORES),
+                        help=f"lista separada por comas: {', '.join(DESCARGADORES)}")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--por-host', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=100.0,
+                        help="peticiones/s máximas de descargar_api")
+    parser.add_argument('--json', action='store_true', help="imprimir resultados en JSON")
+    parser.add_argument('--verbose', action='store_true', help="mostrar la salida de los scripts")
+    args = parser.parse_args()
+
+    elegidos = [d.strip() for d in args.descargadores.split(',') if d.strip()]
+    for d in elegidos:
+        if d not in RUNNERS:
+            parser.error(f"descargador desconocido: {d}")
+
+    servidor = server_from_args(args).iniciar()
+    resultados = {}
+    try:
+        for nombre in elegidos:
+            servidor.stats.reset()
+            with tempfile.TemporaryDirectory() as tmp:
+                inicio = time.monotonic()
+                RUNNERS[nombre](servidor.base_url, tmp, args)
+                total = time.monotonic() - inicio
+            stats = servidor.stats.snapshot()
+            resultados[nombre] = {
+                'peticiones': stats['peticiones'],
+                'peticiones_s': round(stats['peticiones'] / total, 1),
+                'mb': round(stats['bytes'] / 1024 / 1024, 2),
+                'mb_s': round(stats['bytes'] / 1024 / 1024 / total, 2),
+                'errores_inyectados': sum(stats['errores'].values()),
+                'errores': stats['errores'],
+                'tiempo_s': round(total, 2),
+            }
+            if not args.json:
+                r = resultados[nombre]
+                print(f"  {nombre:16s} {r['peticiones']:6d} pet | {r['peticiones_s']:8.1f} pet/s | "
+                      f"{r['mb']:8.2f} MB | {r['mb_s']:7.2f} MB/s | "
+                      f"{r['errores_inyectados']:4d} errores inyectados | {r['tiempo_s']:7.2f} s")
+    finally:
+        servidor.shutdown()
+
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+
+if __name__ == "__main__":
+    main()
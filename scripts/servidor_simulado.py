@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita a los orígenes de datos del himnario, para medir
+los descargadores sin tocar sdah.my.to, GitHub, Google Drive ni Unsplash.
+
+Rutas:
+    /hymn, /hymn/<n>                    API de himnos (con ETag / 304)
+    /repos/<o>/<r>/contents?page=N      API de contenidos de GitHub, paginada
+    /repos/<o>/<r>/tarball              tarball del repositorio de letras
+    /raw/<archivo>.txt                  download_url de cada letra
+    /uc?export=download&id=<id>         Drive: página de confirmación y luego MP3
+    /unsplash/<size>/?<query>           redirección a /images/<id>.jpg
+    /__stats                            contadores del servidor (JSON)
+
+Se puede configurar latencia, ancho de banda por conexión y errores
+inyectados (403 con X-RateLimit, 429 con Retry-After, 503).
+
+USO:
+    python scripts/servidor_simulado.py --puerto 8080 --latencia 50 --errores 0.05
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import random
+import re
+import tarfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+DEFAULT_HIMNOS = 614
+DEFAULT_MP3_KB = 256
+DEFAULT_IMAGEN_KB = 128
+DEFAULT_POR_PAGINA = 100
+CHUNK = 16 * 1024
+
+RANGE_RE = re.compile(r'bytes=(\d+)-')
+HYMN_RE = re.compile(r'^/hymn/(\d+)$')
+RAW_RE = re.compile(r'^/raw/(\d+)\.txt$')
+
+def parse_bandwidth(value):
+    """'512kb', '2mb' o bytes por segundo; 0 = sin límite"""
+    value = str(value).strip().lower()
+    for sufijo, factor in (('kb', 1024), ('mb', 1024 * 1024)):
+        if value.endswith(sufijo):
+            return int(float(value[:-len(sufijo)]) * factor)
+    return int(float(value or 0))
+
+class Corpus:
+    """Datos sintéticos deterministas que sirve el servidor"""
+
+    def __init__(self, himnos=DEFAULT_HIMNOS, mp3_kb=DEFAULT_MP3_KB,
+                 imagen_kb=DEFAULT_IMAGEN_KB, owner='Claudio-Osorio',
+                 repo='himnario-adventista'):
+        self.himnos = himnos
+        self.owner = owner
+        self.repo = repo
+        # Mismo cuerpo para todos los MP3/imágenes: solo importa el tamaño
+        self.mp3 = b'ID3\x04\x00\x00\x00\x00\x00\x00' + bytes(mp3_kb * 1024)
+        self.imagen = b'\xff\xd8\xff\xe0' + bytes(imagen_kb * 1024) + b'\xff\xd9'
+        self._tarball = None
+        self._lock = threading.Lock()
+
+    def titulo(self, n):
+        return f"Himno de prueba {n}"
+
+    def letra(self, n):
+        estrofas = [f"{i}\nLinea uno de la estrofa {i}\nLinea dos del himno {n}"
+                    for i in range(1, 4)]
+        return f"Himno #{n} {self.titulo(n)}\n" + "\n".join(estrofas) + \
+            "\nCoro:\nCoro del himno\ncon dos lineas\n"
+
+    def nombre_archivo(self, n):
+        return f"{n} - Himno #{n} {self.titulo(n)}.txt"
+
+    def detalle(self, n, base):
+        return {
+            'number': n,
+            'title': self.titulo(n),
+            'mp3Url': f"{base}/uc?export=download&id=c{n}",
+            'mp3UrlInstr': f"{base}/uc?export=download&id=i{n}",
+            'bibleReference': 'Salmos 100:1',
+            'verses': [
+                {'number': i, 'contents': [{'content': f"Linea {j} de la estrofa {i}"}
+                                           for j in range(1, 5)]}
+                for i in range(1, 4)
+            ] + [{'number': 0, 'contents': [{'content': 'Coro del himno'}]}],
+        }
+
+    def tarball(self):
+        with self._lock:
+            if self._tarball is None:
+                buffer = io.BytesIO()
+                prefijo = f"{self.owner}-{self.repo}-0000000"
+                with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+                    for n in range(1, self.himnos + 1):
+                        data = self.letra(n).encode('utf-8')
+                        info = tarfile.TarInfo(f"{prefijo}/{self.nombre_archivo(n)}")
+                        info.size = len(data)
+                        tar.addfile(info, io.BytesIO(data))
+                self._tarball = buffer.getvalue()
+            return self._tarball
+
+class Estadisticas:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.peticiones = 0
+            self.bytes = 0
+            self.errores = {}
+
+    def registrar(self, status, enviados):
+        with self.lock:
+            self.peticiones += 1
+            self.bytes += enviados
+            if status in (403, 429, 503):
+                self.errores[str(status)] = self.errores.get(str(status), 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {'peticiones': self.peticiones, 'bytes': self.bytes,
+                    'errores': dict(self.errores)}
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def base(self):
+        host = self.headers.get('Host') or f"127.0.0.1:{self.server.server_port}"
+        return f"http://{host}"
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path, query = parsed.path, parse_qs(parsed.query)
+
+        if path == '/__stats':
+            return self.send_json(self.server.stats.snapshot(), contar=False)
+
+        if self.server.latencia:
+            time.sleep(self.server.latencia)
+        if self.inject_error():
+            return
+
+        corpus = self.server.corpus
+        if path == '/hymn':
+            lista = [{'number': n, 'title': corpus.titulo(n)}
+                     for n in range(1, corpus.himnos + 1)]
+            return self.send_json(lista, etag=True)
+
+        match = HYMN_RE.match(path)
+        if match:
+            n = int(match.group(1))
+            if not 1 <= n <= corpus.himnos:
+                return self.send_body(404, b'', 'application/json')
+            return self.send_json(corpus.detalle(n, self.base), etag=True)
+
+        repo = f"/repos/{corpus.owner}/{corpus.repo}"
+        if path == f"{repo}/contents":
+            return self.send_contents(query)
+        if path == f"{repo}/tarball":
+            return self.send_body(200, corpus.tarball(), 'application/x-gzip')
+
+        match = RAW_RE.match(path)
+        if match:
+            return self.send_body(200, corpus.letra(int(match.group(1))).encode('utf-8'),
+                                  'text/plain; charset=utf-8')
+
+        if path == '/uc':
+            if 'confirm' not in query:
+                pagina = (b'<!DOCTYPE html><html><body><form action="/uc">'
+                          b'<input type="hidden" name="confirm" value="t">'
+                          b'<input type="hidden" name="uuid" value="0000-simulado">'
+                          b'</form></body></html>')
+                return self.send_body(200, pagina, 'text/html; charset=utf-8')
+            return self.send_body(200, corpus.mp3, 'audio/mpeg', rangos=True,
+                                  etag=hashlib.md5(query.get('id', [''])[0].encode()).hexdigest())
+
+        if path.startswith('/unsplash/'):
+            imagen_id = hashlib.md5(self.path.encode()).hexdigest()[:12]
+            self.send_response(302)
+            self.send_header('Location', f"/images/{imagen_id}.jpg")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            self.server.stats.registrar(302, 0)
+            return
+
+        if path.startswith('/images/'):
+            return self.send_body(200, corpus.imagen, 'image/jpeg', rangos=True,
+                                  etag=path.rsplit('/', 1)[1])
+
+        return self.send_body(404, b'', 'text/plain')
+
+    def inject_error(self):
+        """Con probabilidad `errores`, responder 403/429/503 como los orígenes reales"""
+        if not self.server.errores or self.server.rng.random() >= self.server.errores:
+            return False
+        status = self.server.rng.choice((403, 429, 503))
+        self.send_response(status)
+        if status == 403:
+            self.send_header('X-RateLimit-Remaining', '0')
+            self.send_header('X-RateLimit-Reset', str(int(time.time()) + 1))
+        elif status == 429:
+            self.send_header('Retry-After', '1')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        self.server.stats.registrar(status, 0)
+        return True
+
+    def send_contents(self, query):
+        corpus = self.server.corpus
+        por_pagina = int(query.get('per_page', [self.server.por_pagina])[0])
+        pagina = int(query.get('page', ['1'])[0])
+        inicio = (pagina - 1) * por_pagina
+        numeros = range(inicio + 1, min(corpus.himnos, inicio + por_pagina) + 1)
+        items = [{'name': corpus.nombre_archivo(n), 'type': 'file',
+                  'download_url': f"{self.base}/raw/{n}.txt"} for n in numeros]
+        enlaces = []
+        if inicio + por_pagina < corpus.himnos:
+            enlaces.append(f'<{self.base}{urlparse(self.path).path}?page={pagina + 1}'
+                           f'&per_page={por_pagina}>; rel="next"')
+        headers = {'Link': ', '.join(enlaces)} if enlaces else {}
+        return self.send_json(items, headers=headers)
+
+    def send_json(self, data, etag=False, headers=None, contar=True):
+        body = json.dumps(data).encode('utf-8')
+        tag = f'"{hashlib.md5(body).hexdigest()}"' if etag else None
+        return self.send_body(200, body, 'application/json', etag=tag, headers=headers,
+                              contar=contar)
+
+    def send_body(self, status, body, content_type, rangos=False, etag=None, headers=None,
+                  contar=True):
+        if etag and not etag.startswith('"'):
+            etag = f'"{etag}"'
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            if contar:
+                self.server.stats.registrar(304, 0)
+            return
+
+        inicio = 0
+        match = RANGE_RE.match(self.headers.get('Range', '')) if rangos else None
+        if match and status == 200:
+            inicio = int(match.group(1))
+            if inicio >= len(body):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(body)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                if contar:
+                    self.server.stats.registrar(416, 0)
+                return
+            status = 206
+
+        parte = body[inicio:]
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(parte)))
+        if rangos:
+            self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f"bytes {inicio}-{len(body) - 1}/{len(body)}")
+        if etag:
+            self.send_header('ETag', etag)
+        for nombre, valor in (headers or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+
+        enviados = 0
+        ancho = self.server.ancho_banda
+        try:
+            for i in range(0, len(parte), CHUNK):
+                bloque = parte[i:i + CHUNK]
+                self.wfile.write(bloque)
+                enviados += len(bloque)
+                if ancho:
+                    time.sleep(len(bloque) / ancho)
+        finally:
+            if contar:
+                self.server.stats.registrar(status, enviados)
+
+class ServidorSimulado(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, puerto=0, corpus=None, latencia_ms=0, ancho_banda=0, errores=0.0,
+                 por_pagina=DEFAULT_POR_PAGINA, semilla=0):
+        super().__init__(('127.0.0.1', puerto), Handler)
+        self.corpus = corpus or Corpus()
+        self.latencia = latencia_ms / 1000
+        self.ancho_banda = ancho_banda
+        self.errores = errores
+        self.por_pagina = por_pagina
+        self.rng = random.Random(semilla)
+        self.stats = Estadisticas()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def iniciar(self):
+        """Atiende en un hilo de fondo y retorna el servidor"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+def add_server_arguments(parser):
+    """Opciones comunes con prueba_carga.py"""
+    parser.add_argument('--himnos', type=int, default=DEFAULT_HIMNOS)
+    parser.add_argument('--mp3-kb', type=int, default=DEFAULT_MP3_KB)
+    parser.add_argument('--imagen-kb', type=int, default=DEFAULT_IMAGEN_KB)
+    parser.add_argument('--latencia', type=float, default=0, help="milisegundos por petición")
+    parser.add_argument('--ancho-banda', default='0',
+                        help="por conexión, p. ej. 512kb o 2mb (0 = sin límite)")
+    parser.add_argument('--errores', type=float, default=0.0,
+                        help="probabilidad de responder 403/429/503 (0-1)")
+    parser.add_argument('--por-pagina', type=int, default=DEFAULT_POR_PAGINA,
+                        help="elementos por página en la API de contenidos")
+    parser.add_argument('--semilla', type=int, default=0)
+
+def server_from_args(args, puerto=0):
+    corpus = Corpus(himnos=args.himnos, mp3_kb=args.mp3_kb, imagen_kb=args.imagen_kb)
+    return ServidorSimulado(puerto=puerto, corpus=corpus, latencia_ms=args.latencia,
+                            ancho_banda=parse_bandwidth(args.ancho_banda),
+                            errores=args.errores, por_pagina=args.por_pagina,
+                            semilla=args.semilla)
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor simulado de los orígenes del himnario")
+    parser.add_argument('--puerto', type=int, default=8080)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    servidor = server_from_args(args, puerto=args.puerto)
+    print("=" * 60)
+    print("SERVIDOR SIMULADO - HIMNARIO ADVENTISTA")
+    print("=" * 60)
+    print(f"  API:      {servidor.base_url}/hymn")
+    print(f"  GitHub:   {servidor.base_url}/repos/{servidor.corpus.owner}/{servidor.corpus.repo}")
+    print(f"  Drive:    {servidor.base_url}/uc?export=download&id=c1")
+    print(f"  Unsplash: {servidor.base_url}/unsplash/1920x1080/?{quote('cross,sunset')}")
+    print(f"  Stats:    {servidor.base_url}/__stats")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ Detenido")
+
+if __name__ == "__main__":
+    main()